@@ -5,8 +5,13 @@ import time
 import random
 import os
 from dotenv import load_dotenv
+import sys
 from datetime import datetime
 
+# 共通モジュール（analysis/scripts）を読み込めるようにする
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+from language_id import identify_language
+
 # 環境変数の読み込み（APIキーなどを保存する場合）
 load_dotenv()
 
@@ -145,11 +150,16 @@ def extract_content_from_url(url):
                 paragraphs = soup.find_all('p')
                 content = '\n'.join([p.get_text(strip=True) for p in paragraphs])
             
+            # 本文全体の文字種の割合から言語を判定（ja/en/mixed/unknown）
+            language, language_confidence = identify_language(content)
+            
             return {
                 'url': url,
                 'title': title,
                 'meta_description': meta_desc,
                 'content': content,
+                'language': language,
+                'language_confidence': language_confidence,
                 'extracted_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             }
             
@@ -7,9 +7,18 @@ from collections import Counter
 from wordcloud import WordCloud
 import matplotlib.font_manager as fm
 import japanize_matplotlib
+import os
+import sys
+
+# 共通モジュール（analysis/scripts）を読み込めるようにする
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+from cooccurrence import find_cooccurring_terms
+import char_stats
+from corpus import doc_ids, latest_data_file
+from mapreduce import map_reduce
 
 # データの読み込み
-jp_data_file = 'remote_work_data_jp_20250329_165210.csv'
+jp_data_file = latest_data_file('jp')
 df_jp = pd.read_csv(jp_data_file)
 print(f"日本語データ: {df_jp.shape[0]}行, {df_jp.shape[1]}列")
 
@@ -63,40 +72,41 @@ optimization_keywords_jp = [
     'ハイブリッド', '柔軟', 'スケジュール', '環境'
 ]
 
-# キーワード出現回数を計算
-print("\nキーワード分析を実行中...")
-remote_counts_jp = df_jp['cleaned_content'].apply(lambda x: count_keyword_occurrences(x, remote_keywords_jp))
-productivity_counts_jp = df_jp['cleaned_content'].apply(lambda x: count_keyword_occurrences(x, productivity_keywords_jp))
-optimization_counts_jp = df_jp['cleaned_content'].apply(lambda x: count_keyword_occurrences(x, optimization_keywords_jp))
+# シャード（記事IDで分けた記事の集まり）ごとのキーワード出現回数の合計
+keyword_groups_jp = [remote_keywords_jp, productivity_keywords_jp, optimization_keywords_jp]
+
+def map_keyword_totals(texts):
+    totals = tuple(Counter(dict.fromkeys(keywords, 0)) for keywords in keyword_groups_jp)
+    for text in texts:
+        for group_totals, keywords in zip(totals, keyword_groups_jp):
+            group_totals.update(count_keyword_occurrences(text, keywords))
+    return totals
+
+def keyword_totals_series(totals, keywords):
+    keywords = list(dict.fromkeys(keywords))
+    return pd.Series([totals[k] for k in keywords], index=keywords, dtype=np.int64)
 
-# データフレームに変換
-remote_df_jp = pd.DataFrame(remote_counts_jp.tolist())
-productivity_df_jp = pd.DataFrame(productivity_counts_jp.tolist())
-optimization_df_jp = pd.DataFrame(optimization_counts_jp.tolist())
+# キーワード出現回数を記事IDで分けたシャードごとに並列に計算し、合成する
+print("\nキーワード分析を実行中...")
+remote_totals_jp, productivity_totals_jp, optimization_totals_jp = map_reduce(
+    df_jp['cleaned_content'].tolist(), map_keyword_totals, doc_ids=doc_ids(df_jp)
+)
 
 # キーワードの総出現回数
 print("\nリモートワーク関連キーワードの出現回数（日本語）:")
-print(remote_df_jp.sum().sort_values(ascending=False))
+print(keyword_totals_series(remote_totals_jp, remote_keywords_jp).sort_values(ascending=False))
 
 print("\n生産性関連キーワードの出現回数（日本語）:")
-print(productivity_df_jp.sum().sort_values(ascending=False))
+print(keyword_totals_series(productivity_totals_jp, productivity_keywords_jp).sort_values(ascending=False))
 
 print("\n最適化関連キーワードの出現回数（日本語）:")
-print(optimization_df_jp.sum().sort_values(ascending=False))
+print(keyword_totals_series(optimization_totals_jp, optimization_keywords_jp).sort_values(ascending=False))
 
 # 簡易的な日本語テキスト分析（単語単位ではなく文字単位）
 def count_characters(texts, n=30):
-    # 日本語の文字だけを抽出
-    jp_chars = []
-    for text in texts:
-        if isinstance(text, str):
-            # 半角スペース、数字、アルファベットを除去
-            cleaned = re.sub(r'[\s0-9a-zA-Z]', '', text)
-            jp_chars.extend(list(cleaned))
-    
-    # 文字カウント
-    char_counts = Counter(jp_chars)
-    return char_counts.most_common(n)
+    # 日本語の文字だけを数える（半角スペース、数字、アルファベットを除外）
+    # テキストをコードポイントの配列に変換し、np.bincount で数える
+    return char_stats.count_characters(texts, n=n, exclude_pattern=r'[\s0-9a-zA-Z]')
 
 # 頻出文字を抽出（参考情報として）
 top_chars = count_characters(df_jp['cleaned_content'], n=30)
@@ -148,33 +158,8 @@ plt.ylabel('カテゴリ')
 plt.savefig('jp_article_categories.png')
 plt.close()
 
-# よく出現する単語のペア（共起関係）を分析
-def find_cooccurring_terms(texts, target_terms, window=10):
-    cooccurrences = {}
-    for term in target_terms:
-        cooccurrences[term] = Counter()
-    
-    for text in texts:
-        if not isinstance(text, str):
-            continue
-        
-        for term in target_terms:
-            # 対象単語が文中に出現する位置を全て見つける
-            positions = [m.start() for m in re.finditer(term, text)]
-            for pos in positions:
-                # 前後の文字列をウィンドウサイズ分取得
-                start = max(0, pos - window)
-                end = min(len(text), pos + len(term) + window)
-                context = text[start:end]
-                
-                # 他のターゲット単語がコンテキスト内にあるか確認
-                for other_term in target_terms:
-                    if other_term != term and other_term in context:
-                        cooccurrences[term][other_term] += 1
-    
-    return cooccurrences
-
 # リモートワーク関連の共起関係を分析
+# （位置付き転置インデックスで対象語の出現位置を照合し、共起回数を数える）
 core_terms = ['リモートワーク', 'テレワーク', '在宅勤務', 'コミュニケーション', '生産性']
 cooccurrences = find_cooccurring_terms(df_jp['cleaned_content'].dropna(), core_terms)
 
@@ -1,11 +1,13 @@
 import os
+import sys
 import pandas as pd
 
-# データフォルダのパス
-data_folder = os.path.join(os.getcwd(), "data")
+# 共通モジュール（analysis/scripts）を読み込めるようにする
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+from corpus import latest_data_file
 
-# CSVファイルの読み込み
-file_path = os.path.join(data_folder, "remote_work_all_data_20250329_165210.csv")
+# CSVファイルの読み込み（取得日時が最新のもの）
+file_path = latest_data_file('all')
 df_all = pd.read_csv(file_path)
 
 # 基本情報の確認
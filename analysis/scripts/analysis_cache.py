@@ -0,0 +1,293 @@
+import os
+import sys
+import json
+import time
+import atexit
+import sqlite3
+import functools
+import numpy as np
+
+from corpus import content_hash, cache_path
+from parallel import parallel_map
+
+# 記事ごとの分析結果のキャッシュ（analysis/cache/analysis_cache.sqlite）
+ANALYSIS_CACHE_FILE = cache_path("analysis_cache.sqlite")
+# まとめて書き込む件数（これを超えたらデータベースに書き込む）
+FLUSH_SIZE = 500
+# 1回の問い合わせで検索するキーの数（SQLiteの変数の上限より小さくする）
+QUERY_BATCH_SIZE = 500
+
+
+def _json_default(value):
+    # NumPyの数値などJSONで表せない値
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"JSONに変換できない値です: {type(value).__name__}")
+
+
+class AnalysisCache:
+    """
+    本文のハッシュ値と分析関数のバージョンをキーにした、分析結果のディスクキャッシュ
+
+    SQLiteの1つの表（分析関数名, バージョン, 本文のハッシュ値）→ 結果（JSON）に保存する。
+    書き込みはまとめて行い、接続はプロセスごとに開く（ワーカープロセスからも使える）。
+    """
+
+    def __init__(self, path=ANALYSIS_CACHE_FILE):
+        """
+        Parameters:
+        path (str): データベースのファイル
+        """
+        self.path = path
+        self._connection = None
+        self._pid = None
+        self._pending = []
+        atexit.register(self.flush)
+
+    def _connect(self):
+        if self._connection is None or self._pid != os.getpid():
+            # fork したプロセスでは親の接続を使わない
+            self._connection = sqlite3.connect(self.path, timeout=30)
+            self._pid = os.getpid()
+            self._pending = []
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "analyzer TEXT NOT NULL, version INTEGER NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+                "PRIMARY KEY (analyzer, version, key)) WITHOUT ROWID"
+            )
+        return self._connection
+
+    def get_many(self, analyzer, version, keys):
+        """
+        保存済みの結果を検索する
+
+        Parameters:
+        analyzer (str): 分析関数の名前
+        version (int): 分析関数のバージョン
+        keys (list): 本文のハッシュ値
+
+        Returns:
+        dict: ハッシュ値 -> 結果（保存されていないものは含まない）
+        """
+        connection = self._connect()
+        self.flush()
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        for start in range(0, len(keys), QUERY_BATCH_SIZE):
+            batch = keys[start:start + QUERY_BATCH_SIZE]
+            rows = connection.execute(
+                f"SELECT key, value FROM results WHERE analyzer = ? AND version = ? "
+                f"AND key IN ({','.join('?' * len(batch))})",
+                [analyzer, version] + batch
+            )
+            found.update((key, json.loads(value)) for key, value in rows)
+        return found
+
+    def put_many(self, analyzer, version, items):
+        """
+        結果を保存する（FLUSH_SIZE 件たまるか、flush を呼んだときに書き込む）
+
+        Parameters:
+        analyzer (str): 分析関数の名前
+        version (int): 分析関数のバージョン
+        items (iterable): (ハッシュ値, 結果) の組
+        """
+        self._connect()
+        self._pending.extend(
+            (analyzer, version, key, json.dumps(value, ensure_ascii=False, default=_json_default))
+            for key, value in items
+        )
+        if len(self._pending) >= FLUSH_SIZE:
+            self.flush()
+
+    def flush(self):
+        """まだ書き込んでいない結果をデータベースに書き込む"""
+        if not self._pending or self._connection is None or self._pid != os.getpid():
+            return
+        with self._connection:
+            self._connection.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)", self._pending)
+        self._pending = []
+
+    def clear(self, analyzer=None):
+        """
+        保存済みの結果を削除する
+
+        Parameters:
+        analyzer (str): 分析関数の名前（省略時はすべて）
+        """
+        connection = self._connect()
+        self._pending = [row for row in self._pending if analyzer is not None and row[0] != analyzer]
+        with connection:
+            if analyzer is None:
+                connection.execute("DELETE FROM results")
+            else:
+                connection.execute("DELETE FROM results WHERE analyzer = ?", (analyzer,))
+
+
+_default_cache = None
+
+
+def default_cache():
+    """プロセス内で共有する AnalysisCache"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = AnalysisCache()
+    return _default_cache
+
+
+# 作成した CachedAnalyzer（ヒット率の表示に使う）
+_analyzers = []
+
+
+class CachedAnalyzer:
+    """
+    記事1件を分析する関数の結果を、本文のハッシュ値と関数のバージョンでキャッシュする
+
+    本文が文字列でない・空の場合はキャッシュせずに関数を呼ぶ。
+    分析方法を変えたら version を上げる（古い結果は使われなくなる）。
+    """
+
+    def __init__(self, function, name=None, version=1, cache=None):
+        """
+        Parameters:
+        function (callable): 本文を受け取り、JSONで表せる結果を返す関数
+        name (str): 分析関数の名前（省略時は関数名）
+        version (int): 分析関数のバージョン
+        cache (AnalysisCache): 保存先（省略時は共有のキャッシュ）
+        """
+        functools.update_wrapper(self, function)
+        self.function = function
+        self.name = name or function.__name__
+        self.version = version
+        self._cache = cache
+        self.hits = 0
+        self.misses = 0
+        _analyzers.append(self)
+
+    @property
+    def cache(self):
+        return self._cache if self._cache is not None else default_cache()
+
+    def __call__(self, text):
+        if not isinstance(text, str) or text == '':
+            return self.function(text)
+        key = content_hash(text)
+        found = self.cache.get_many(self.name, self.version, [key])
+        if key in found:
+            self.hits += 1
+            return found[key]
+        self.misses += 1
+        result = self.function(text)
+        self.cache.put_many(self.name, self.version, [(key, result)])
+        return result
+
+    def map(self, texts, batch_function=None, workers=1, initializer=None, initargs=()):
+        """
+        複数の本文をまとめて分析する（保存済みの結果は1回の検索でまとめて取得する）
+
+        未計算の本文だけを分析し、結果の保存は親プロセスで行う。
+
+        Parameters:
+        texts (list): 本文のリスト
+        batch_function (callable): 未計算の本文のリストをまとめて分析する関数（省略時は1件ずつ分析する）
+        workers (int): 1件ずつ分析する場合のワーカープロセス数（Noneなら環境変数 ANALYSIS_WORKERS または全コア、1ならプロセスを使わない）
+        initializer (callable): ワーカーの起動時に1回だけ呼ぶ関数
+        initargs (tuple): initializer の引数
+
+        Returns:
+        list: 本文ごとの結果（texts と同じ順）
+        """
+        texts = list(texts)
+        keys = [content_hash(text) if isinstance(text, str) and text != '' else None for text in texts]
+        found = self.cache.get_many(self.name, self.version, [key for key in keys if key is not None])
+
+        missing = {}
+        for i, key in enumerate(keys):
+            if key is not None and key not in found and key not in missing:
+                missing[key] = i
+        missing_texts = [texts[i] for i in missing.values()]
+        if batch_function is not None:
+            computed = list(batch_function(missing_texts))
+        else:
+            computed = parallel_map(self.function, missing_texts, workers=workers,
+                                    initializer=initializer, initargs=initargs)
+        found.update(zip(missing, computed))
+        self.cache.put_many(self.name, self.version, zip(missing, computed))
+        self.cache.flush()
+
+        self.misses += len(missing)
+        self.hits += sum(1 for key in keys if key is not None) - len(missing)
+        return [found[key] if key is not None else self.function(text) for key, text in zip(keys, texts)]
+
+    def hit_rate(self):
+        """キャッシュのヒット率（呼び出しがなければNaN）"""
+        total = self.hits + self.misses
+        return self.hits / total if total else float('nan')
+
+
+def cached_analysis(name=None, version=1, cache=None):
+    """
+    記事1件を分析する関数を CachedAnalyzer にするデコレーター
+
+    Parameters:
+    name (str): 分析関数の名前（省略時は関数名）
+    version (int): 分析関数のバージョン
+    cache (AnalysisCache): 保存先（省略時は共有のキャッシュ）
+
+    Returns:
+    callable: デコレーター
+    """
+    def decorator(function):
+        return CachedAnalyzer(function, name=name, version=version, cache=cache)
+    return decorator
+
+
+def report_hit_rates():
+    """
+    分析関数ごとのキャッシュのヒット率を表示する
+    """
+    for analyzer in _analyzers:
+        total = analyzer.hits + analyzer.misses
+        if total:
+            print(f"分析キャッシュ {analyzer.name}（v{analyzer.version}）: "
+                  f"{analyzer.hits}/{total}件ヒット（{analyzer.hit_rate():.1%}）、{analyzer.misses}件を計算")
+
+
+if __name__ == "__main__":
+    # 使い方: python analysis_cache.py [文書数] [変更する割合]
+    # 合成した文書で、初回と一部の文書だけを変更した2回目の実行時間とヒット率を比較する
+    import tempfile
+    num_docs = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    changed_ratio = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+
+    def slow_analyzer(text):
+        # 重い分析の代わり（単語の出現を数える）
+        words = text.split()
+        return {'words': len(words), 'unique': len(set(words)), 'chars': sum(map(len, words))}
+
+    rng = np.random.default_rng(42)
+    docs = [' '.join(f"w{w}" for w in rng.integers(0, 5000, size=300)) for _ in range(num_docs)]
+    bench_cache = AnalysisCache(os.path.join(tempfile.mkdtemp(), "bench.sqlite"))
+    analyzer = CachedAnalyzer(slow_analyzer, name='bench', cache=bench_cache)
+
+    start = time.perf_counter()
+    uncached = [slow_analyzer(doc) for doc in docs]
+    print(f"キャッシュなし: {time.perf_counter() - start:.2f}秒")
+
+    start = time.perf_counter()
+    analyzer.map(docs)
+    print(f"初回: {time.perf_counter() - start:.2f}秒")
+
+    changed = rng.choice(num_docs, size=int(num_docs * changed_ratio), replace=False)
+    for i in changed:
+        docs[i] = docs[i] + ' changed'
+    analyzer.hits = analyzer.misses = 0
+    start = time.perf_counter()
+    second = analyzer.map(docs)
+    print(f"2回目（{changed_ratio:.0%}を変更）: {time.perf_counter() - start:.2f}秒")
+    print(f"結果の一致: {all(second[i] == slow_analyzer(docs[i]) for i in range(num_docs))}")
+    report_hit_rates()
@@ -0,0 +1,188 @@
+import re
+import sys
+import time
+import numpy as np
+
+# 英語テキストの単語分割（小文字化した後に適用）
+EN_WORD_PATTERN = re.compile(r"[a-z]+(?:'[a-z]+)?")
+
+
+class LexiconSentiment:
+    """
+    辞書ベースの感情スコアをバッチ単位でベクトル計算するエンジン
+
+    単語を整数IDに変換し、辞書の極性・主観性をNumPy配列として保持する。
+    バッチ内の全トークンのIDを1つの配列に連結し、配列の添字参照と
+    文書ごとの合計（np.bincount）で極性と主観性をまとめて計算する。
+
+    mode='ratio'（日本語の analyze_jp_sentiment と同じ計算）:
+        極性 = 感情語のスコア合計 / 感情語数
+        主観性 = 感情語数 / 単語数（上限1.0）
+    mode='mean'（TextBlobの辞書を使う英語向けの近似）:
+        極性・主観性 = 辞書に含まれる単語の値の平均
+        （TextBlobの否定語・強調語の処理は行わないため、英語の標準は textblob_sentiment）
+    """
+
+    def __init__(self, polarities, subjectivities=None):
+        """
+        Parameters:
+        polarities (dict): 単語 -> 極性スコア
+        subjectivities (dict): 単語 -> 主観性スコア（省略時は0）
+        """
+        subjectivities = subjectivities or {}
+        words = list(polarities.keys())
+        # ID 0 は辞書にない単語
+        self.vocabulary = {word: i + 1 for i, word in enumerate(words)}
+        self.polarity = np.zeros(len(words) + 1, dtype=np.float64)
+        self.subjectivity = np.zeros(len(words) + 1, dtype=np.float64)
+        self.polarity[1:] = [polarities[w] for w in words]
+        self.subjectivity[1:] = [subjectivities.get(w, 0.0) for w in words]
+        self.in_lexicon = np.ones(len(words) + 1, dtype=np.float64)
+        self.in_lexicon[0] = 0.0
+
+    @classmethod
+    def from_textblob(cls):
+        """
+        TextBlob（PatternAnalyzer）の英語感情辞書からエンジンを作成する
+
+        Returns:
+        LexiconSentiment: 英語用のエンジン
+        """
+        from textblob.en import sentiment as textblob_lexicon
+        if hasattr(textblob_lexicon, 'load'):
+            textblob_lexicon.load()
+
+        polarities = {}
+        subjectivities = {}
+        for word in textblob_lexicon:
+            # 品詞ごとの値の平均がキーNoneに入っている
+            entry = textblob_lexicon[word]
+            values = entry.get(None) or next(iter(entry.values()))
+            polarities[word] = values[0]
+            subjectivities[word] = values[1]
+        return cls(polarities, subjectivities)
+
+    def token_ids(self, tokens):
+        """
+        トークン列を整数IDの配列に変換する
+
+        Parameters:
+        tokens (list): トークンのリスト
+
+        Returns:
+        numpy.ndarray: 単語IDの配列（辞書にない単語は0）
+        """
+        vocabulary = self.vocabulary
+        return np.fromiter((vocabulary.get(t, 0) for t in tokens), dtype=np.int32, count=len(tokens))
+
+    def score_batch(self, token_lists, mode='ratio'):
+        """
+        複数文書の感情スコアをまとめて計算する
+
+        Parameters:
+        token_lists (list): 文書ごとのトークンのリスト
+        mode (str): 'ratio'（日本語の計算方法）または 'mean'（平均）
+
+        Returns:
+        tuple: (極性の配列, 主観性の配列)
+        """
+        num_docs = len(token_lists)
+        lengths = np.fromiter((len(tokens) for tokens in token_lists), dtype=np.int64, count=num_docs)
+        if lengths.sum() > 0:
+            ids = np.concatenate([self.token_ids(tokens) for tokens in token_lists if len(tokens)])
+        else:
+            ids = np.zeros(0, dtype=np.int32)
+        # 各トークンが属する文書の番号（セグメント）
+        doc_index = np.repeat(np.arange(num_docs), lengths)
+
+        hits = np.bincount(doc_index, weights=self.in_lexicon[ids], minlength=num_docs)
+        polarity_sum = np.bincount(doc_index, weights=self.polarity[ids], minlength=num_docs)
+
+        polarity = polarity_sum / np.maximum(hits, 1)
+        if mode == 'ratio':
+            subjectivity = np.minimum(1.0, hits / np.maximum(lengths, 1))
+        elif mode == 'mean':
+            subjectivity_sum = np.bincount(doc_index, weights=self.subjectivity[ids], minlength=num_docs)
+            subjectivity = subjectivity_sum / np.maximum(hits, 1)
+        else:
+            raise ValueError(f"不明なmodeです: {mode}")
+        return polarity, subjectivity
+
+    def score_many(self, token_lists, mode='ratio'):
+        """
+        複数文書の感情スコアを、文書ごとの辞書のリストで返す（score_batch と同じ計算）
+
+        Parameters:
+        token_lists (list): 文書ごとのトークンのリスト
+        mode (str): 'ratio' または 'mean'
+
+        Returns:
+        list: {'polarity': 極性, 'subjectivity': 主観性} のリスト
+        """
+        polarity, subjectivity = self.score_batch(token_lists, mode=mode)
+        return [{'polarity': float(p), 'subjectivity': float(s)} for p, s in zip(polarity, subjectivity)]
+
+    def score(self, tokens, mode='ratio'):
+        """
+        1つの文書の感情スコアを計算する
+
+        Parameters:
+        tokens (list): トークンのリスト
+        mode (str): 'ratio' または 'mean'
+
+        Returns:
+        dict: {'polarity': 極性, 'subjectivity': 主観性}
+        """
+        polarity, subjectivity = self.score_batch([tokens], mode=mode)
+        return {'polarity': float(polarity[0]), 'subjectivity': float(subjectivity[0])}
+
+
+def textblob_sentiment(text):
+    """
+    TextBlob（PatternAnalyzer）で英語テキストの感情を分析する
+
+    否定語（not など）や強調語（very など）も考慮される。英語の感情分析の標準の方法で、
+    LexiconSentiment の mode='mean' はこれを近似した高速版（符号が逆になる文もある）。
+
+    Parameters:
+    text (str): 英語テキスト
+
+    Returns:
+    dict: {'polarity': 極性, 'subjectivity': 主観性}
+    """
+    if not isinstance(text, str) or text == '':
+        return {'polarity': 0, 'subjectivity': 0}
+    from textblob import TextBlob
+    sentiment = TextBlob(text).sentiment
+    return {'polarity': sentiment.polarity, 'subjectivity': sentiment.subjectivity}
+
+
+def tokenize_en(text):
+    """
+    英語テキストを小文字の単語リストに分割する
+
+    Parameters:
+    text (str): 英語テキスト
+
+    Returns:
+    list: 単語のリスト
+    """
+    if not isinstance(text, str):
+        return []
+    return EN_WORD_PATTERN.findall(text.lower())
+
+
+if __name__ == "__main__":
+    # 使い方: python batch_sentiment.py [文書数]
+    # 合成した英語文書でスループットを計測する
+    num_docs = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    engine = LexiconSentiment.from_textblob()
+    rng = np.random.default_rng(42)
+    words = list(engine.vocabulary.keys()) + ['remote', 'work', 'team', 'meeting', 'office'] * 500
+    docs = [' '.join(rng.choice(words, size=800)) for _ in range(num_docs)]
+
+    start = time.perf_counter()
+    token_lists = [tokenize_en(doc) for doc in docs]
+    polarity, subjectivity = engine.score_batch(token_lists, mode='mean')
+    elapsed = time.perf_counter() - start
+    print(f"{num_docs}文書（各800語）: {elapsed:.2f}秒, {num_docs / elapsed:.0f} 文書/秒")
@@ -0,0 +1,236 @@
+import re
+import sys
+import time
+from functools import lru_cache
+import numpy as np
+
+# Unicodeのコードポイントの総数
+NUM_CODEPOINTS = 0x110000
+
+# 文字種の範囲（開始, 終了）。終了も範囲に含む
+SCRIPT_RANGES = {
+    'ascii': (0x0000, 0x007F),
+    'hiragana': (0x3040, 0x309F),
+    'katakana': (0x30A0, 0x30FF),
+    'kanji': (0x4E00, 0x9FAF),
+}
+# 文字種の番号（0はどの範囲にも含まれない文字）
+SCRIPTS = ['other'] + list(SCRIPT_RANGES.keys())
+
+# 範囲の境界と、各区間の文字種の番号（np.searchsorted で一括して分類する）
+_SCRIPT_BOUNDARIES = np.array(
+    [edge for start, end in sorted(SCRIPT_RANGES.values()) for edge in (start, end + 1)], dtype=np.uint32
+)
+_SCRIPT_OF_INTERVAL = np.zeros(len(_SCRIPT_BOUNDARIES) + 1, dtype=np.int64)
+for _name, (_start, _end) in SCRIPT_RANGES.items():
+    _SCRIPT_OF_INTERVAL[np.searchsorted(_SCRIPT_BOUNDARIES, _start, side='right')] = SCRIPTS.index(_name)
+
+# 一度に変換する文字数の目安（UTF-32で約64MB）
+CHUNK_CHARS = 16 * 1024 * 1024
+
+
+def codepoints(text):
+    """
+    テキストをコードポイントの配列に変換する
+
+    UTF-32（リトルエンディアン）に変換したバイト列を、コピーせずにuint32配列として参照する。
+
+    Parameters:
+    text (str): 対象テキスト
+
+    Returns:
+    numpy.ndarray: コードポイントのuint32配列
+    """
+    return np.frombuffer(text.encode('utf-32-le', errors='surrogatepass'), dtype='<u4')
+
+
+def script_mask(points, script):
+    """
+    指定した文字種のコードポイントをTrueにした配列を返す
+
+    Parameters:
+    points (numpy.ndarray): コードポイントの配列
+    script (str): 'ascii'、'hiragana'、'katakana'、'kanji'
+
+    Returns:
+    numpy.ndarray: 真偽値の配列
+    """
+    start, end = SCRIPT_RANGES[script]
+    return (points >= start) & (points <= end)
+
+
+def script_ids(points):
+    """
+    コードポイントごとの文字種の番号（SCRIPTSの添字）を返す
+
+    Parameters:
+    points (numpy.ndarray): コードポイントの配列
+
+    Returns:
+    numpy.ndarray: 文字種の番号の配列
+    """
+    return _SCRIPT_OF_INTERVAL[np.searchsorted(_SCRIPT_BOUNDARIES, points, side='right')]
+
+
+def script_counts(texts):
+    """
+    文書ごとの文字種別の文字数を数える
+
+    Parameters:
+    texts (list): テキストのリスト（文字列以外は空として扱う）
+
+    Returns:
+    numpy.ndarray: 文書 × 文字種（SCRIPTSの順）の文字数
+    """
+    texts = [text if isinstance(text, str) else '' for text in texts]
+    counts = np.zeros((len(texts), len(SCRIPTS)), dtype=np.int64)
+    for first, last, points in iter_codepoint_chunks(texts):
+        lengths = [len(text) for text in texts[first:last]]
+        doc_index = np.repeat(np.arange(last - first), lengths)
+        codes = doc_index * len(SCRIPTS) + script_ids(points)
+        counts[first:last] = np.bincount(codes, minlength=(last - first) * len(SCRIPTS)).reshape(-1, len(SCRIPTS))
+    return counts
+
+
+def iter_codepoint_chunks(texts):
+    """
+    テキストを CHUNK_CHARS 程度ずつ連結して、コードポイントの配列にする
+
+    Parameters:
+    texts (list): テキスト（文字列）のリスト
+
+    Returns:
+    generator: (最初の文書番号, 最後の文書番号+1, コードポイントの配列) のジェネレーター
+    """
+    first = 0
+    while first < len(texts):
+        last = first
+        size = 0
+        while last < len(texts) and (last == first or size + len(texts[last]) <= CHUNK_CHARS):
+            size += len(texts[last])
+            last += 1
+        yield first, last, codepoints(''.join(texts[first:last]))
+        first = last
+
+
+class CharHistogram:
+    """
+    コードポイントの出現回数（ヒストグラム）
+
+    テキストをまとめてコードポイントの配列に変換し、np.bincount で数える。
+    同じ回数の文字を最初に出現した順に並べられるよう、各文字の最初の出現位置も保持する。
+    """
+
+    def __init__(self):
+        self.counts = np.zeros(NUM_CODEPOINTS, dtype=np.int64)
+        self.first_seen = np.full(NUM_CODEPOINTS, np.iinfo(np.int64).max, dtype=np.int64)
+        self.num_chars = 0
+
+    def add(self, texts, exclude=None):
+        """
+        テキストの文字を数える
+
+        Parameters:
+        texts (iterable): テキスト（文字列以外は無視する）
+        exclude (numpy.ndarray): 除外するコードポイントをTrueにした表（長さ NUM_CODEPOINTS）
+        """
+        texts = [text for text in texts if isinstance(text, str)]
+        for _, _, points in iter_codepoint_chunks(texts):
+            positions = np.arange(self.num_chars, self.num_chars + len(points), dtype=np.int64)
+            self.num_chars += len(points)
+            if exclude is not None:
+                keep = ~exclude[points]
+                points = points[keep]
+                positions = positions[keep]
+            self.counts += np.bincount(points, minlength=NUM_CODEPOINTS)
+            # 並べ替えをせず、文字ごとの最小の位置を直接求める
+            np.minimum.at(self.first_seen, points, positions)
+        return self
+
+    def most_common(self, n=None):
+        """
+        頻出文字を返す（Counter(文字のリスト).most_common(n) と同じ結果）
+
+        Parameters:
+        n (int): 件数（省略時はすべて）
+
+        Returns:
+        list: (文字, 出現回数) のリスト
+        """
+        present = np.flatnonzero(self.counts)
+        order = np.lexsort((self.first_seen[present], -self.counts[present]))[:n]
+        return [(chr(c), int(self.counts[c])) for c in present[order].tolist()]
+
+    def script_totals(self):
+        """
+        文字種別の合計を返す
+
+        Returns:
+        dict: 文字種 -> 文字数
+        """
+        present = np.flatnonzero(self.counts)
+        totals = np.bincount(script_ids(present), weights=self.counts[present], minlength=len(SCRIPTS))
+        return {script: int(total) for script, total in zip(SCRIPTS, totals)}
+
+
+def exclusion_table(pattern):
+    """
+    1文字の正規表現（文字クラス）に一致するコードポイントをTrueにした表を作成する
+
+    Parameters:
+    pattern (str): 1文字に一致する正規表現（例: r'[\\s0-9a-zA-Z]'）
+
+    Returns:
+    numpy.ndarray: 長さ NUM_CODEPOINTS の真偽値配列
+    """
+    return _exclusion_table(pattern).copy()
+
+
+@lru_cache(maxsize=16)
+def _exclusion_table(pattern):
+    regex = re.compile(pattern)
+    table = np.zeros(NUM_CODEPOINTS, dtype=bool)
+    table[[c for c in range(NUM_CODEPOINTS) if regex.fullmatch(chr(c))]] = True
+    return table
+
+
+def count_characters(texts, n=30, exclude_pattern=r'[\s0-9a-zA-Z]'):
+    """
+    テキスト全体の頻出文字を数える
+
+    Parameters:
+    texts (iterable): テキスト
+    n (int): 件数
+    exclude_pattern (str): 数えない文字の正規表現（1文字に一致するもの）
+
+    Returns:
+    list: (文字, 出現回数) のリスト（回数の多い順、同数は出現順）
+    """
+    exclude = _exclusion_table(exclude_pattern) if exclude_pattern else None
+    return CharHistogram().add(texts, exclude=exclude).most_common(n)
+
+
+if __name__ == "__main__":
+    # 使い方: python char_stats.py [文字数（百万単位）]
+    # 合成した日本語テキストで従来の Counter による集計と比較する
+    millions = float(sys.argv[1]) if len(sys.argv) > 1 else 50
+    rng = np.random.default_rng(42)
+    alphabet = np.array(list("あいうえおかきくけこリモートワーク生産性在宅勤務会議 abc123\n"))
+    doc_chars = 20000
+    num_docs = int(millions * 1_000_000 / doc_chars)
+    texts = [''.join(rng.choice(alphabet, size=doc_chars)) for _ in range(num_docs)]
+
+    start = time.perf_counter()
+    result = count_characters(texts, n=30)
+    elapsed = time.perf_counter() - start
+    print(f"{num_docs * doc_chars / 1e6:.0f}百万文字: {elapsed:.2f}秒")
+
+    if millions <= 10:
+        from collections import Counter
+        start = time.perf_counter()
+        chars = []
+        for text in texts:
+            chars.extend(list(re.sub(r'[\s0-9a-zA-Z]', '', text)))
+        legacy = Counter(chars).most_common(30)
+        legacy_elapsed = time.perf_counter() - start
+        print(f"従来の実装: {legacy_elapsed:.2f}秒, 結果の一致: {legacy == result}")
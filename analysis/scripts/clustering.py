@@ -0,0 +1,313 @@
+import os
+from functools import partial
+import numpy as np
+import pandas as pd
+import joblib
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.decomposition import TruncatedSVD
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics import silhouette_score
+from sklearn.preprocessing import StandardScaler, normalize
+
+from corpus import cache_path
+from mapreduce import map_reduce
+
+# シルエット係数の計算に使う最大の文書数（全件だと文書数の2乗の計算になる）
+SILHOUETTE_SAMPLE_SIZE = 2000
+
+
+def merge_article_features(base_df, frames, on='doc_id'):
+    """
+    記事IDで、感情・構造・読みやすさなどの数値の列を1つの表にまとめる
+
+    base_df の行の順序はそのまま保ち、frames の同じ名前の列や数値以外の列は使わない。
+
+    Parameters:
+    base_df (pandas.DataFrame): 基準の表（記事IDの列を持つもの）
+    frames (list): 追加する表のリスト（Noneは無視する）
+    on (str): 記事IDの列
+
+    Returns:
+    pandas.DataFrame: 列を追加した表
+    """
+    merged = base_df
+    for frame in frames:
+        if frame is None or on not in frame.columns:
+            continue
+        columns = [
+            column for column in frame.select_dtypes(include='number').columns
+            if column != on and column not in merged.columns
+        ]
+        if columns:
+            merged = merged.merge(frame[[on] + columns].drop_duplicates(on), on=on, how='left')
+    return merged
+
+
+class ArticleClusterer:
+    """
+    数値の特徴量とTF-IDFの潜在意味（LSA）成分による記事のクラスタリング
+
+    数値の列は標準化し、本文はTF-IDFをTruncatedSVDで次元削減した成分（行ごとに正規化）を
+    text_weight 倍して連結する。クラスタリングは MiniBatchKMeans で行うため、
+    大量の記事でもメモリ使用量が抑えられ、新しい記事で partial_fit することもできる。
+    """
+
+    def __init__(self, n_clusters=4, lsa_components=20, text_weight=1.0, batch_size=1024, random_state=42):
+        """
+        Parameters:
+        n_clusters (int): クラスター数
+        lsa_components (int): 本文のLSA成分の数（0なら本文を使わない）
+        text_weight (float): 本文の成分の重み
+        batch_size (int): MiniBatchKMeans のミニバッチの大きさ
+        random_state (int): 乱数のシード
+        """
+        self.n_clusters = n_clusters
+        self.lsa_components = lsa_components
+        self.text_weight = text_weight
+        self.batch_size = batch_size
+        self.random_state = random_state
+        self.columns = None
+        self.medians = None
+        self.scaler = None
+        self.vectorizer = None
+        self.svd = None
+        self.kmeans = None
+
+    def fit_features(self, features_df, texts=None):
+        """
+        特徴量の変換（欠損値の補完、標準化、LSA）を学習する
+
+        Parameters:
+        features_df (pandas.DataFrame): 数値の特徴量の表
+        texts (list): 記事の本文（Noneなら本文を使わない）
+
+        Returns:
+        ArticleClusterer: 自分自身
+        """
+        self.columns = list(features_df.columns)
+        self.medians = features_df.median(numeric_only=True).reindex(self.columns).fillna(0.0)
+        self.scaler = StandardScaler().fit(features_df.fillna(self.medians).values)
+        if texts is not None and self.lsa_components:
+            texts = [text if isinstance(text, str) else '' for text in texts]
+            self.vectorizer = TfidfVectorizer(max_df=0.95, min_df=2)
+            tfidf = self.vectorizer.fit_transform(texts)
+            n_components = min(self.lsa_components, tfidf.shape[1] - 1)
+            if n_components > 0:
+                self.svd = TruncatedSVD(n_components=n_components, random_state=self.random_state).fit(tfidf)
+            else:
+                self.vectorizer = None
+        return self
+
+    def transform(self, features_df, texts=None):
+        """
+        記事の特徴量の行列を作成する
+
+        Parameters:
+        features_df (pandas.DataFrame): 数値の特徴量の表（fit_features と同じ列）
+        texts (list): 記事の本文
+
+        Returns:
+        numpy.ndarray: 記事 × 特徴量 の行列
+        """
+        numeric = self.scaler.transform(features_df[self.columns].fillna(self.medians).values)
+        if self.svd is None or texts is None:
+            return numeric
+        texts = [text if isinstance(text, str) else '' for text in texts]
+        lsa = normalize(self.svd.transform(self.vectorizer.transform(texts)))
+        return np.hstack([numeric, lsa * self.text_weight])
+
+    def fit(self, features_df, texts=None):
+        """
+        特徴量の変換とクラスタリングを学習する
+
+        Parameters:
+        features_df (pandas.DataFrame): 数値の特徴量の表
+        texts (list): 記事の本文
+
+        Returns:
+        numpy.ndarray: 記事ごとのクラスター番号
+        """
+        self.fit_features(features_df, texts)
+        X = self.transform(features_df, texts)
+        self.kmeans = make_kmeans(self.n_clusters, self.batch_size, self.random_state).fit(X)
+        return self.kmeans.labels_
+
+    def predict(self, features_df, texts=None):
+        """
+        記事のクラスターを推定する（モデルは更新しない）
+
+        Parameters:
+        features_df (pandas.DataFrame): 数値の特徴量の表
+        texts (list): 記事の本文
+
+        Returns:
+        numpy.ndarray: 記事ごとのクラスター番号
+        """
+        return self.kmeans.predict(self.transform(features_df, texts))
+
+    def partial_fit(self, features_df, texts=None):
+        """
+        新しい記事でクラスターの中心を更新し、その記事のクラスターを返す
+
+        Parameters:
+        features_df (pandas.DataFrame): 新しい記事の数値の特徴量の表
+        texts (list): 新しい記事の本文
+
+        Returns:
+        numpy.ndarray: 記事ごとのクラスター番号
+        """
+        X = self.transform(features_df, texts)
+        self.kmeans.partial_fit(X)
+        return self.kmeans.predict(X)
+
+
+def make_kmeans(n_clusters, batch_size=1024, random_state=42):
+    """
+    MiniBatchKMeans を作成する
+
+    Parameters:
+    n_clusters (int): クラスター数
+    batch_size (int): ミニバッチの大きさ
+    random_state (int): 乱数のシード
+
+    Returns:
+    sklearn.cluster.MiniBatchKMeans: クラスタリングのモデル
+    """
+    return MiniBatchKMeans(n_clusters=n_clusters, batch_size=batch_size, n_init=3, random_state=random_state)
+
+
+def sampled_silhouette(X, labels, sample_size=SILHOUETTE_SAMPLE_SIZE, random_state=42):
+    """
+    無作為に選んだ記事でシルエット係数を計算する
+
+    Parameters:
+    X (numpy.ndarray): 記事 × 特徴量 の行列
+    labels (numpy.ndarray): 記事ごとのクラスター番号
+    sample_size (int): 使う記事数の上限
+    random_state (int): 乱数のシード
+
+    Returns:
+    float: シルエット係数（クラスターが1つしかない場合はNaN）
+    """
+    if len(np.unique(labels)) < 2 or len(np.unique(labels)) >= len(labels):
+        return np.nan
+    sample_size = sample_size if len(labels) > sample_size else None
+    return float(silhouette_score(X, labels, sample_size=sample_size, random_state=random_state))
+
+
+def _evaluate_ks(ks, X, batch_size, random_state, sample_size):
+    # ワーカーでクラスター数ごとにクラスタリングし、評価する
+    rows = []
+    for k in ks:
+        kmeans = make_kmeans(k, batch_size, random_state).fit(X)
+        rows.append({
+            'k': k,
+            'silhouette': sampled_silhouette(X, kmeans.labels_, sample_size, random_state),
+            'inertia': float(kmeans.inertia_),
+        })
+    return rows
+
+
+def evaluate_k(X, k_values=range(2, 9), batch_size=1024, random_state=42,
+               sample_size=SILHOUETTE_SAMPLE_SIZE, workers=None):
+    """
+    クラスター数ごとのシルエット係数と慣性を並列に計算する
+
+    Parameters:
+    X (numpy.ndarray): 記事 × 特徴量 の行列
+    k_values (iterable): 評価するクラスター数
+    batch_size (int): MiniBatchKMeans のミニバッチの大きさ
+    random_state (int): 乱数のシード
+    sample_size (int): シルエット係数に使う記事数の上限
+    workers (int): ワーカープロセス数
+
+    Returns:
+    pandas.DataFrame: 'k'、'silhouette'、'inertia' の表（k の順）
+    """
+    k_values = [k for k in k_values if 2 <= k < len(X)]
+    if not k_values:
+        return pd.DataFrame(columns=['k', 'silhouette', 'inertia'])
+    rows = map_reduce(
+        k_values,
+        partial(_evaluate_ks, X=X, batch_size=batch_size, random_state=random_state, sample_size=sample_size),
+        workers=workers, num_shards=len(k_values)
+    )
+    return pd.DataFrame(rows)
+
+
+def _state_path(name):
+    return cache_path('clusters', name, 'clusterer.joblib')
+
+
+def _assignments_path(name):
+    return cache_path('clusters', name, 'assignments.csv')
+
+
+def load_assignments(name):
+    """
+    保存したクラスターの割り当てを読み込む
+
+    Parameters:
+    name (str): クラスタリングの名前
+
+    Returns:
+    pandas.Series: 記事ID -> クラスター番号（保存されていなければ空）
+    """
+    path = _assignments_path(name)
+    if not os.path.exists(path):
+        return pd.Series(dtype=np.int64, name='cluster')
+    saved = pd.read_csv(path)
+    return pd.Series(saved['cluster'].values, index=saved['doc_id'].values, name='cluster')
+
+
+def assign_clusters(name, doc_ids, features_df, texts=None, n_clusters=4, refit=False, **params):
+    """
+    記事IDごとのクラスターを返す（保存済みの記事は前回の割り当てを使い、新しい記事だけを割り当てる）
+
+    初回（または refit=True、クラスター数や特徴量の列が変わった場合）は全記事で学習する。
+    2回目以降は新しい記事だけで partial_fit し、その記事のクラスターを追加する。
+    既存の記事のクラスター番号は変わらない。
+
+    Parameters:
+    name (str): クラスタリングの名前（analysis/cache/clusters/<name>/ に保存する）
+    doc_ids (list): 記事ごとの記事ID
+    features_df (pandas.DataFrame): 数値の特徴量の表（doc_ids と同じ順）
+    texts (list): 記事の本文（doc_ids と同じ順。Noneなら本文を使わない）
+    n_clusters (int): クラスター数
+    refit (bool): 保存済みの結果を使わずに学習し直すかどうか
+    params: ArticleClusterer のその他のパラメータ
+
+    Returns:
+    tuple: (記事ごとのクラスター番号の配列, ArticleClusterer)
+    """
+    doc_ids = np.asarray(doc_ids, dtype=np.int64)
+    features_df = features_df.reset_index(drop=True)
+    clusterer = None
+    assignments = load_assignments(name)
+    if not refit and os.path.exists(_state_path(name)):
+        clusterer = joblib.load(_state_path(name))
+        if clusterer.n_clusters != n_clusters or clusterer.columns != list(features_df.columns):
+            clusterer = None
+
+    if clusterer is None:
+        clusterer = ArticleClusterer(n_clusters=n_clusters, **params)
+        labels = clusterer.fit(features_df, texts)
+        assignments = pd.Series(labels, index=doc_ids, name='cluster')
+        assignments = assignments[~assignments.index.duplicated()]
+    else:
+        new = ~pd.Index(doc_ids).isin(assignments.index) & ~pd.Index(doc_ids).duplicated()
+        if new.any():
+            new_rows = np.flatnonzero(new)
+            new_texts = [texts[i] for i in new_rows] if texts is not None else None
+            labels = clusterer.partial_fit(features_df.iloc[new_rows], new_texts)
+            assignments = pd.concat([assignments, pd.Series(labels, index=doc_ids[new_rows], name='cluster')])
+
+    # 書きかけのファイルを読まないよう、一時ファイルに書いてから置き換える
+    tmp_suffix = f".{os.getpid()}.tmp"
+    joblib.dump(clusterer, _state_path(name) + tmp_suffix)
+    os.replace(_state_path(name) + tmp_suffix, _state_path(name))
+    pd.DataFrame({'doc_id': assignments.index, 'cluster': assignments.values}).to_csv(
+        _assignments_path(name) + tmp_suffix, index=False
+    )
+    os.replace(_assignments_path(name) + tmp_suffix, _assignments_path(name))
+    return assignments.reindex(doc_ids).values.astype(np.int64), clusterer
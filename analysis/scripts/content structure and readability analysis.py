@@ -5,123 +5,39 @@ import seaborn as sns
 import re
 import numpy as np
 from collections import Counter
+from readability import analyze_readability, analyze_readability_batch
+from structure_scanner import scan_structure
+from analysis_cache import cached_analysis, CachedAnalyzer, report_hit_rates
+from corpus import latest_data_file
 
 # データ読み込み
-data_folder = os.path.join("..", "data")
-file_path = os.path.join(data_folder, "remote_work_data_en_20250329_165210.csv")
+file_path = latest_data_file('en')
 df_en = pd.read_csv(file_path)
 
 # フォント設定
 plt.rcParams['font.family'] = 'Hiragino Sans'
 
+# 記事ごとの分析に使うワーカープロセス数（Noneなら環境変数 ANALYSIS_WORKERS または全コア、1ならプロセスを使わない）
+analysis_workers = None
+
 # コンテンツの構造を分析する関数
+# 記事ごとの分析結果は本文のハッシュ値とバージョンでキャッシュする（分析方法を変えたら version を上げる）
+@cached_analysis(version=1)
 def analyze_structure(text):
-    if not isinstance(text, str) or text == '':
-        return {'headings': 0, 'paragraphs': 0, 'lists': 0, 'avg_paragraph_length': 0}
-    
-    # 見出しっぽい行を検出（大文字が多い短い行、または数字で始まる行）
-    lines = text.split('\n')
-    headings = 0
-    for line in lines:
-        line = line.strip()
-        if len(line) > 0 and len(line) < 100:  # 短い行
-            uppercase_ratio = sum(1 for c in line if c.isupper()) / len(line)
-            if uppercase_ratio > 0.5 or re.match(r'^\d+[\.\)]\s', line):
-                headings += 1
-    
-    # 段落数（空行で区切られた部分）
-    paragraphs = len([p for p in re.split(r'\n\s*\n', text) if p.strip()])
-    
-    # リスト項目（箇条書き）
-    list_items = len(re.findall(r'^\s*[\-\*\•]\s+', text, re.MULTILINE))
-    
-    # 段落の平均長（文字数）
-    if paragraphs > 0:
-        paragraph_texts = [p.strip() for p in re.split(r'\n\s*\n', text) if p.strip()]
-        avg_paragraph_length = sum(len(p) for p in paragraph_texts) / paragraphs
-    else:
-        avg_paragraph_length = 0
-    
-    return {
-        'headings': headings,
-        'paragraphs': paragraphs,
-        'lists': list_items,
-        'avg_paragraph_length': avg_paragraph_length
-    }
-
-# 読みやすさを分析する関数
-def analyze_readability(text):
-    if not isinstance(text, str) or text == '':
-        return {'flesch_reading_ease': 0, 'flesch_kincaid_grade': 0, 'avg_sentence_length': 0}
-    
-    # 文の分割
-    sentences = re.split(r'[.!?]+', text)
-    sentences = [s.strip() for s in sentences if s.strip()]
-    
-    # 文の平均長（単語数）
-    avg_sentence_length = sum(len(s.split()) for s in sentences) / len(sentences) if sentences else 0
-    
-    # Flesch Reading Ease (FRE) スコア
-    # 高いほど読みやすい (0-100)
-    word_count = len(text.split())
-    sentence_count = len(sentences)
-    
-    # 単語あたりの平均音節数の近似値（英語向け）
-    syllable_count = sum(count_syllables(word) for word in text.split())
-    
-    if sentence_count > 0 and word_count > 0:
-        fre = 206.835 - 1.015 * (word_count / sentence_count) - 84.6 * (syllable_count / word_count)
-        fkg = 0.39 * (word_count / sentence_count) + 11.8 * (syllable_count / word_count) - 15.59
-    else:
-        fre = 0
-        fkg = 0
-    
-    return {
-        'flesch_reading_ease': fre,
-        'flesch_kincaid_grade': fkg,
-        'avg_sentence_length': avg_sentence_length
-    }
-
-# 英単語の音節数を推定する関数（簡易版）
-def count_syllables(word):
-    word = word.lower()
-    if len(word) <= 3:
-        return 1
-    
-    # 母音をカウント
-    vowels = "aeiouy"
-    count = 0
-    prev_is_vowel = False
-    
-    for char in word:
-        is_vowel = char in vowels
-        if is_vowel and not prev_is_vowel:
-            count += 1
-        prev_is_vowel = is_vowel
-    
-    # 特定のパターンで調整
-    if word.endswith('e'):
-        count -= 1
-    if word.endswith('le') and len(word) > 2 and word[-3] not in vowels:
-        count += 1
-    if count == 0:
-        count = 1
-        
-    return count
+    # 見出し・段落・リスト項目を1回の行走査でまとめて数える
+    return scan_structure(text, language='en')
 
 # 記事ごとの構造と読みやすさの分析
-structure_data = []
-readability_data = []
-titles = []
-
-for i, row in df_en.iterrows():
-    if isinstance(row['content'], str) and row['content'] != '':
-        structure = analyze_structure(row['content'])
-        readability_metrics = analyze_readability(row['content'])
-        
-        structure_data.append(structure)
-        readability_data.append(readability_metrics)
-        titles.append(row['title'] if isinstance(row['title'], str) else '')
+# 構造はキャッシュにない記事だけを複数プロセスで分析する（結果は en_contents と同じ順）
+en_contents = [c for c in df_en['content'] if isinstance(c, str) and c != '']
+structure_data = analyze_structure.map(en_contents, workers=analysis_workers)
+titles = [row['title'] if isinstance(row['title'], str) else ''
+          for _, row in df_en.iterrows() if isinstance(row['content'], str) and row['content'] != '']
+
+# 読みやすさは全記事分をまとめて計算する（音節数は単語ごとにキャッシュされる）
+# 前回から変わっていない記事はキャッシュの結果を使い、新しい記事だけをまとめて計算する
+cached_readability = CachedAnalyzer(analyze_readability, version=1)
+readability_data = cached_readability.map(en_contents, batch_function=analyze_readability_batch)
 
 # 結果をデータフレームに
 structure_df = pd.DataFrame({
@@ -197,4 +113,7 @@ print(f"平均段落長: {structure_df['avg_paragraph_length'].mean():.1f}文字
 print("\n全体の読みやすさ統計:")
 print(f"平均Flesch Reading Ease: {readability_df['flesch_reading_ease'].mean():.1f} (高いほど読みやすい)")
 print(f"平均Flesch-Kincaid Grade Level: {readability_df['flesch_kincaid_grade'].mean():.1f} (米国の学年レベル)")
-print(f"平均文長: {readability_df['avg_sentence_length'].mean():.1f}単語")
\ No newline at end of file
+print(f"平均文長: {readability_df['avg_sentence_length'].mean():.1f}単語")
+
+# 分析キャッシュのヒット率
+report_hit_rates()
@@ -0,0 +1,331 @@
+import re
+from collections import Counter
+import numpy as np
+from scipy import sparse
+
+
+def _self_overlaps(term):
+    # 語が自分自身と重なって出現しうるか（例: 'ああ' は 'あああ' の中で重なる）
+    return any(term[k:] == term[:len(term) - k] for k in range(1, len(term)))
+
+
+class PositionalIndex:
+    """
+    コーパス全体の位置付き転置インデックス
+
+    対象語ごとに、出現した文書番号と文字位置を int32 配列として保持する
+    （文書番号・位置の昇順）。重なった出現もすべて記録する。
+    全対象語を1つの正規表現（長い語を優先）にまとめ、各文書を1回だけ走査する。
+    """
+
+    def __init__(self, terms):
+        self.terms = list(dict.fromkeys(terms))
+        self._term_ids = {term: i for i, term in enumerate(self.terms)}
+        # 同じ位置から始まる語は、最長一致した語の接頭辞になっている
+        self._prefixes = [
+            [j for j, other in enumerate(self.terms) if term.startswith(other)]
+            for term in self.terms
+        ]
+        longest_first = sorted(self.terms, key=len, reverse=True)
+        self._pattern = re.compile('(?=(' + '|'.join(re.escape(term) for term in longest_first) + '))')
+        self._doc_ids = [[] for _ in self.terms]
+        self._offsets = [[] for _ in self.terms]
+        self._arrays = None
+        self.num_docs = 0
+        self.max_doc_length = 0
+
+    @classmethod
+    def build(cls, texts, terms):
+        """
+        テキストのリストからインデックスを作成する
+
+        Parameters:
+        texts (iterable): 文書のテキスト（文字列以外は空の文書として扱う）
+        terms (list): 対象語のリスト
+
+        Returns:
+        PositionalIndex: 作成したインデックス
+        """
+        index = cls(terms)
+        index.add_documents(texts)
+        return index
+
+    def add_documents(self, texts):
+        """
+        文書を追加する（文書番号は追加順の通し番号）
+
+        Parameters:
+        texts (iterable): 文書のテキスト
+        """
+        term_ids = self._term_ids
+        prefixes = self._prefixes
+        for text in texts:
+            doc_id = self.num_docs
+            self.num_docs += 1
+            if not isinstance(text, str) or not self.terms:
+                continue
+            self.max_doc_length = max(self.max_doc_length, len(text))
+            for m in self._pattern.finditer(text):
+                offset = m.start()
+                for t in prefixes[term_ids[m.group(1)]]:
+                    self._doc_ids[t].append(doc_id)
+                    self._offsets[t].append(offset)
+        self._arrays = None
+
+    def _finalize(self):
+        if self._arrays is None:
+            self._arrays = [
+                (np.array(doc_ids, dtype=np.int32), np.array(offsets, dtype=np.int32))
+                for doc_ids, offsets in zip(self._doc_ids, self._offsets)
+            ]
+        return self._arrays
+
+    def positions(self, term):
+        """
+        対象語の出現位置を返す
+
+        Parameters:
+        term (str): 対象語
+
+        Returns:
+        tuple: (文書番号の配列, 文字位置の配列)
+        """
+        return self._finalize()[self._term_ids[term]]
+
+    def _anchor_positions(self, t):
+        # re.finditer(term, text) と同じく、重ならない出現だけを先頭から選ぶ
+        doc_ids, offsets = self._finalize()[t]
+        term = self.terms[t]
+        if not _self_overlaps(term) or len(offsets) == 0:
+            return doc_ids, offsets
+        keep = np.zeros(len(offsets), dtype=bool)
+        last_doc, last_end = -1, -1
+        for i, (doc_id, offset) in enumerate(zip(doc_ids.tolist(), offsets.tolist())):
+            if doc_id != last_doc or offset >= last_end:
+                keep[i] = True
+                last_doc, last_end = doc_id, offset + len(term)
+        return doc_ids[keep], offsets[keep]
+
+
+def cooccurrence_matrix(index, window=10, return_first_hits=False):
+    """
+    位置リストの照合で、ウィンドウ内の共起回数の疎行列（対象語 × 対象語）を作成する
+
+    行の語の各出現（重ならない出現）について、前後 window 文字を含む範囲
+    [位置 - window, 位置 + 語の長さ + window) に列の語が完全に含まれていれば1と数える。
+    全対象語の出現を文書番号と位置の int64 キーで1つの配列に並べ、
+    各出現のウィンドウに入る候補を np.searchsorted でまとめて取り出す。
+
+    Parameters:
+    index (PositionalIndex): 位置付き転置インデックス
+    window (int): 前後の文字数
+    return_first_hits (bool): 各組で最初に共起した出現の番号も返すかどうか
+
+    Returns:
+    scipy.sparse.csr_matrix: 共起回数の行列（return_first_hits=Trueの場合は (行列, 辞書)）
+    """
+    arrays = index._finalize()
+    num_terms = len(index.terms)
+    term_lengths = np.array([len(term) for term in index.terms], dtype=np.int64)
+    max_term_length = int(term_lengths.max()) if num_terms else 0
+    # 文書をまたいでウィンドウが重ならないよう、文書ごとのキーの間隔を十分に取る
+    stride = index.max_doc_length + max_term_length + 2 * window + 1
+
+    # 全対象語の出現をキー順に並べた配列
+    all_keys = np.concatenate([doc_ids.astype(np.int64) * stride + offsets for doc_ids, offsets in arrays]
+                              + [np.zeros(0, dtype=np.int64)])
+    all_terms = np.concatenate([np.full(len(offsets), t, dtype=np.int64) for t, (_, offsets) in enumerate(arrays)]
+                               + [np.zeros(0, dtype=np.int64)])
+    order = np.argsort(all_keys, kind='stable')
+    all_keys = all_keys[order]
+    all_terms = all_terms[order]
+    all_ends = all_keys + term_lengths[all_terms]
+
+    rows, cols, values = [], [], []
+    first_hits = {}
+    for a in range(num_terms):
+        anchor_docs, anchor_offsets = index._anchor_positions(a)
+        if len(anchor_offsets) == 0:
+            continue
+        base = anchor_docs.astype(np.int64) * stride
+        lower = base + np.maximum(anchor_offsets - window, 0)
+        limit = base + anchor_offsets + term_lengths[a] + window
+
+        # 各出現のウィンドウに開始位置が入る候補の範囲
+        first = np.searchsorted(all_keys, lower, side='left')
+        last = np.searchsorted(all_keys, limit - 1, side='right')
+        counts = np.maximum(last - first, 0)
+        total = int(counts.sum())
+        if total == 0:
+            continue
+        anchor_index = np.repeat(np.arange(len(anchor_offsets)), counts)
+        candidate = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts) + np.repeat(first, counts)
+
+        # 候補の語がウィンドウ内に完全に含まれ、自分自身でないものだけ残す
+        inside = (all_ends[candidate] <= limit[anchor_index]) & (all_terms[candidate] != a)
+        pair_codes = np.unique(anchor_index[inside] * num_terms + all_terms[candidate][inside])
+        if len(pair_codes) == 0:
+            continue
+        other_terms = pair_codes % num_terms
+        pair_counts = np.bincount(other_terms, minlength=num_terms)
+        for b in np.flatnonzero(pair_counts).tolist():
+            rows.append(a)
+            cols.append(b)
+            values.append(int(pair_counts[b]))
+        if return_first_hits:
+            # pair_codes は出現順に並んでいるので、最初に現れた位置が最初の共起
+            unique_others, first_index = np.unique(other_terms, return_index=True)
+            for b, i in zip(unique_others.tolist(), first_index.tolist()):
+                first_hits[(a, b)] = int(pair_codes[i] // num_terms)
+
+    matrix = sparse.csr_matrix(
+        (np.array(values, dtype=np.int64), (np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64))),
+        shape=(num_terms, num_terms)
+    )
+    if return_first_hits:
+        return matrix, first_hits
+    return matrix
+
+
+def find_cooccurring_terms(texts, target_terms, window=10):
+    """
+    対象語ごとの共起語のCounterを返す（従来の find_cooccurring_terms と同じ結果）
+
+    Parameters:
+    texts (iterable): 文書のテキスト
+    target_terms (list): 対象語のリスト
+    window (int): 前後の文字数
+
+    Returns:
+    dict: 対象語 -> Counter（共起語 -> 回数）
+    """
+    index = PositionalIndex.build(texts, target_terms)
+    matrix, first_hits = cooccurrence_matrix(index, window=window, return_first_hits=True)
+    matrix = matrix.tocoo()
+
+    cooccurrences = {term: Counter() for term in target_terms}
+    # 従来の実装と同じく、最初に共起した出現の順に語を追加する（most_commonの同点順を保つ）
+    entries = sorted(zip(matrix.row.tolist(), matrix.col.tolist(), matrix.data.tolist()),
+                     key=lambda e: (e[0], first_hits[(e[0], e[1])], e[1]))
+    for a, b, count in entries:
+        cooccurrences[index.terms[a]][index.terms[b]] = count
+    return cooccurrences
+
+
+def category_count_matrix(texts, categories):
+    """
+    キーワードの出現回数を 文書 × カテゴリ の疎行列にまとめる
+
+    各文書は1回だけ小文字化し、重複を除いたキーワードごとに str.count で数える
+    （文書 × キーワード の行列）。これにキーワード → カテゴリ の対応行列を掛けて
+    カテゴリごとの合計にする。値は従来の text.lower().count(keyword.lower()) の合計と一致する。
+
+    Parameters:
+    texts (iterable): 文書のテキスト（文字列以外は空の文書として扱う）
+    categories (dict): カテゴリ名 -> キーワードのリスト
+
+    Returns:
+    scipy.sparse.csr_matrix: 文書 × カテゴリ の出現回数（列の順は categories のキーの順）
+    """
+    keyword_ids = {}
+    map_rows, map_cols = [], []
+    for c, keywords in enumerate(categories.values()):
+        for keyword in keywords:
+            k = keyword_ids.setdefault(keyword.lower(), len(keyword_ids))
+            map_rows.append(k)
+            map_cols.append(c)
+    # 同じカテゴリに同じキーワードが複数回あれば、その分だけ重複して数える（従来と同じ）
+    keyword_to_category = sparse.csr_matrix(
+        (np.ones(len(map_rows), dtype=np.int64), (map_rows, map_cols)),
+        shape=(len(keyword_ids), len(categories))
+    )
+
+    keywords = list(keyword_ids)
+    rows, cols, values = [], [], []
+    num_docs = 0
+    for text in texts:
+        doc_id = num_docs
+        num_docs += 1
+        if not isinstance(text, str):
+            continue
+        lower_text = text.lower()
+        for k, keyword in enumerate(keywords):
+            count = lower_text.count(keyword)
+            if count:
+                rows.append(doc_id)
+                cols.append(k)
+                values.append(count)
+    doc_keyword = sparse.csr_matrix(
+        (np.array(values, dtype=np.int64), (np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64))),
+        shape=(num_docs, len(keywords))
+    )
+    return (doc_keyword @ keyword_to_category).tocsr()
+
+
+def presence_gram(doc_category):
+    """
+    カテゴリの組ごとに、両方のカテゴリが現れる文書数を数える（対角成分は各カテゴリの文書数）
+
+    文書 × カテゴリ の行列を真偽値にした X について X.T @ X を求める。
+    文書の集まりごとに求めた結果の和は、全文書で求めた結果と一致する。
+
+    Parameters:
+    doc_category (scipy.sparse.spmatrix): 文書 × カテゴリ の出現回数または有無
+
+    Returns:
+    scipy.sparse.csr_matrix: カテゴリ × カテゴリ の文書数（対称行列）
+    """
+    presence = sparse.csr_matrix(doc_category, dtype=bool).astype(np.int64)
+    return (presence.T @ presence).tocsr()
+
+
+def drop_self_cooccurrence(matrix):
+    """
+    共起行列の対角成分（同じカテゴリ同士）を0にする
+
+    Parameters:
+    matrix (scipy.sparse.spmatrix): カテゴリ × カテゴリ の共起行列
+
+    Returns:
+    scipy.sparse.csr_matrix: 対角成分を除いた共起行列
+    """
+    matrix = sparse.lil_matrix(matrix)
+    matrix.setdiag(0)
+    matrix = matrix.tocsr()
+    matrix.eliminate_zeros()
+    return matrix
+
+
+def category_cooccurrence(doc_category):
+    """
+    カテゴリ間の共起行列（両方のカテゴリが現れる文書数）を計算する
+
+    文書 × カテゴリ の行列を真偽値にした X について X.T @ X を求め、対角成分を0にする。
+
+    Parameters:
+    doc_category (scipy.sparse.spmatrix): 文書 × カテゴリ の出現回数または有無
+
+    Returns:
+    scipy.sparse.csr_matrix: カテゴリ × カテゴリ の共起文書数（対称行列）
+    """
+    return drop_self_cooccurrence(presence_gram(doc_category))
+
+
+def cooccurrence_edges(matrix, labels):
+    """
+    共起行列をネットワーク描画用のエッジのリストに変換する
+
+    Parameters:
+    matrix (scipy.sparse.spmatrix): 対称な共起行列
+    labels (list): 行・列に対応するノード名
+
+    Returns:
+    list: (ノード1, ノード2, 重み) のリスト（上三角の0でない要素を行・列の順に並べたもの）
+    """
+    upper = sparse.triu(sparse.csr_matrix(matrix), k=1).tocoo()
+    order = np.lexsort((upper.col, upper.row))
+    return [
+        (labels[i], labels[j], weight)
+        for i, j, weight in zip(upper.row[order].tolist(), upper.col[order].tolist(), upper.data[order].tolist())
+        if weight > 0
+    ]
@@ -0,0 +1,126 @@
+import os
+import glob
+import hashlib
+import numpy as np
+
+# 分析結果のキャッシュを保存するフォルダ（analysis/cache）
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "cache")
+# スクレイピングしたデータのフォルダ（analysis/data）
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data")
+# データの種類ごとのファイル名（末尾は取得日時 YYYYMMDD_HHMMSS）
+DATA_FILE_PATTERNS = {
+    'jp': "remote_work_data_jp_*.csv",
+    'en': "remote_work_data_en_*.csv",
+    'all': "remote_work_all_data_*.csv",
+}
+
+
+def content_hash(text):
+    """
+    テキストの内容からハッシュ値を計算する
+
+    Parameters:
+    text (str): 記事の本文などのテキスト
+
+    Returns:
+    str: SHA-1の16進ダイジェスト（キャッシュのキーとして使用）
+    """
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def cache_path(*parts):
+    """
+    キャッシュフォルダ内のファイルパスを返す（親フォルダは自動で作成）
+
+    Parameters:
+    parts (str): CACHE_DIRからの相対パスの要素
+
+    Returns:
+    str: キャッシュファイルのパス
+    """
+    path = os.path.join(CACHE_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+def doc_id(url=None, title=None, content=None):
+    """
+    記事を識別する整数IDを計算する
+
+    URLがあればURLから、なければタイトルと本文から計算するため、
+    同じタイトルの別記事も区別できる。
+
+    Parameters:
+    url (str): 記事のURL
+    title (str): 記事のタイトル
+    content (str): 記事の本文
+
+    Returns:
+    int: 0以上の64ビット整数のID
+    """
+    if isinstance(url, str) and url != '':
+        key = 'url:' + url
+    else:
+        title = title if isinstance(title, str) else ''
+        content = content if isinstance(content, str) else ''
+        key = 'text:' + title + '\n' + content
+    digest = hashlib.sha1(key.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') & 0x7FFFFFFFFFFFFFFF
+
+
+def doc_ids(df):
+    """
+    データフレームの各行の記事IDを計算する
+
+    Parameters:
+    df (pandas.DataFrame): 'url'、'title'、'content' 列を持つ記事のデータ
+
+    Returns:
+    numpy.ndarray: 行ごとの記事ID（int64）
+    """
+    urls = df['url'] if 'url' in df.columns else [None] * len(df)
+    titles = df['title'] if 'title' in df.columns else [None] * len(df)
+    contents = df['content'] if 'content' in df.columns else [None] * len(df)
+    return np.array([doc_id(u, t, c) for u, t, c in zip(urls, titles, contents)], dtype=np.int64)
+
+
+def ensure_doc_ids(result_df, source_df):
+    """
+    分析結果に記事IDの列がなければ追加する（記事IDのない古い結果ファイル用）
+
+    古い結果ファイルはタイトルしか持たないため、同じタイトルの最初の記事のIDを使う
+    （従来のタイトル検索と同じ対応付け）。
+
+    Parameters:
+    result_df (pandas.DataFrame): 'title' 列を持つ分析結果
+    source_df (pandas.DataFrame): 元の記事のデータ
+
+    Returns:
+    pandas.DataFrame: 'doc_id' 列を持つ分析結果
+    """
+    if 'doc_id' in result_df.columns:
+        return result_df
+    first_ids = {}
+    for title, article_id in zip(source_df['title'], doc_ids(source_df).tolist()):
+        first_ids.setdefault(title, article_id)
+    result_df = result_df.copy()
+    result_df['doc_id'] = [first_ids.get(title, -1) for title in result_df['title']]
+    return result_df
+
+
+def latest_data_file(kind, data_folder=DATA_DIR):
+    """
+    最新のデータファイルのパスを返す（ファイル名の取得日時が最も新しいもの）
+
+    Parameters:
+    kind (str): データの種類（'jp'、'en'、'all'）
+    data_folder (str): データのフォルダ
+
+    Returns:
+    str: データファイルのパス
+    """
+    paths = glob.glob(os.path.join(data_folder, DATA_FILE_PATTERNS[kind]))
+    if not paths:
+        raise FileNotFoundError(f"データファイルがありません: {os.path.join(data_folder, DATA_FILE_PATTERNS[kind])}")
+    # 取得日時はファイル名に固定の桁数で入っているため、名前順の最後が最新
+    return max(paths, key=os.path.basename)
@@ -5,6 +5,7 @@ import seaborn as sns
 import re
 from collections import Counter
 import numpy as np
+from corpus import latest_data_file
 
 # フォント設定
 plt.rcParams['font.family'] = 'Hiragino Sans'
@@ -12,9 +13,7 @@ plt.rcParams['font.family'] = 'Hiragino Sans'
 # カラーパレット設定
 colors = sns.color_palette("colorblind")
 
-# データフォルダのパス
-data_folder = os.path.join("..", "data")
-file_path = os.path.join(data_folder, "remote_work_data_en_20250329_165210.csv")
+file_path = latest_data_file('en')
 
 # ファイルの読み込み
 print(f"ファイルパス: {file_path}")
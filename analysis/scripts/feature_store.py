@@ -0,0 +1,281 @@
+import os
+import sys
+import json
+import shutil
+import hashlib
+import numpy as np
+import pandas as pd
+
+from corpus import CACHE_DIR, doc_ids, ensure_doc_ids, latest_data_file
+
+# 特徴量ストアの保存先（analysis/cache/features/<グループ>/）
+FEATURES_DIR = os.path.join(CACHE_DIR, "features")
+# キーの列（記事ID、特徴量のバージョン、計算に使った本文のハッシュ値、書き込みの通し番号）
+KEY_COLUMNS = ['doc_id', 'feature_version', 'source_hash', 'write_seq']
+
+
+def source_hash(text):
+    """
+    特徴量の計算に使った本文のハッシュ値（63ビット整数）を計算する
+
+    Parameters:
+    text (str): 記事の本文（文字列以外は空として扱う）
+
+    Returns:
+    int: ハッシュ値
+    """
+    text = text if isinstance(text, str) else ''
+    digest = hashlib.sha1(text.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') & 0x7FFFFFFFFFFFFFFF
+
+
+def source_hashes(texts):
+    """
+    本文ごとのハッシュ値を計算する
+
+    Parameters:
+    texts (iterable): 記事の本文
+
+    Returns:
+    numpy.ndarray: ハッシュ値（int64）
+    """
+    return np.array([source_hash(text) for text in texts], dtype=np.int64)
+
+
+class FeatureStore:
+    """
+    記事IDと特徴量のバージョンをキーにした、記事ごとの特徴量の列指向ストア
+
+    特徴量はグループ（'sentiment'、'structure' など）ごとに1つの表として保存し、
+    列ごとに別のファイル（数値は .npy、文字列は .json）にする。
+    読み込み時は必要な列のファイルだけを開く（数値の列はメモリマップ）。
+    各行には計算に使った本文のハッシュ値も保存するため、本文が変わった記事や
+    古いバージョンの特徴量を検出できる。また書き込みの通し番号も保存し、
+    記事ごとに最後に書き込んだ行を求める。
+    """
+
+    def __init__(self, root=FEATURES_DIR):
+        """
+        Parameters:
+        root (str): 保存先のフォルダ
+        """
+        self.root = root
+
+    def _directory(self, group):
+        return os.path.join(self.root, group)
+
+    def _meta(self, group):
+        path = os.path.join(self._directory(group), 'meta.json')
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def groups(self):
+        """保存済みのグループの一覧"""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(group for group in os.listdir(self.root) if self._meta(group) is not None)
+
+    def columns(self, group):
+        """
+        グループの特徴量の列名を返す（キーの列を除く）
+
+        Parameters:
+        group (str): グループ名
+
+        Returns:
+        list: 列名のリスト
+        """
+        meta = self._meta(group)
+        if meta is None:
+            return []
+        return [column for column in meta['columns'] if column not in KEY_COLUMNS]
+
+    def versions(self, group):
+        """書き込んだ特徴量のバージョン（最後に書き込んだものが最後）"""
+        meta = self._meta(group)
+        return list(meta['versions']) if meta is not None else []
+
+    def _read_all(self, group, columns):
+        meta = self._meta(group)
+        directory = self._directory(group)
+        data = {}
+        for column in columns:
+            kind = meta['columns'].get(column)
+            if kind is None:
+                data[column] = np.full(meta['count'], np.nan)
+            elif kind == 'npy':
+                data[column] = np.load(os.path.join(directory, f"{column}.npy"), mmap_mode='r')
+            else:
+                with open(os.path.join(directory, f"{column}.json"), encoding='utf-8') as f:
+                    data[column] = json.load(f)
+        return pd.DataFrame(data, columns=columns)
+
+    def read(self, group, columns=None, version=None, doc_ids=None):
+        """
+        特徴量を読み込む（指定した列のファイルだけを読む）
+
+        Parameters:
+        group (str): グループ名
+        columns (list): 読み込む列（省略時はすべて）
+        version: 特徴量のバージョン（省略時は記事ごとに最後に書き込んだバージョン）
+        doc_ids (list): 対象の記事ID（省略時はすべて）
+
+        Returns:
+        pandas.DataFrame: 'doc_id' と指定した列の表（保存されていなければ空の表）
+        """
+        meta = self._meta(group)
+        columns = list(columns) if columns is not None else self.columns(group)
+        if meta is None:
+            return pd.DataFrame(columns=['doc_id'] + columns)
+        keys = self._read_all(group, ['doc_id', 'feature_version', 'write_seq'])
+        if version is None:
+            # 記事ごとに、書き込みの通し番号が最大の行を使う（通し番号のない古い行は位置の順）
+            sequence = np.nan_to_num(np.asarray(keys['write_seq'], dtype=np.float64), nan=-1)
+            latest = pd.DataFrame({'doc_id': keys['doc_id'].values, 'write_seq': sequence})
+            latest = latest.sort_values('write_seq', kind='stable').drop_duplicates('doc_id', keep='last')
+            mask = np.zeros(len(keys), dtype=bool)
+            mask[latest.index.values] = True
+        else:
+            mask = keys['feature_version'].astype(str).values == str(version)
+        if doc_ids is not None:
+            mask &= np.isin(keys['doc_id'].values, np.asarray(doc_ids, dtype=np.int64))
+        rows = np.flatnonzero(mask)
+        table = self._read_all(group, ['doc_id'] + [c for c in columns if c != 'doc_id'])
+        return table.iloc[rows].reset_index(drop=True)
+
+    def upsert(self, group, df, version, texts=None):
+        """
+        特徴量を追加・更新する（記事IDとバージョンが同じ行は置き換え、元の行の位置を保つ）
+
+        Parameters:
+        group (str): グループ名
+        df (pandas.DataFrame): 'doc_id' 列と特徴量の列を持つ表
+        version: 特徴量のバージョン（計算方法を変えたら変える）
+        texts (list): 行ごとの計算に使った本文（古い特徴量の検出に使う）
+
+        Returns:
+        int: 書き込み後の行数
+        """
+        new = df.reset_index(drop=True).copy()
+        new['doc_id'] = new['doc_id'].astype(np.int64)
+        new['feature_version'] = str(version)
+        new['source_hash'] = source_hashes(texts) if texts is not None else np.int64(-1)
+
+        meta = self._meta(group)
+        sequence = (meta.get('sequence', 0) if meta is not None else 0) + 1
+        new['write_seq'] = np.int64(sequence)
+        if meta is not None:
+            existing = self._read_all(group, list(meta['columns']))
+            for column in existing.columns:
+                if isinstance(existing[column].values, np.memmap):
+                    existing[column] = np.array(existing[column].values)
+            existing_keys = pd.MultiIndex.from_arrays([existing['doc_id'], existing['feature_version']])
+            new_keys = pd.MultiIndex.from_arrays([new['doc_id'], new['feature_version']])
+            # 同じキーが複数あれば最後の行を使う
+            new = new[~new_keys.duplicated(keep='last')].reset_index(drop=True)
+            new_keys = pd.MultiIndex.from_arrays([new['doc_id'], new['feature_version']])
+            replaced = existing_keys.get_indexer(new_keys)
+            table = existing.reindex(columns=list(dict.fromkeys(list(existing.columns) + list(new.columns))))
+            table = table.astype({c: new[c].dtype for c in new.columns if c not in existing.columns}, errors='ignore')
+            in_place = replaced >= 0
+            if in_place.any():
+                table.loc[replaced[in_place], list(new.columns)] = new.loc[in_place, list(new.columns)].values
+            table = pd.concat([table, new[~in_place]], ignore_index=True)
+        else:
+            table = new
+        versions = [v for v in (meta['versions'] if meta is not None else []) if v != str(version)]
+        if 'write_seq' in table.columns:
+            table['write_seq'] = table['write_seq'].fillna(0).astype(np.int64)
+        self._write(group, table, versions + [str(version)], sequence)
+        return len(table)
+
+    def _write(self, group, table, versions, sequence):
+        # 列ごとにファイルへ書き、一時フォルダごと置き換える
+        directory = self._directory(group)
+        tmp_directory = f"{directory}.{os.getpid()}.tmp"
+        os.makedirs(tmp_directory, exist_ok=True)
+        kinds = {}
+        for column in table.columns:
+            values = table[column]
+            if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+                np.save(os.path.join(tmp_directory, f"{column}.npy"), values.to_numpy())
+                kinds[column] = 'npy'
+            else:
+                with open(os.path.join(tmp_directory, f"{column}.json"), 'w', encoding='utf-8') as f:
+                    json.dump([None if pd.isna(v) else v for v in values.tolist()], f, ensure_ascii=False,
+                              default=lambda v: v.item() if isinstance(v, np.generic) else str(v))
+                kinds[column] = 'json'
+        with open(os.path.join(tmp_directory, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump({'columns': kinds, 'count': len(table), 'versions': versions, 'sequence': sequence}, f,
+                      ensure_ascii=False)
+        if os.path.isdir(directory):
+            shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(self.root, exist_ok=True)
+        os.replace(tmp_directory, directory)
+
+    def stale(self, group, source_df, version=None, column='content'):
+        """
+        特徴量がない、または本文が変わった・バージョンが古い記事の記事IDを返す
+
+        Parameters:
+        group (str): グループ名
+        source_df (pandas.DataFrame): 元の記事のデータ（'doc_id' 列がなければ計算する）
+        version: 期待する特徴量のバージョン（省略時は記事ごとに最後に書き込んだバージョン）
+        column (str): 本文の列
+
+        Returns:
+        numpy.ndarray: 特徴量を計算し直す必要がある記事ID
+        """
+        ids = source_df['doc_id'].values if 'doc_id' in source_df.columns else doc_ids(source_df)
+        ids = np.asarray(ids, dtype=np.int64)
+        current = self.read(group, columns=['source_hash'], version=version)
+        saved = dict(zip(current['doc_id'].tolist(), current['source_hash'].tolist()))
+        hashes = source_hashes(source_df[column])
+        needs_update = [
+            saved.get(article_id) is None or (saved[article_id] != -1 and saved[article_id] != h)
+            for article_id, h in zip(ids.tolist(), hashes.tolist())
+        ]
+        return ids[np.array(needs_update, dtype=bool)] if len(ids) else ids
+
+    def import_csv(self, group, path, source_df, version, language=None):
+        """
+        以前の分析結果のCSV（タイトルで対応付けるもの）を取り込む
+
+        Parameters:
+        group (str): グループ名
+        path (str): CSVファイル
+        source_df (pandas.DataFrame): 元の記事のデータ
+        version: 特徴量のバージョン
+        language (str): 'language' 列に設定する値
+
+        Returns:
+        int: 取り込んだ行数
+        """
+        df = ensure_doc_ids(pd.read_csv(path), source_df)
+        df = df[df['doc_id'] != -1]
+        if language is not None:
+            df = df.assign(language=language)
+        content_by_id = dict(zip(doc_ids(source_df).tolist(), source_df['content']))
+        self.upsert(group, df, version, texts=[content_by_id.get(i) for i in df['doc_id'].tolist()])
+        return len(df)
+
+
+if __name__ == "__main__":
+    # 使い方: python feature_store.py [言語 CSVの接頭辞 記事データCSV]...
+    # 以前の分析結果のCSV（<接頭辞>_sentiment_analysis.csv など）を特徴量ストアに取り込む
+    sources = [
+        ('jp', 'jp', latest_data_file('jp')),
+        ('en', 'en', latest_data_file('en')),
+    ]
+    if len(sys.argv) > 1:
+        sources = [tuple(sys.argv[i:i + 3]) for i in range(1, len(sys.argv) - 2, 3)]
+    store = FeatureStore()
+    for language, prefix, source_path in sources:
+        source_df = pd.read_csv(source_path)
+        for group in ('sentiment', 'structure', 'readability'):
+            path = f"{prefix}_{group}_analysis.csv"
+            if os.path.exists(path):
+                count = store.import_csv(group, path, source_df, version='csv', language=language)
+                print(f"{path}: {count}行を取り込みました")
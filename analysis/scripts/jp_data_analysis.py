@@ -6,11 +6,22 @@ import re
 import numpy as np
 from collections import Counter
 import MeCab  # 日本語形態素解析ツール
+from jp_token_store import load_tokens, CONTENT_POS
+from jp_tokenizer_pool import JPTokenizerPool
+from batch_sentiment import LexiconSentiment
+from structure_scanner import scan_structure
+from corpus import doc_ids, latest_data_file
+from feature_store import FeatureStore
+from analysis_cache import cached_analysis, CachedAnalyzer, report_hit_rates
 
 # データ読み込み
-data_folder = os.path.join("..", "data")
-file_path = os.path.join(data_folder, "remote_work_data_jp_20250329_165210.csv")
+file_path = latest_data_file('jp')
 df_jp = pd.read_csv(file_path)
+df_jp['doc_id'] = doc_ids(df_jp)
+
+# 特徴量ストアに書き込むときのバージョン（特徴量の計算方法を変えたら変える）
+feature_version = 'jp_v1'
+feature_store = FeatureStore()
 
 # フォント設定
 plt.rcParams['font.family'] = 'Hiragino Sans'
@@ -18,6 +29,14 @@ plt.rcParams['font.family'] = 'Hiragino Sans'
 # MeCabの初期化
 mecab = MeCab.Tagger("-Ochasen")
 
+# 記事ごとの分析に使うワーカープロセス数（Noneなら環境変数 ANALYSIS_WORKERS または全コア、1ならプロセスを使わない）
+analysis_workers = None
+
+# ワーカープロセスごとにMeCabを初期化する（親プロセスのTaggerは共有しない）
+def init_worker_mecab():
+    global mecab
+    mecab = MeCab.Tagger("-Ochasen")
+
 # 日本語の感情極性辞書（簡易版）- 拡張可能
 # 1：ポジティブ、-1：ネガティブ、0：中立
 jp_sentiment_dict = {
@@ -32,40 +51,31 @@ jp_sentiment_dict = {
     "限界": -1, "失敗": -1, "トラブル": -1, "リスク": -1, "欠点": -1, "悪い": -1, "危険": -1
 }
 
+# 辞書を配列化した感情スコア計算エンジン（複数記事をまとめて計算できる）
+jp_sentiment_engine = LexiconSentiment(jp_sentiment_dict)
+
 # 感情分析関数（日本語向け）
 def analyze_jp_sentiment(text):
     if not isinstance(text, str) or text == '':
         return {'polarity': 0, 'subjectivity': 0}
     
-    # 形態素解析
-    mecab.parse('')  # バッファをクリア
-    node = mecab.parseToNode(text)
+    # 形態素解析（トークンストアを使用：MeCabは記事ごとに1回だけ実行）
+    tokens = load_tokens(text, mecab)
     
-    words = []
-    while node:
-        # 名詞、動詞、形容詞、副詞を抽出
-        if node.feature.split(',')[0] in ['名詞', '動詞', '形容詞', '副詞']:
-            words.append(node.surface)
-        node = node.next
+    # 名詞、動詞、形容詞、副詞を抽出
+    words = tokens.surfaces(CONTENT_POS)
     
     # 感情スコア計算
-    sentiment_score = 0
-    sentiment_words = 0
-    
-    for word in words:
-        if word in jp_sentiment_dict:
-            sentiment_score += jp_sentiment_dict[word]
-            sentiment_words += 1
-    
-    # 極性（-1 to 1）
-    polarity = sentiment_score / max(sentiment_words, 1)
-    
-    # 主観性（感情語の割合）
-    subjectivity = min(1.0, sentiment_words / max(len(words), 1))
-    
-    return {'polarity': polarity, 'subjectivity': subjectivity}
+    # 極性（-1 to 1）= 感情語のスコア平均、主観性 = 感情語の割合
+    return jp_sentiment_engine.score(words)
+
+# 複数記事の感情分析をまとめてベクトル計算する関数（事前に解析したトークンがあれば使う）
+def analyze_jp_sentiment_batch(texts):
+    token_lists = [(jp_tokens_by_text.get(text) or load_tokens(text, mecab)).surfaces(CONTENT_POS) for text in texts]
+    return jp_sentiment_engine.score_many(token_lists)
 
 # ソリューション指向度を評価する関数（日本語向け）
+@cached_analysis(version=1)
 def jp_solution_orientation(text):
     if not isinstance(text, str) or text == '':
         return 0
@@ -91,99 +101,59 @@ def jp_solution_orientation(text):
     return (solution_ratio - 0.5) * 2  # -1〜1のスケールに変換
 
 # コンテンツの構造を分析する関数（日本語向け）
+@cached_analysis(version=1)
 def analyze_jp_structure(text):
-    if not isinstance(text, str) or text == '':
-        return {'headings': 0, 'paragraphs': 0, 'lists': 0, 'avg_paragraph_length': 0}
-    
-    # 見出しっぽい行を検出
-    lines = text.split('\n')
-    headings = 0
-    for line in lines:
-        line = line.strip()
-        if len(line) > 0 and len(line) < 50:  # 短い行（日本語は英語より文字数少なめ）
-            if (line.endswith('とは') or line.endswith('について') or 
-                re.match(r'^[\d１２３４５６７８９０]+[\.．、]', line) or 
-                re.match(r'^【.+】$', line) or re.match(r'^■.+', line) or 
-                re.match(r'^●.+', line) or re.match(r'^◆.+', line)):
-                headings += 1
-    
-    # 段落数（空行で区切られた部分）
-    paragraphs = len([p for p in re.split(r'\n\s*\n', text) if p.strip()])
-    
-    # リスト項目（箇条書き）
-    list_items = len(re.findall(r'^\s*[・※◎○●■□▲△▼▽◆◇★☆→①-⑩]+\s+', text, re.MULTILINE))
-    
-    # 段落の平均長（文字数）
-    if paragraphs > 0:
-        paragraph_texts = [p.strip() for p in re.split(r'\n\s*\n', text) if p.strip()]
-        avg_paragraph_length = sum(len(p) for p in paragraph_texts) / paragraphs
-    else:
-        avg_paragraph_length = 0
-    
-    return {
-        'headings': headings,
-        'paragraphs': paragraphs,
-        'lists': list_items,
-        'avg_paragraph_length': avg_paragraph_length
-    }
+    # 見出し・段落・リスト項目を1回の行走査でまとめて数える
+    return scan_structure(text, language='ja')
 
 # 読みやすさを分析する関数（日本語向け）
+@cached_analysis(version=1)
 def analyze_jp_readability(text):
     if not isinstance(text, str) or text == '':
         return {'avg_sentence_length': 0, 'character_per_sentence': 0}
     
-    # 文の分割
-    sentences = re.split(r'[。．!！?？]+', text)
-    sentences = [s.strip() for s in sentences if s.strip()]
+    # 文の分割と単語数カウント（感情分析と同じトークンストアの結果を再利用）
+    tokens = load_tokens(text, mecab)
+    sentence_count = len(tokens.sentence_starts)
     
-    if not sentences:
+    if sentence_count == 0:
         return {'avg_sentence_length': 0, 'character_per_sentence': 0}
     
-    # 単語数カウント（簡易的に形態素解析）
-    word_counts = []
-    for sentence in sentences:
-        mecab.parse('')  # バッファをクリア
-        node = mecab.parseToNode(sentence)
-        count = 0
-        while node:
-            if node.feature.split(',')[0] not in ['BOS/EOS']:  # 文頭/文末記号以外
-                count += 1
-            node = node.next
-        word_counts.append(count)
-    
     # 平均語数/文
-    avg_sentence_length = sum(word_counts) / len(sentences)
+    avg_sentence_length = float(tokens.sentence_token_counts().sum()) / sentence_count
     
     # 平均文字数/文
-    avg_char_per_sentence = sum(len(s) for s in sentences) / len(sentences)
+    avg_char_per_sentence = float(tokens.sentence_lengths().sum()) / sentence_count
     
     return {
         'avg_sentence_length': avg_sentence_length,
         'character_per_sentence': avg_char_per_sentence
     }
 
+# 形態素解析を複数プロセスで事前に実行（結果はトークンストアに保存され、以降の分析で再利用される）
+jp_contents = [c for c in df_jp['content'] if isinstance(c, str) and c != '']
+with JPTokenizerPool() as tokenizer_pool:
+    jp_tokens = tokenizer_pool.tokenize_batch(jp_contents)
+
+jp_tokens_by_text = dict(zip(jp_contents, jp_tokens))
+
+# 感情分析は全記事分をまとめてベクトル計算する
+# 記事ごとの分析結果は本文のハッシュ値とバージョンでキャッシュし、新しい記事だけを計算する（分析方法を変えたら version を上げる）
+cached_jp_sentiment = CachedAnalyzer(analyze_jp_sentiment, version=1)
+sentiments = cached_jp_sentiment.map(jp_contents, batch_function=analyze_jp_sentiment_batch)
+
 # 記事ごとの分析実行
-sentiments = []
-solution_scores = []
-structure_data = []
-readability_data = []
-titles = []
-
-for i, row in df_jp.iterrows():
-    if isinstance(row['content'], str) and row['content'] != '':
-        sentiment = analyze_jp_sentiment(row['content'])
-        solution_score = jp_solution_orientation(row['content'])
-        structure = analyze_jp_structure(row['content'])
-        readability_metrics = analyze_jp_readability(row['content'])
-        
-        sentiments.append(sentiment)
-        solution_scores.append(solution_score)
-        structure_data.append(structure)
-        readability_data.append(readability_metrics)
-        titles.append(row['title'] if isinstance(row['title'], str) else '')
+# キャッシュにない記事だけを複数プロセスで分析する（結果は jp_contents と同じ順）
+jp_articles = df_jp[df_jp['content'].apply(lambda c: isinstance(c, str) and c != '')]
+solution_scores = jp_solution_orientation.map(jp_contents, workers=analysis_workers)
+structure_data = analyze_jp_structure.map(jp_contents, workers=analysis_workers)
+readability_data = analyze_jp_readability.map(jp_contents, workers=analysis_workers, initializer=init_worker_mecab)
+titles = [t if isinstance(t, str) else '' for t in jp_articles['title']]
+article_ids = jp_articles['doc_id'].tolist()
 
 # 分析結果をデータフレームに
 sentiment_df = pd.DataFrame({
+    'doc_id': article_ids,
     'title': titles,
     'polarity': [s['polarity'] for s in sentiments],
     'subjectivity': [s['subjectivity'] for s in sentiments],
@@ -191,6 +161,7 @@ sentiment_df = pd.DataFrame({
 })
 
 structure_df = pd.DataFrame({
+    'doc_id': article_ids,
     'title': titles,
     'headings': [s['headings'] for s in structure_data],
     'paragraphs': [s['paragraphs'] for s in structure_data],
@@ -199,6 +170,7 @@ structure_df = pd.DataFrame({
 })
 
 readability_df = pd.DataFrame({
+    'doc_id': article_ids,
     'title': titles,
     'avg_sentence_length': [r['avg_sentence_length'] for r in readability_data],
     'character_per_sentence': [r['character_per_sentence'] for r in readability_data]
@@ -260,13 +232,14 @@ plt.close()
 # 3. 日英比較グラフ（もしdf_enのデータがある場合）
 try:
     # 英語データの読み込み試行
-    en_file_path = os.path.join(data_folder, "remote_work_data_en_20250329_165210.csv")
+    en_file_path = latest_data_file('en')
     df_en = pd.read_csv(en_file_path)
     
-    # 英語データの分析結果があると仮定
-    en_sentiment_df = pd.read_csv("en_sentiment_analysis.csv") if os.path.exists("en_sentiment_analysis.csv") else None
+    # 英語データの分析結果（特徴量ストアにあるもの）
+    en_sentiment_df = feature_store.read('sentiment', ['solution_score', 'polarity', 'language'])
+    en_sentiment_df = en_sentiment_df[en_sentiment_df['language'] == 'en']
     
-    if en_sentiment_df is not None:
+    if len(en_sentiment_df):
         # 日英比較グラフ（感情極性とソリューション指向度）
         plt.figure(figsize=(10, 6))
         
@@ -304,7 +277,9 @@ print(f"平均段落長: {structure_df['avg_paragraph_length'].mean():.1f}文字
 print(f"平均文長（語数）: {readability_df['avg_sentence_length'].mean():.1f}語")
 print(f"平均文長（文字数）: {readability_df['character_per_sentence'].mean():.1f}文字")
 
-# 分析結果の保存
-sentiment_df.to_csv("jp_sentiment_analysis.csv", index=False)
-structure_df.to_csv("jp_structure_analysis.csv", index=False)
-readability_df.to_csv("jp_readability_analysis.csv", index=False)
\ No newline at end of file
+# 分析結果の保存（記事IDとバージョンで特徴量ストアに追加・更新する）
+for group, features_df in [('sentiment', sentiment_df), ('structure', structure_df), ('readability', readability_df)]:
+    feature_store.upsert(group, features_df.assign(language='jp'), feature_version, texts=jp_contents)
+
+# 分析キャッシュのヒット率
+report_hit_rates()
@@ -0,0 +1,215 @@
+import os
+from collections import OrderedDict
+import numpy as np
+
+from corpus import content_hash, cache_path
+from sentence_segmenter import segment
+
+# トークン化の仕様を変えた場合はバージョンを上げる（古いキャッシュは使われなくなる）
+TOKENIZER_VERSION = 1
+
+# 品詞（第1階層）の対応表。品詞は文字列ではなくこの表のIDとして保存する
+# IPADIC（-Ochasen）とUniDicの両方の品詞名を含める
+POS_TAGS = [
+    'その他', '名詞', '動詞', '形容詞', '副詞', '連体詞', '接続詞', '感動詞',
+    '助詞', '助動詞', '接頭詞', '記号', 'フィラー',
+    '代名詞', '形状詞', '接頭辞', '接尾辞', '補助記号', '空白'
+]
+POS_IDS = {pos: i for i, pos in enumerate(POS_TAGS)}
+
+# 感情分析で使う内容語（名詞、動詞、形容詞、副詞）
+CONTENT_POS = ['名詞', '動詞', '形容詞', '副詞']
+
+# 同じ記事を続けて解析する場合に備えて、直近のトークン列をメモリにも保持する
+_MEMORY_CACHE_SIZE = 256
+_memory_cache = OrderedDict()
+
+
+class JPTokens:
+    """
+    1つの記事の形態素解析結果
+
+    表層形は文字列のリストではなく、本文中の開始・終了位置（int32配列）として保持する。
+    品詞はPOS_TAGSのID（uint8配列）、文の境界も開始・終了位置の配列で保持する。
+    """
+
+    def __init__(self, text, starts, ends, pos_ids, sentence_starts, sentence_ends):
+        self.text = text
+        self.starts = starts
+        self.ends = ends
+        self.pos_ids = pos_ids
+        self.sentence_starts = sentence_starts
+        self.sentence_ends = sentence_ends
+
+    def __len__(self):
+        return len(self.starts)
+
+    def surfaces(self, pos=None):
+        """
+        表層形のリストを返す
+
+        Parameters:
+        pos (list): 抽出する品詞のリスト（Noneの場合はすべてのトークン）
+
+        Returns:
+        list: 表層形のリスト
+        """
+        if pos is None:
+            indices = range(len(self.starts))
+        else:
+            mask = np.isin(self.pos_ids, [POS_IDS[p] for p in pos if p in POS_IDS])
+            indices = np.flatnonzero(mask)
+        text = self.text
+        starts = self.starts
+        ends = self.ends
+        return [text[starts[i]:ends[i]] for i in indices]
+
+    def sentence_token_counts(self):
+        """
+        文ごとのトークン数を返す（文の範囲に完全に含まれるトークンを数える）
+
+        Returns:
+        numpy.ndarray: 文ごとのトークン数
+        """
+        first = np.searchsorted(self.starts, self.sentence_starts, side='left')
+        last = np.searchsorted(self.ends, self.sentence_ends, side='right')
+        return np.maximum(last - first, 0)
+
+    def sentence_lengths(self):
+        """
+        文ごとの文字数を返す
+
+        Returns:
+        numpy.ndarray: 文ごとの文字数
+        """
+        return self.sentence_ends - self.sentence_starts
+
+
+def tokenize(text, tagger):
+    """
+    MeCabで記事全体を1回だけ解析し、JPTokensを作成する
+
+    Parameters:
+    text (str): 記事の本文
+    tagger (MeCab.Tagger): MeCabのTagger
+
+    Returns:
+    JPTokens: 形態素解析結果
+    """
+    starts = []
+    ends = []
+    pos_ids = []
+
+    tagger.parse('')  # バッファをクリア
+    node = tagger.parseToNode(text)
+    offset = 0
+    while node:
+        pos = node.feature.partition(',')[0]
+        if pos != 'BOS/EOS':
+            surface = node.surface
+            start = text.find(surface, offset)
+            if start < 0:  # 表層形が本文と一致しない場合（通常は発生しない）
+                start = offset
+            offset = start + len(surface)
+            starts.append(start)
+            ends.append(offset)
+            pos_ids.append(POS_IDS.get(pos, 0))
+        node = node.next
+
+    sentence_starts, sentence_ends = segment(text, 'ja')
+    return JPTokens(
+        text,
+        np.array(starts, dtype=np.int32),
+        np.array(ends, dtype=np.int32),
+        np.array(pos_ids, dtype=np.uint8),
+        sentence_starts,
+        sentence_ends
+    )
+
+
+def _token_cache_file(key):
+    return cache_path("jp_tokens", f"v{TOKENIZER_VERSION}", key[:2], f"{key}.npz")
+
+
+def _remember(key, tokens):
+    _memory_cache[key] = tokens
+    _memory_cache.move_to_end(key)
+    if len(_memory_cache) > _MEMORY_CACHE_SIZE:
+        _memory_cache.popitem(last=False)
+
+
+def find_cached_tokens(text, key=None):
+    """
+    キャッシュ済みのトークン列を返す（MeCabは実行しない）
+
+    Parameters:
+    text (str): 記事の本文
+    key (str): 本文のハッシュ値（省略時は計算する）
+
+    Returns:
+    JPTokens: キャッシュがない場合はNone
+    """
+    key = key or content_hash(text)
+    if key in _memory_cache:
+        _memory_cache.move_to_end(key)
+        return _memory_cache[key]
+
+    path = _token_cache_file(key)
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path) as data:
+            tokens = JPTokens(
+                text, data['starts'], data['ends'], data['pos_ids'],
+                data['sentence_starts'], data['sentence_ends']
+            )
+    except Exception as e:
+        print(f"トークンキャッシュの読み込みに失敗しました（再解析します）: {e}")
+        return None
+    _remember(key, tokens)
+    return tokens
+
+
+def save_tokens(tokens, key=None):
+    """
+    トークン列をディスクキャッシュとメモリに保存する
+
+    Parameters:
+    tokens (JPTokens): 形態素解析結果
+    key (str): 本文のハッシュ値（省略時は計算する）
+    """
+    key = key or content_hash(tokens.text)
+    path = _token_cache_file(key)
+    # 並列実行時に書きかけのファイルを読まないよう、一時ファイル経由で保存
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        np.savez(
+            f,
+            starts=tokens.starts, ends=tokens.ends, pos_ids=tokens.pos_ids,
+            sentence_starts=tokens.sentence_starts, sentence_ends=tokens.sentence_ends
+        )
+    os.replace(tmp_path, path)
+    _remember(key, tokens)
+
+
+def load_tokens(text, tagger, use_cache=True):
+    """
+    記事のトークン列を取得する（キャッシュがあればMeCabを実行しない）
+
+    結果は本文のハッシュ値をキーとしてcache/jp_tokensに保存される。
+
+    Parameters:
+    text (str): 記事の本文
+    tagger (MeCab.Tagger): キャッシュがない場合に使うMeCabのTagger
+    use_cache (bool): ディスクキャッシュを使用するかどうか
+
+    Returns:
+    JPTokens: 形態素解析結果
+    """
+    key = content_hash(text)
+    tokens = find_cached_tokens(text, key) if use_cache else None
+    if tokens is None:
+        tokens = tokenize(text, tagger)
+        if use_cache:
+            save_tokens(tokens, key)
+    return tokens
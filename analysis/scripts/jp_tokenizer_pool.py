@@ -0,0 +1,136 @@
+import os
+import sys
+import time
+from functools import partial
+
+from parallel import WorkerPool, default_workers
+from jp_token_store import JPTokens, tokenize, find_cached_tokens, save_tokens
+
+# ワーカープロセスごとのMeCab Tagger（プロセス間で共有しない）
+_worker_tagger = None
+
+
+def _init_worker(tagger_args):
+    global _worker_tagger
+    import MeCab
+    _worker_tagger = MeCab.Tagger(tagger_args)
+
+
+def _tokenize_text(text, use_cache):
+    # 本文は親プロセスが持っているので、返すのはオフセットなどの配列だけにする
+    tokens = tokenize(text, _worker_tagger)
+    if use_cache:
+        save_tokens(tokens)
+    return (tokens.starts, tokens.ends, tokens.pos_ids,
+            tokens.sentence_starts, tokens.sentence_ends)
+
+
+class JPTokenizerPool:
+    """
+    複数プロセスで日本語の形態素解析を行うトークン化サービス
+
+    各ワーカープロセスが自分専用のMeCab Taggerを持ち、文書のバッチを
+    チャンク単位で分担して解析する。結果は入力と同じ順序で返される。
+
+    使用例:
+    with JPTokenizerPool(workers=8) as pool:
+        tokens_list = pool.tokenize_batch(texts)
+    """
+
+    def __init__(self, workers=None, tagger_args="-Ochasen", chunksize=16, use_cache=True):
+        self.workers = workers or default_workers()
+        self.tagger_args = tagger_args
+        self.chunksize = chunksize
+        self.use_cache = use_cache
+        self._pool = WorkerPool(self.workers, initializer=_init_worker, initargs=(tagger_args,), chunksize=chunksize)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self._pool.close()
+
+    def tokenize_batch(self, texts):
+        """
+        文書のバッチを並列に形態素解析する
+
+        キャッシュ済みの文書はワーカーに送らず、未解析の文書だけを解析する。
+
+        Parameters:
+        texts (list): 記事本文のリスト
+
+        Returns:
+        list: JPTokensのリスト（入力と同じ順序）
+        """
+        results = [None] * len(texts)
+        pending = []
+        for i, text in enumerate(texts):
+            if self.use_cache:
+                results[i] = find_cached_tokens(text)
+            if results[i] is None:
+                pending.append(i)
+
+        if not pending:
+            return results
+
+        tokenized = self._pool.map(partial(_tokenize_text, use_cache=self.use_cache), [texts[i] for i in pending])
+        for i, arrays in zip(pending, tokenized):
+            results[i] = JPTokens(texts[i], *arrays)
+        return results
+
+
+def benchmark(texts, worker_counts=(1, 2, 4, 8, 16, 32), tagger_args="-Ochasen", chunksize=16):
+    """
+    ワーカー数ごとのスループット（文書/秒）を計測する（キャッシュは使用しない）
+
+    Parameters:
+    texts (list): 計測に使う記事本文のリスト
+    worker_counts (tuple): 計測するワーカー数
+    tagger_args (str): MeCab Taggerの引数
+    chunksize (int): 1回にワーカーへ送る文書数
+
+    Returns:
+    list: ワーカー数、処理時間、スループットの辞書のリスト
+    """
+    rows = []
+    for workers in worker_counts:
+        with JPTokenizerPool(workers=workers, tagger_args=tagger_args,
+                             chunksize=chunksize, use_cache=False) as pool:
+            # プロセス起動とTaggerの初期化は計測から除外する
+            pool.tokenize_batch(texts[:workers])
+            start = time.perf_counter()
+            pool.tokenize_batch(texts)
+            elapsed = time.perf_counter() - start
+        rows.append({'workers': workers, 'seconds': elapsed, 'docs_per_sec': len(texts) / elapsed})
+        print(f"ワーカー数 {workers:>2}: {elapsed:.2f}秒, {len(texts) / elapsed:.1f} 文書/秒")
+    return rows
+
+
+if __name__ == "__main__":
+    import pandas as pd
+    from corpus import latest_data_file
+
+    # 使い方: python jp_tokenizer_pool.py [CSVファイル] [文書数]
+    #         python jp_tokenizer_pool.py --warm [CSVファイル]（全記事を解析してトークンストアに保存する）
+    if len(sys.argv) > 1 and sys.argv[1] == '--warm':
+        file_path = sys.argv[2] if len(sys.argv) > 2 else latest_data_file('jp')
+        contents = [c for c in pd.read_csv(file_path)['content'] if isinstance(c, str) and c != '']
+        start = time.perf_counter()
+        with JPTokenizerPool() as pool:
+            pool.tokenize_batch(contents)
+        print(f"{len(contents)}文書をトークンストアに保存しました: {time.perf_counter() - start:.2f}秒")
+        sys.exit(0)
+
+    file_path = sys.argv[1] if len(sys.argv) > 1 else latest_data_file('jp')
+    num_docs = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+
+    contents = [c for c in pd.read_csv(file_path)['content'] if isinstance(c, str) and c != '']
+    # 計測用に記事を繰り返して文書数を揃える
+    texts = [contents[i % len(contents)] for i in range(num_docs)]
+    max_workers = os.cpu_count() or 1
+    worker_counts = [w for w in (1, 2, 4, 8, 16, 32) if w <= max_workers]
+    print(f"{len(texts)}文書の形態素解析スループット（CPU {max_workers}コア）:")
+    benchmark(texts, worker_counts)
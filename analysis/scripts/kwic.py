@@ -0,0 +1,155 @@
+import numpy as np
+
+from cooccurrence import PositionalIndex
+from sentence_segmenter import context_window
+
+
+class KWICIndex:
+    """
+    キーワードの文脈（KWIC: Keyword in Context）を取り出すためのインデックス
+
+    作成時に各文書を1回だけ小文字化し、全キーワードの出現位置（文書番号・文字位置）を
+    位置付き転置インデックスにまとめる。スニペットの取得ではコーパスを走査せず、
+    インデックスの出現位置から必要な件数だけ切り出す。
+    """
+
+    def __init__(self, texts, categories=None, keywords=None, languages=None):
+        """
+        Parameters:
+        texts (list): 文書のテキスト（文字列以外は空の文書として扱う）
+        categories (dict): カテゴリ名 -> キーワードのリスト
+        keywords (list): カテゴリに属さない個別のキーワード
+        languages (list): 文書ごとの言語（'en'/'ja'、文単位の文脈を取り出す場合に使う）
+        """
+        self.texts = list(texts)
+        self.languages = list(languages) if languages is not None else ['en'] * len(self.texts)
+        self.categories = {name: [k.lower() for k in words] for name, words in (categories or {}).items()}
+        terms = [k.lower() for k in keywords or []]
+        for words in self.categories.values():
+            terms.extend(words)
+
+        lower_texts = [text.lower() if isinstance(text, str) else None for text in self.texts]
+        # 切り出し範囲の上限は従来どおり小文字化したテキストの長さ
+        self._lower_lengths = np.array([len(t) if t is not None else 0 for t in lower_texts], dtype=np.int64)
+        self._index = PositionalIndex.build(lower_texts, terms)
+        self._first_hits = {}
+
+    def _keywords(self, key):
+        # カテゴリ名ならそのキーワード、そうでなければキーワードそのもの
+        if key in self.categories:
+            return self.categories[key]
+        return [key.lower()]
+
+    def _keyword_first_hits(self, keyword):
+        # 文書ごとの最初の出現位置（str.find と同じ）
+        if keyword not in self._first_hits:
+            if keyword in self._index._term_ids:
+                doc_ids, offsets = self._index.positions(keyword)
+            else:
+                doc_ids, offsets = np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32)
+            docs, first = np.unique(doc_ids, return_index=True)
+            self._first_hits[keyword] = (docs, offsets[first])
+        return self._first_hits[keyword]
+
+    def hits(self, key, first_only=True):
+        """
+        キーワードまたはカテゴリの出現位置を返す
+
+        Parameters:
+        key (str): キーワードまたはカテゴリ名
+        first_only (bool): 文書ごとに最初の出現だけを返すかどうか
+
+        Returns:
+        list: (キーワード, 文書番号の配列, 文字位置の配列) のリスト（キーワードの順）
+        """
+        result = []
+        for keyword in self._keywords(key):
+            if first_only:
+                docs, offsets = self._keyword_first_hits(keyword)
+            elif keyword in self._index._term_ids:
+                docs, offsets = self._index.positions(keyword)
+            else:
+                docs, offsets = np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32)
+            result.append((keyword, docs, offsets))
+        return result
+
+    def documents(self, key):
+        """
+        キーワードまたはカテゴリのいずれかのキーワードを含む文書の番号を返す
+
+        Parameters:
+        key (str): キーワードまたはカテゴリ名
+
+        Returns:
+        numpy.ndarray: 文書番号の配列（昇順）
+        """
+        doc_arrays = [docs for _, docs, _ in self.hits(key)]
+        if not doc_arrays:
+            return np.zeros(0, dtype=np.int32)
+        return np.unique(np.concatenate(doc_arrays))
+
+    def _iter_snippets(self, key, window, sentences, first_only, min_length, dedup):
+        seen_texts = set()
+        seen_spans = {}
+        for keyword, docs, offsets in self.hits(key, first_only=first_only):
+            for doc_id, offset in zip(docs.tolist(), offsets.tolist()):
+                text = self.texts[doc_id]
+                if sentences is None:
+                    start = max(0, offset - window)
+                    end = min(int(self._lower_lengths[doc_id]), offset + window)
+                else:
+                    start, end = context_window(text, offset, self.languages[doc_id], neighbors=sentences)
+                snippet = text[start:end].replace('\n', ' ').strip()
+                if len(snippet) < min_length:
+                    continue
+                if dedup:
+                    # 同じ文面、または同じ文書で既に返した範囲と重なるものは除く
+                    if snippet in seen_texts:
+                        continue
+                    if any(start < s_end and s_start < end for s_start, s_end in seen_spans.get(doc_id, [])):
+                        continue
+                    seen_texts.add(snippet)
+                    seen_spans.setdefault(doc_id, []).append((start, end))
+                yield {
+                    'keyword': keyword,
+                    'doc': doc_id,
+                    'offset': offset,
+                    'start': start,
+                    'end': end,
+                    'text': snippet
+                }
+
+    def snippets(self, key, window=100, top_n=None, page=0, sentences=None,
+                 first_only=True, min_length=0, dedup=False):
+        """
+        キーワードまたはカテゴリの文脈スニペットを返す
+
+        スニペットはキーワードの順（カテゴリの場合）、文書番号の順に並ぶ。
+        ページの位置までのスニペットだけを切り出すので、先頭のページは
+        該当件数に関係なくすぐに返る。
+
+        Parameters:
+        key (str): キーワードまたはカテゴリ名
+        window (int): キーワードの位置の前後に含める文字数
+        top_n (int): 1ページあたりの件数（Noneの場合はすべて）
+        page (int): ページ番号（0始まり）
+        sentences (int): 指定した場合は文字数の代わりに、キーワードを含む文と前後この数の文を返す
+        first_only (bool): 文書ごとに最初の出現だけを使うかどうか
+        min_length (int): これより短いスニペットは除外する
+        dedup (bool): 同じ文面や同じ文書内で重なるスニペットを除くかどうか
+
+        Returns:
+        list: {'keyword', 'doc', 'offset', 'start', 'end', 'text'} のリスト
+        """
+        iterator = self._iter_snippets(key, window, sentences, first_only, min_length, dedup)
+        if top_n is None:
+            return list(iterator)
+        skip = page * top_n
+        result = []
+        for i, snippet in enumerate(iterator):
+            if i < skip:
+                continue
+            result.append(snippet)
+            if len(result) >= top_n:
+                break
+        return result
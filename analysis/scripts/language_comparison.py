@@ -7,20 +7,32 @@ import seaborn as sns
 import re
 from collections import Counter
 
+from language_id import label_languages
+from sketches import streaming_top_words
+from token_store import TokenStore
+from corpus import latest_data_file
+
 
 # カラーパレット設定
 colors = sns.color_palette("colorblind")
 # フォント設定
 plt.rcParams['font.family'] = 'Hiragino Sans'
 
-# データフォルダのパス
-data_folder = os.path.join(os.getcwd(), "..", "data")
-file_path = os.path.join(data_folder, "remote_work_all_data_20250329_165210.csv")
+# 頻出単語をスケッチで近似的に数えるかどうか（巨大なコーパス向け、メモリ使用量が一定）
+approximate_top_words = False
+# スケッチが保持する単語数（推定回数の誤差は 単語総数 / sketch_capacity 以下）
+sketch_capacity = 10000
+
+file_path = latest_data_file('all')
 df_all = pd.read_csv(file_path)
 
 # コンテンツの単語数を計算
 df_all['word_count'] = df_all['content'].fillna('').apply(lambda x: len(str(x).split()))
 
+# 言語の判定結果がない（先頭100文字だけで判定した）データは、本文全体から判定し直す
+if 'language_confidence' not in df_all.columns:
+    df_all = label_languages(df_all)
+
 # 言語ごとにデータを分離する
 df_en = df_all[df_all['language'] == 'en']
 df_ja = df_all[df_all['language'] == 'ja']
@@ -53,19 +65,23 @@ def preprocess_text(text):
 
 # 言語別の共通キーワード比較
 # 各言語ごとの頻出単語を抽出
-en_content_words = []
-ja_content_words = []
-
-for content in df_en['content'].fillna(''):
-    words = preprocess_text(content).split()
-    en_content_words.extend(words)
-
-for content in df_ja['content'].fillna(''):
-    words = preprocess_text(content).split()
-    ja_content_words.extend(words)
-
-en_word_counts = Counter(en_content_words).most_common(15)
-ja_word_counts = Counter(ja_content_words).most_common(15)
+if approximate_top_words:
+    # 1回の走査でスケッチに数える
+    en_word_counts = streaming_top_words(
+        (preprocess_text(content).split() for content in df_en['content'].fillna('')), n=15, capacity=sketch_capacity
+    )
+    ja_word_counts = streaming_top_words(
+        (preprocess_text(content).split() for content in df_ja['content'].fillna('')), n=15, capacity=sketch_capacity
+    )
+else:
+    # 単語IDの配列としてトークンストアに保存し、次回以降は再利用する
+    en_store = TokenStore.from_texts(df_en['content'].fillna(''), lambda content: preprocess_text(content).split(),
+                                     name='language_comparison_en')
+    ja_store = TokenStore.from_texts(df_ja['content'].fillna(''), lambda content: preprocess_text(content).split(),
+                                     name='language_comparison_ja')
+
+    en_word_counts = en_store.most_common(15)
+    ja_word_counts = ja_store.most_common(15)
 
 # 言語別頻出単語の比較グラフ
 fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(18, 8))
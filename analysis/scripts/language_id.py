@@ -0,0 +1,148 @@
+import sys
+import numpy as np
+import pandas as pd
+
+from char_stats import SCRIPT_RANGES, iter_codepoint_chunks
+
+# 判定に使う文字の分類（0は判定に使わない文字: 数字、記号、空白など）
+LETTER_CLASSES = ['other', 'latin', 'kana', 'kanji']
+_CLASS_RANGES = [
+    ('latin', 0x41, 0x5A),
+    ('latin', 0x61, 0x7A),
+    ('kana',) + SCRIPT_RANGES['hiragana'],
+    ('kana',) + SCRIPT_RANGES['katakana'],
+    ('kanji',) + SCRIPT_RANGES['kanji'],
+]
+_BOUNDARIES = np.array([edge for _, start, end in _CLASS_RANGES for edge in (start, end + 1)], dtype=np.uint32)
+_CLASS_OF_INTERVAL = np.zeros(len(_BOUNDARIES) + 1, dtype=np.int64)
+for _name, _start, _end in _CLASS_RANGES:
+    _CLASS_OF_INTERVAL[np.searchsorted(_BOUNDARIES, _start, side='right')] = LETTER_CLASSES.index(_name)
+
+# 判定の閾値（日本語の文字の割合）
+JA_THRESHOLD = 0.6
+EN_THRESHOLD = 0.05
+# これより文字（英字・かな・漢字）が少ない文書は判定しない
+MIN_LETTERS = 20
+# この文字数以上あれば、信頼度を文字数で割り引かない
+CONFIDENT_LETTERS = 200
+
+
+def letter_counts(texts):
+    """
+    文書ごとの英字・かな・漢字の文字数を数える
+
+    全文書を連結したコードポイントの配列を np.searchsorted で一括分類し、
+    文書番号との組み合わせを np.bincount で数える。
+
+    Parameters:
+    texts (list): テキストのリスト（文字列以外は空として扱う）
+
+    Returns:
+    numpy.ndarray: 文書 × 分類（LETTER_CLASSESの順）の文字数
+    """
+    texts = [text if isinstance(text, str) else '' for text in texts]
+    num_classes = len(LETTER_CLASSES)
+    counts = np.zeros((len(texts), num_classes), dtype=np.int64)
+    for first, last, points in iter_codepoint_chunks(texts):
+        lengths = [len(text) for text in texts[first:last]]
+        doc_index = np.repeat(np.arange(last - first), lengths)
+        classes = _CLASS_OF_INTERVAL[np.searchsorted(_BOUNDARIES, points, side='right')]
+        codes = doc_index * num_classes + classes
+        counts[first:last] = np.bincount(codes, minlength=(last - first) * num_classes).reshape(-1, num_classes)
+    return counts
+
+
+def identify_languages(texts, ja_threshold=JA_THRESHOLD, en_threshold=EN_THRESHOLD, min_letters=MIN_LETTERS):
+    """
+    文書全体の文字種の割合から言語を判定する
+
+    日本語の文字（かなを含む文書のかな・漢字）の、英字との合計に対する割合で判定する。
+    かなを含まない漢字だけの文書（中国語など）は日本語とみなさない。
+        ja_threshold 以上: 'ja'、en_threshold 以下: 'en'、その間: 'mixed'、
+        文字が min_letters 未満: 'unknown'
+    信頼度は多い方の文字種の割合（'mixed' は両者の近さ）に、文字数が
+    CONFIDENT_LETTERS 未満の場合は文字数の割合を掛けたもの。
+
+    Parameters:
+    texts (list): テキストのリスト
+    ja_threshold (float): 日本語と判定する割合
+    en_threshold (float): 英語と判定する割合
+    min_letters (int): 判定に必要な文字数
+
+    Returns:
+    tuple: (言語のリスト, 信頼度の配列)
+    """
+    counts = letter_counts(texts)
+    latin = counts[:, LETTER_CLASSES.index('latin')]
+    kana = counts[:, LETTER_CLASSES.index('kana')]
+    kanji = counts[:, LETTER_CLASSES.index('kanji')]
+    japanese = np.where(kana > 0, kana + kanji, 0)
+    letters = japanese + latin
+    ja_ratio = japanese / np.maximum(letters, 1)
+
+    labels = np.full(len(counts), 'mixed', dtype=object)
+    labels[ja_ratio >= ja_threshold] = 'ja'
+    labels[ja_ratio <= en_threshold] = 'en'
+    unknown = letters < min_letters
+    labels[unknown] = 'unknown'
+
+    confidence = np.where(
+        labels == 'ja', ja_ratio,
+        np.where(labels == 'en', 1 - ja_ratio, 1 - np.abs(ja_ratio - 0.5) * 2)
+    )
+    confidence = confidence * np.minimum(letters / CONFIDENT_LETTERS, 1.0)
+    confidence[unknown] = 0.0
+    return labels.tolist(), confidence
+
+
+def identify_language(text):
+    """
+    1つの文書の言語を判定する
+
+    Parameters:
+    text (str): 対象テキスト
+
+    Returns:
+    tuple: (言語, 信頼度)
+    """
+    labels, confidence = identify_languages([text])
+    return labels[0], float(confidence[0])
+
+
+def label_languages(df, column='content'):
+    """
+    データフレームの各行の言語を判定し、'language' と 'language_confidence' 列を設定する
+
+    Parameters:
+    df (pandas.DataFrame): 記事のデータ
+    column (str): 判定に使う列
+
+    Returns:
+    pandas.DataFrame: 言語の列を追加（上書き）したデータフレーム
+    """
+    labels, confidence = identify_languages(df[column].tolist())
+    df = df.copy()
+    df['language'] = labels
+    df['language_confidence'] = confidence
+    return df
+
+
+if __name__ == "__main__":
+    # 使い方: python language_id.py 入力CSV [出力CSV]
+    # 既存のコーパスの言語を本文全体から判定し直す（出力を省略した場合は入力を上書き）
+    if len(sys.argv) < 2:
+        print("使い方: python language_id.py 入力CSV [出力CSV]")
+        sys.exit(1)
+    input_path = sys.argv[1]
+    output_path = sys.argv[2] if len(sys.argv) > 2 else input_path
+
+    df = pd.read_csv(input_path)
+    previous = df['language'].copy() if 'language' in df.columns else None
+    df = label_languages(df)
+    df.to_csv(output_path, index=False, encoding='utf-8-sig')
+
+    print(f"{len(df)}件の言語を判定しました: {output_path}")
+    print(df['language'].value_counts())
+    if previous is not None:
+        changed = (previous.fillna('') != df['language']).sum()
+        print(f"以前の判定から変わった件数: {changed}")
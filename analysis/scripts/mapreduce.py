@@ -0,0 +1,133 @@
+from collections import Counter
+from functools import reduce
+import numpy as np
+
+from parallel import parallel_map, default_workers
+
+
+class Mean:
+    """
+    平均を求めるための合計と件数（結合則を満たす形で合成できる）
+    """
+
+    def __init__(self, total=0.0, count=0):
+        self.total = total
+        self.count = count
+
+    def add(self, value):
+        """
+        値を1件加える（NumPy配列なら要素ごとの平均になる）
+
+        Parameters:
+        value (float or numpy.ndarray): 値
+        """
+        self.total = self.total + value
+        self.count += 1
+        return self
+
+    def merge(self, other):
+        """
+        別の Mean を合成する
+
+        Parameters:
+        other (Mean): 合成する平均
+
+        Returns:
+        Mean: 合成後の平均（自分自身）
+        """
+        self.total = self.total + other.total
+        self.count += other.count
+        return self
+
+    @property
+    def value(self):
+        """平均値（件数が0の場合はNaN）"""
+        return self.total / self.count if self.count else np.nan
+
+
+def merge(a, b):
+    """
+    部分集計を合成する汎用のreduce関数
+
+    Counter は回数の和、辞書はキーごとに再帰的に合成、Mean は合計と件数の和、
+    数値・NumPy配列・疎行列は和、リストは連結、タプルは要素ごとに合成する。
+    いずれも結合則を満たすため、シャードの分け方によらず同じ結果になる。
+
+    Parameters:
+    a: 部分集計
+    b: 部分集計
+
+    Returns:
+    合成した集計
+    """
+    if isinstance(a, Mean):
+        return a.merge(b)
+    if isinstance(a, Counter):
+        a.update(b)
+        return a
+    if isinstance(a, dict):
+        for key, value in b.items():
+            a[key] = merge(a[key], value) if key in a else value
+        return a
+    if isinstance(a, list):
+        return a + b
+    if isinstance(a, tuple):
+        return tuple(merge(x, y) for x, y in zip(a, b))
+    # 数値・NumPy配列・疎行列
+    return a + b
+
+
+def shard_indices(doc_ids, num_shards):
+    """
+    記事IDでレコードをシャードに分ける
+
+    Parameters:
+    doc_ids (list): レコードごとの記事ID
+    num_shards (int): シャード数
+
+    Returns:
+    list: シャードごとのレコード番号の配列（シャード内は元の順序）
+    """
+    shard_of = np.asarray(doc_ids, dtype=np.int64) % num_shards
+    order = np.argsort(shard_of, kind='stable')
+    boundaries = np.searchsorted(shard_of[order], np.arange(num_shards + 1))
+    return [order[boundaries[s]:boundaries[s + 1]] for s in range(num_shards)]
+
+
+def map_reduce(records, mapper, doc_ids=None, reducer=merge, workers=None, num_shards=None):
+    """
+    レコードを記事IDでシャードに分け、シャードごとのmapをプロセスプールで実行して合成する
+
+    mapperはシャードのレコードのリストを受け取って部分集計を返す関数。
+    forkが使える環境では、レコードとmapperを子プロセスにコピーせずに共有する
+    （その他の環境ではどちらもpickle可能である必要がある）。
+    部分集計はシャード番号の順にreducerで合成する。
+    レコードがない場合は mapper([]) の結果（件数0の集計）を返すため、mapperは
+    空のリストにも呼び出し側がそのまま使える集計を返すこと。
+
+    Parameters:
+    records (list): レコード（テキストや、テキストと言語の組など）
+    mapper (callable): シャードのレコードのリスト -> 部分集計
+    doc_ids (list): レコードごとの記事ID（省略時はレコード番号）
+    reducer (callable): 2つの部分集計を合成する関数（結合則を満たすもの）
+    workers (int): ワーカープロセス数（1ならプロセスを使わずに実行）
+    num_shards (int): シャード数（省略時はワーカー数の4倍）
+
+    Returns:
+    合成した集計（レコードがない場合は mapper([]) の結果）
+    """
+    records = list(records)
+    if doc_ids is None:
+        doc_ids = np.arange(len(records))
+    workers = workers or default_workers()
+    num_shards = num_shards or workers * 4
+    shards = [indices for indices in shard_indices(doc_ids, num_shards) if len(indices)]
+    if not shards:
+        return mapper([])
+
+    # 1シャードを1件の入力として、シャード番号の順に部分集計を得る
+    partials = parallel_map(
+        mapper, [[records[i] for i in indices] for indices in shards],
+        workers=workers if len(shards) > 1 else 1, chunksize=1, min_items=0
+    )
+    return reduce(reducer, partials)
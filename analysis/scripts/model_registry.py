@@ -0,0 +1,272 @@
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import joblib
+
+from corpus import CACHE_DIR
+
+# 学習済みモデルの保存先（analysis/cache/models/<名前>/<バージョン>/）
+REGISTRY_DIR = os.path.join(CACHE_DIR, "models")
+# 推論時に一度に変換する文書数
+INFERENCE_BATCH_SIZE = 1000
+# モデルごとに残すバージョン数（古いものから削除する）
+KEEP_VERSIONS = 5
+
+
+class RegisteredModel:
+    """
+    保存済みのベクトル化器とトピックモデル（変換のみで新しい記事のトピックを推定する）
+
+    モデルは学習し直さないため、同じバージョンを使う限りトピックの番号とラベルは変わらない。
+    """
+
+    def __init__(self, vectorizer, model, metadata):
+        """
+        Parameters:
+        vectorizer: テキストを行列に変換するベクトル化器（transform を持つもの。不要ならNone）
+        model: トピックモデル（LatentDirichletAllocation、NMF など transform を持つもの）
+        metadata (dict): モデルの情報（名前、バージョン、トピックのラベルなど）
+        """
+        self.vectorizer = vectorizer
+        self.model = model
+        self.metadata = metadata
+
+    @property
+    def n_topics(self):
+        return self.metadata['n_topics']
+
+    @property
+    def topic_labels(self):
+        """トピック番号 -> ラベル（JSONに保存するため、キーは文字列）"""
+        return self.metadata.get('topic_labels') or {}
+
+    def transform(self, texts, batch_size=INFERENCE_BATCH_SIZE):
+        """
+        文書のトピック分布を推定する
+
+        NMFのように合計が1にならないモデルの重みは、文書ごとに合計1に正規化する
+        （どのトピックの重みもない文書は0のまま）。
+
+        Parameters:
+        texts (list): 文書のテキスト（文字列以外は空の文書として扱う）
+        batch_size (int): 一度に変換する文書数
+
+        Returns:
+        numpy.ndarray: 文書 × トピック の分布
+        """
+        texts = [text if isinstance(text, str) else '' for text in texts]
+        batches = []
+        for start in range(0, len(texts), batch_size):
+            batch = texts[start:start + batch_size]
+            features = self.vectorizer.transform(batch) if self.vectorizer is not None else batch
+            batches.append(self.model.transform(features))
+        if not batches:
+            return np.zeros((0, self.n_topics))
+        weights = np.vstack(batches)
+        totals = weights.sum(axis=1, keepdims=True)
+        return np.divide(weights, totals, out=np.zeros_like(weights), where=totals > 0)
+
+    def assign(self, texts, batch_size=INFERENCE_BATCH_SIZE):
+        """
+        文書のトピック分布と主要トピックを表にする
+
+        Parameters:
+        texts (list): 文書のテキスト
+        batch_size (int): 一度に変換する文書数
+
+        Returns:
+        pandas.DataFrame: 'topic_1'〜'topic_k'、'main_topic'（'topic_i'）、'main_topic_label' 列
+        """
+        distributions = self.transform(texts, batch_size=batch_size)
+        columns = [f'topic_{i + 1}' for i in range(self.n_topics)]
+        result = pd.DataFrame(distributions, columns=columns)
+        main_topic = distributions.argmax(axis=1) if len(distributions) else np.zeros(0, dtype=np.int64)
+        # どのトピックの語も含まない文書は主要トピックなし（None）にする
+        has_topic = distributions.sum(axis=1) > 0
+        labels = self.topic_labels
+        result['main_topic'] = [columns[i] if ok else None for i, ok in zip(main_topic, has_topic)]
+        result['main_topic_label'] = [
+            labels.get(str(i), columns[i]) if ok else None for i, ok in zip(main_topic, has_topic)
+        ]
+        return result
+
+
+def _json_default(value):
+    # NumPyの数値などJSONで表せない値
+    if isinstance(value, np.generic):
+        return value.item()
+    return repr(value)
+
+
+def model_fingerprint(vectorizer, model, topic_labels=None):
+    """
+    モデルの内容（語彙、トピック × 語彙 の重み、トピックのラベル）のハッシュ値を計算する
+
+    Parameters:
+    vectorizer: ベクトル化器（不要ならNone）
+    model: トピックモデル（components_ を持つもの）
+    topic_labels (dict): トピック番号 -> ラベル
+
+    Returns:
+    str: SHA-1の16進ダイジェスト
+    """
+    if vectorizer is not None and hasattr(vectorizer, 'get_feature_names_out'):
+        vocabulary = vectorizer.get_feature_names_out()
+    else:
+        vocabulary = getattr(model, 'feature_names', [])
+    digest = hashlib.sha1()
+    digest.update(type(model).__name__.encode('utf-8'))
+    digest.update(json.dumps([str(word) for word in vocabulary], ensure_ascii=False).encode('utf-8'))
+    digest.update(np.ascontiguousarray(model.components_, dtype=np.float64).tobytes())
+    digest.update(json.dumps({str(k): v for k, v in (topic_labels or {}).items()},
+                             ensure_ascii=False, sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def register_model(name, vectorizer, model, topic_labels=None, metadata=None, keep=KEEP_VERSIONS):
+    """
+    学習済みのベクトル化器とトピックモデルを新しいバージョンとして保存する
+
+    最新のバージョンと内容（model_fingerprint）が同じなら保存せず、そのバージョンを返す。
+    保存した場合は、新しいものから keep 個を残して古いバージョンを削除する。
+
+    Parameters:
+    name (str): モデルの名前（例: 'job_search_nmf'）
+    vectorizer: テキストを行列に変換するベクトル化器（不要ならNone）
+    model: トピックモデル（components_ を持つもの）
+    topic_labels (dict): トピック番号 -> ラベル
+    metadata (dict): その他の情報（学習に使った文書数など）
+    keep (int): 残すバージョン数（Noneなら削除しない）
+
+    Returns:
+    str: 保存した（または内容が同じ最新の）バージョン
+    """
+    fingerprint = model_fingerprint(vectorizer, model, topic_labels)
+    versions = list_versions(name)
+    if versions:
+        with open(os.path.join(REGISTRY_DIR, name, versions[-1], 'metadata.json'), encoding='utf-8') as f:
+            if json.load(f).get('fingerprint') == fingerprint:
+                return versions[-1]
+
+    os.makedirs(os.path.join(REGISTRY_DIR, name), exist_ok=True)
+    # バージョンは名前の順が保存の順になるようにする（マイクロ秒まで含め、古いものを削除しても並びが崩れない）
+    version = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+    if versions and version <= versions[-1]:
+        version = f"{versions[-1]}_1"
+
+    info = {
+        'name': name,
+        'version': version,
+        'created_at': time.time(),
+        'model_class': type(model).__name__,
+        'n_topics': int(model.components_.shape[0]),
+        'n_features': int(model.components_.shape[1]),
+        'params': model.get_params() if hasattr(model, 'get_params') else {},
+        'topic_labels': {str(k): v for k, v in (topic_labels or {}).items()},
+        'fingerprint': fingerprint,
+    }
+    info.update(metadata or {})
+
+    # 書きかけのフォルダを読まないよう、一時フォルダに書いてから置き換える
+    directory = os.path.join(REGISTRY_DIR, name, version)
+    tmp_directory = f"{directory}.{os.getpid()}.tmp"
+    os.makedirs(tmp_directory, exist_ok=True)
+    joblib.dump({'vectorizer': vectorizer, 'model': model}, os.path.join(tmp_directory, 'model.joblib'))
+    with open(os.path.join(tmp_directory, 'metadata.json'), 'w', encoding='utf-8') as f:
+        json.dump(info, f, ensure_ascii=False, indent=2, default=_json_default)
+    try:
+        os.replace(tmp_directory, directory)
+    except OSError:
+        shutil.rmtree(tmp_directory, ignore_errors=True)
+        raise
+    if keep is not None:
+        prune_versions(name, keep)
+    return version
+
+
+def prune_versions(name, keep=KEEP_VERSIONS):
+    """
+    新しいものから keep 個を残して、古いバージョンを削除する
+
+    Parameters:
+    name (str): モデルの名前
+    keep (int): 残すバージョン数
+
+    Returns:
+    list: 削除したバージョン
+    """
+    versions = list_versions(name)
+    removed = versions[:max(len(versions) - keep, 0)]
+    for version in removed:
+        shutil.rmtree(os.path.join(REGISTRY_DIR, name, version), ignore_errors=True)
+    return removed
+
+
+def list_versions(name):
+    """
+    保存済みのバージョンを古い順に返す
+
+    Parameters:
+    name (str): モデルの名前
+
+    Returns:
+    list: バージョンのリスト
+    """
+    directory = os.path.join(REGISTRY_DIR, name)
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        version for version in os.listdir(directory)
+        if os.path.exists(os.path.join(directory, version, 'metadata.json'))
+    )
+
+
+def load_model(name, version=None):
+    """
+    保存済みのモデルを読み込む
+
+    Parameters:
+    name (str): モデルの名前
+    version (str): バージョン（省略時は最新）
+
+    Returns:
+    RegisteredModel: モデル
+    """
+    if version is None:
+        versions = list_versions(name)
+        if not versions:
+            raise FileNotFoundError(f"保存済みのモデルがありません: {name}")
+        version = versions[-1]
+    directory = os.path.join(REGISTRY_DIR, name, version)
+    with open(os.path.join(directory, 'metadata.json'), encoding='utf-8') as f:
+        metadata = json.load(f)
+    saved = joblib.load(os.path.join(directory, 'model.joblib'))
+    return RegisteredModel(saved['vectorizer'], saved['model'], metadata)
+
+
+if __name__ == "__main__":
+    # 使い方: python model_registry.py モデル名 入力CSV [出力CSV]
+    # 新しく取得した記事に、保存済みのモデルでトピックを割り当てる（モデルは学習し直さない）
+    if len(sys.argv) < 3:
+        print("使い方: python model_registry.py モデル名 入力CSV [出力CSV]")
+        sys.exit(1)
+    model_name = sys.argv[1]
+    input_path = sys.argv[2]
+    output_path = sys.argv[3] if len(sys.argv) > 3 else input_path
+
+    registered = load_model(model_name)
+    df = pd.read_csv(input_path)
+    start = time.perf_counter()
+    topics = registered.assign(df['content'].tolist())
+    elapsed = time.perf_counter() - start
+    df = pd.concat([df.drop(columns=[c for c in topics.columns if c in df.columns]), topics], axis=1)
+    df.to_csv(output_path, index=False, encoding='utf-8-sig')
+
+    print(f"{model_name}（{registered.metadata['version']}）で{len(df)}件にトピックを割り当てました: {elapsed:.2f}秒")
+    print(df['main_topic_label'].value_counts())
@@ -0,0 +1,323 @@
+import os
+import numpy as np
+import pandas as pd
+import joblib
+from scipy import sparse
+from scipy.optimize import linear_sum_assignment
+from scipy.special import psi
+from sklearn.decomposition import LatentDirichletAllocation
+from sklearn.feature_extraction.text import CountVectorizer
+
+from corpus import content_hash, cache_path
+from token_store import Vocabulary
+
+
+class OnlineTopicModel:
+    """
+    新しい記事だけでトピックモデルを更新する、オンライン変分ベイズ法のLDA
+
+    文書は出現回数のベクトルにし、LatentDirichletAllocation.partial_fit で
+    ミニバッチごとに更新する。語彙は最初に出現した順に増やしていき
+    （grow_vocabulary=False なら最初のバッチの語彙に固定）、新しい語の列は
+    sklearn の初期化と同じ分布で追加する。
+    学習済みの記事は本文のハッシュ値で記録するため、同じコーパスを渡しても
+    新しく追加された記事だけが学習に使われる。
+    学習済みのベクトル化器（TfidfVectorizer など）を渡した場合は、その語彙に固定し、
+    バッチ学習と同じ特徴量（語彙数の上限や文書頻度の条件を適用したもの）で学習する。
+    """
+
+    # 以前に保存したモデル（語彙を固定する機能がない版）を読み込んだ場合の値
+    fixed_vocabulary = False
+
+    def __init__(self, n_topics=3, batch_size=128, random_state=42, grow_vocabulary=True,
+                 max_vocabulary=None, learning_decay=0.7, learning_offset=10.0, total_samples=1e6,
+                 vectorizer=None, **vectorizer_params):
+        """
+        Parameters:
+        n_topics (int): トピック数
+        batch_size (int): ミニバッチの文書数
+        random_state (int): 乱数のシード
+        grow_vocabulary (bool): 新しい語を語彙に追加するかどうか
+        max_vocabulary (int): 語彙数の上限（達した後は語彙を固定する）
+        learning_decay (float): 学習率の減衰（0.5〜1.0）
+        learning_offset (float): 学習の初期の更新を抑える値
+        total_samples (float): 想定するコーパス全体の文書数
+        vectorizer: 学習済みのベクトル化器（指定した場合は語彙を固定し、その transform で特徴量を作る）
+        vectorizer_params: トークン化の設定（CountVectorizer のパラメータ。例: stop_words='english'）
+        """
+        self.n_topics = n_topics
+        self.fixed_vocabulary = vectorizer is not None
+        self.grow_vocabulary = grow_vocabulary and not self.fixed_vocabulary
+        self.max_vocabulary = max_vocabulary
+        if self.fixed_vocabulary:
+            self.vectorizer = vectorizer
+            self.vocabulary = Vocabulary(vectorizer.get_feature_names_out().tolist())
+        else:
+            self.vectorizer = CountVectorizer(**vectorizer_params)
+            self.vocabulary = Vocabulary()
+        self.lda = LatentDirichletAllocation(
+            n_components=n_topics, learning_method='online', batch_size=batch_size,
+            learning_decay=learning_decay, learning_offset=learning_offset,
+            total_samples=total_samples, random_state=random_state
+        )
+        self.seen = set()
+
+    @property
+    def num_documents(self):
+        """学習済みの文書数"""
+        return len(self.seen)
+
+    @property
+    def feature_names(self):
+        """語彙（components_ の列の順）"""
+        return np.array(self.vocabulary.tokens, dtype=object)
+
+    @property
+    def components_(self):
+        """トピック × 語彙 の重み（LatentDirichletAllocation.components_）"""
+        return self.lda.components_
+
+    def vectorize(self, texts, grow=False):
+        """
+        テキストを 文書 × 語彙 の出現回数の疎行列に変換する
+
+        Parameters:
+        texts (iterable): 文書のテキスト（文字列以外は空の文書として扱う）
+        grow (bool): 語彙にない語を追加するかどうか
+
+        Returns:
+        scipy.sparse.csr_matrix: 出現回数の行列（語彙を固定した場合はベクトル化器の特徴量）
+        """
+        if self.fixed_vocabulary:
+            return sparse.csr_matrix(self.vectorizer.transform([t if isinstance(t, str) else '' for t in texts]))
+        analyzer = self.vectorizer.build_analyzer()
+        vocabulary = self.vocabulary
+        ids = []
+        offsets = [0]
+        for text in texts:
+            for token in analyzer(text if isinstance(text, str) else ''):
+                token_id = vocabulary.ids.get(token)
+                if token_id is None and grow and (
+                        self.max_vocabulary is None or len(vocabulary) < self.max_vocabulary):
+                    token_id = vocabulary.add(token)
+                if token_id is not None:
+                    ids.append(token_id)
+            offsets.append(len(ids))
+        matrix = sparse.csr_matrix(
+            (np.ones(len(ids), dtype=np.float64), np.array(ids, dtype=np.int64), np.array(offsets, dtype=np.int64)),
+            shape=(len(offsets) - 1, len(vocabulary))
+        )
+        matrix.sum_duplicates()
+        return matrix
+
+    def _grow_components(self):
+        # 語彙が増えた分だけ、トピック × 語 の重みの列を追加する（sklearn と同じ初期分布）
+        lda = self.lda
+        num_new = len(self.vocabulary) - lda.components_.shape[1]
+        if num_new <= 0:
+            return
+        new_columns = lda.random_state_.gamma(100.0, 0.01, (self.n_topics, num_new))
+        lda.components_ = np.hstack([lda.components_, new_columns.astype(lda.components_.dtype)])
+        lda.exp_dirichlet_component_ = np.exp(
+            psi(lda.components_) - psi(lda.components_.sum(axis=1))[:, np.newaxis]
+        )
+        lda.n_features_in_ = lda.components_.shape[1]
+
+    def partial_fit(self, texts):
+        """
+        まだ学習していない文書でモデルを更新する
+
+        Parameters:
+        texts (iterable): 文書のテキスト（学習済みの文書は無視する）
+
+        Returns:
+        int: 学習に使った文書数
+        """
+        new_texts = []
+        for text in texts:
+            text = text if isinstance(text, str) else ''
+            key = content_hash(text)
+            if key not in self.seen:
+                self.seen.add(key)
+                new_texts.append(text)
+        if not new_texts:
+            return 0
+
+        fitted = hasattr(self.lda, 'components_')
+        grow = self.grow_vocabulary or not fitted
+        matrix = self.vectorize(new_texts, grow=grow)
+        if matrix.shape[1] == 0:
+            return 0
+        if fitted:
+            self._grow_components()
+        self.lda.partial_fit(matrix)
+        return len(new_texts)
+
+    def transform(self, texts):
+        """
+        文書のトピック分布を推定する
+
+        Parameters:
+        texts (iterable): 文書のテキスト
+
+        Returns:
+        numpy.ndarray: 文書 × トピック の分布
+        """
+        return self.lda.transform(self.vectorize(texts))
+
+    def topic_word_distributions(self):
+        """
+        トピックごとの語の分布（components_ を行ごとに正規化したもの）
+
+        Returns:
+        numpy.ndarray: トピック × 語彙 の確率
+        """
+        return self.lda.components_ / self.lda.components_.sum(axis=1)[:, np.newaxis]
+
+    def refit(self, texts, max_iter=10):
+        """
+        同じ語彙で、全文書からバッチ学習したLDAを作成する（比較用）
+
+        Parameters:
+        texts (iterable): 全文書のテキスト
+        max_iter (int): 学習の反復回数
+
+        Returns:
+        sklearn.decomposition.LatentDirichletAllocation: バッチ学習したモデル
+        """
+        full = LatentDirichletAllocation(
+            n_components=self.n_topics, learning_method='batch', max_iter=max_iter,
+            random_state=self.lda.random_state
+        )
+        return full.fit(self.vectorize(texts))
+
+    def drift_report(self, texts, max_iter=10, n_words=10):
+        """
+        全文書からの再学習と比べて、トピックの語の分布がどれだけずれているかを返す
+
+        Parameters:
+        texts (iterable): 全文書のテキスト
+        max_iter (int): 再学習の反復回数
+        n_words (int): 表示する上位語の数
+
+        Returns:
+        pandas.DataFrame: トピックごとの対応と距離（topic_drift を参照）
+        """
+        full = self.refit(texts, max_iter=max_iter)
+        return topic_drift(full.components_, self.vocabulary.tokens,
+                           self.lda.components_, self.vocabulary.tokens, n_words=n_words)
+
+    def save(self, path):
+        """
+        モデルの状態を保存する（書きかけのファイルを読まないよう、一時ファイルに書いてから置き換える）
+
+        Parameters:
+        path (str): 保存先のファイル
+        """
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        joblib.dump(self, tmp_path)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        保存したモデルを読み込む
+
+        Parameters:
+        path (str): 保存先のファイル
+
+        Returns:
+        OnlineTopicModel: モデル
+        """
+        return joblib.load(path)
+
+
+def checkpoint_path(name):
+    """
+    モデルの保存先（analysis/cache/online_lda/<name>.joblib）を返す
+
+    Parameters:
+    name (str): モデルの名前
+
+    Returns:
+    str: 保存先のファイル
+    """
+    return cache_path('online_lda', f"{name}.joblib")
+
+
+def load_or_create(name, **params):
+    """
+    保存したモデルを読み込む（なければ新しく作成する）
+
+    トピック数やベクトル化器の設定が保存したモデルと異なる場合は新しく作成する
+    （ベクトル化器を渡した場合、語彙は保存したモデルのものを引き継ぐ）。
+
+    Parameters:
+    name (str): モデルの名前
+    params: OnlineTopicModel のパラメータ
+
+    Returns:
+    OnlineTopicModel: モデル
+    """
+    path = checkpoint_path(name)
+    if os.path.exists(path):
+        model = OnlineTopicModel.load(path)
+        vectorizer = params.get('vectorizer')
+        same_vectorizer = getattr(model, 'fixed_vocabulary', False) == (vectorizer is not None) and (
+            vectorizer is None or model.vectorizer.get_params() == vectorizer.get_params())
+        if model.n_topics == params.get('n_topics', model.n_topics) and same_vectorizer:
+            return model
+    return OnlineTopicModel(**params)
+
+
+def hellinger_distances(p, q):
+    """
+    分布の組ごとのヘリンジャー距離を計算する
+
+    Parameters:
+    p (numpy.ndarray): 分布 × 要素 の確率
+    q (numpy.ndarray): 分布 × 要素 の確率
+
+    Returns:
+    numpy.ndarray: p の分布 × q の分布 の距離（0〜1）
+    """
+    bhattacharyya = np.sqrt(p) @ np.sqrt(q).T
+    return np.sqrt(np.maximum(1.0 - bhattacharyya, 0.0))
+
+
+def topic_drift(reference, reference_vocabulary, model, model_vocabulary, n_words=10):
+    """
+    2つのトピックモデルのトピックを対応付け、語の分布の違いを返す
+
+    語彙を合わせた上で、トピックの組ごとのヘリンジャー距離を計算し、
+    距離の合計が最小になる1対1の対応をハンガリアン法で求める。
+
+    Parameters:
+    reference (numpy.ndarray): 基準のモデルの トピック × 語彙 の重み
+    reference_vocabulary (list): 基準のモデルの語彙（列の順）
+    model (numpy.ndarray): 比較するモデルの トピック × 語彙 の重み
+    model_vocabulary (list): 比較するモデルの語彙（列の順）
+    n_words (int): 表示する上位語の数
+
+    Returns:
+    pandas.DataFrame: トピック、対応する基準のトピック、ヘリンジャー距離、それぞれの上位語
+    """
+    vocabulary = Vocabulary(reference_vocabulary)
+    model_columns = vocabulary.encode(list(model_vocabulary))
+    p = np.zeros((reference.shape[0], len(vocabulary)))
+    p[:, :len(reference_vocabulary)] = reference
+    q = np.zeros((model.shape[0], len(vocabulary)))
+    np.add.at(q, (slice(None), model_columns), model)
+    p /= p.sum(axis=1)[:, np.newaxis]
+    q /= q.sum(axis=1)[:, np.newaxis]
+
+    distances = hellinger_distances(q, p)
+    rows, cols = linear_sum_assignment(distances)
+    tokens = vocabulary.tokens
+    return pd.DataFrame({
+        'topic': rows,
+        'reference_topic': cols,
+        'hellinger': distances[rows, cols],
+        'top_words': [', '.join(tokens[i] for i in q[t].argsort()[:-n_words - 1:-1]) for t in rows],
+        'reference_top_words': [', '.join(tokens[i] for i in p[t].argsort()[:-n_words - 1:-1]) for t in cols],
+    })
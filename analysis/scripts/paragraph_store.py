@@ -0,0 +1,216 @@
+import os
+import re
+import numpy as np
+
+from corpus import content_hash, cache_path, doc_ids
+
+# 段落の区切り（空行）。従来の re.split(r'\n\s*\n', content) と同じ
+PARAGRAPH_SEPARATOR = re.compile(r'\n\s*\n')
+
+# 段落表の形式を変えた場合はバージョンを上げる（古いキャッシュは使われなくなる）
+PARAGRAPH_STORE_VERSION = 1
+
+# 言語は文字列ではなくこの表のIDとして保存する
+LANGUAGES = ['ja', 'en']
+LANGUAGE_IDS = {language: i for i, language in enumerate(LANGUAGES)}
+
+
+def split_offsets(text):
+    """
+    テキストを段落に分割し、各段落の開始・終了位置を返す
+
+    text[starts[i]:ends[i]] は re.split(r'\\n\\s*\\n', text) の i 番目の要素と一致する
+    （空の段落も含む）。
+
+    Parameters:
+    text (str): 記事の本文
+
+    Returns:
+    tuple: (開始位置のリスト, 終了位置のリスト)
+    """
+    starts = []
+    ends = []
+    pos = 0
+    for m in PARAGRAPH_SEPARATOR.finditer(text):
+        starts.append(pos)
+        ends.append(m.start())
+        pos = m.end()
+    starts.append(pos)
+    ends.append(len(text))
+    return starts, ends
+
+
+class ParagraphStore:
+    """
+    記事の段落表（記事ID、段落番号、開始・終了位置、言語）
+
+    段落の分割は1度だけ行い、表を列ごとのNumPy配列としてキャッシュに保存する。
+    本文は記事IDから引けるように保持し、段落のテキストは位置から切り出す。
+    記事IDの行の範囲は辞書で引けるので、記事ごとの段落の取得は表の走査を必要としない。
+    """
+
+    def __init__(self, texts, languages, doc_id, paragraph_idx, starts, ends, language_ids):
+        """
+        Parameters:
+        texts (dict): 記事ID -> 本文
+        languages (dict): 記事ID -> 言語
+        doc_id (numpy.ndarray): 段落ごとの記事ID（int64）
+        paragraph_idx (numpy.ndarray): 記事内の段落番号（int32）
+        starts (numpy.ndarray): 段落の開始位置（int32）
+        ends (numpy.ndarray): 段落の終了位置（int32）
+        language_ids (numpy.ndarray): 言語ID（uint8）
+        """
+        self.texts = texts
+        self.languages = languages
+        self.doc_id = doc_id
+        self.paragraph_idx = paragraph_idx
+        self.starts = starts
+        self.ends = ends
+        self.language_ids = language_ids
+        # 記事ID -> 段落表の行の範囲（段落表は記事ごとに連続している）
+        self._rows = {}
+        if len(doc_id):
+            boundaries = np.flatnonzero(np.diff(doc_id)) + 1
+            row_starts = np.concatenate([[0], boundaries])
+            row_ends = np.concatenate([boundaries, [len(doc_id)]])
+            for first, last in zip(row_starts.tolist(), row_ends.tolist()):
+                self._rows[int(doc_id[first])] = (first, last)
+
+    @staticmethod
+    def _documents(frames):
+        # (記事ID, 本文, 言語) を重複なく列挙する（同じ記事IDは最初の行を使う）
+        seen = set()
+        for df, language in frames:
+            for article_id, text in zip(doc_ids(df).tolist(), df['content']):
+                if article_id in seen or not isinstance(text, str) or text == '':
+                    continue
+                seen.add(article_id)
+                yield article_id, text, language
+
+    @classmethod
+    def build(cls, frames):
+        """
+        記事データから段落表を作成する
+
+        Parameters:
+        frames (list): (記事のデータフレーム, 言語) のリスト
+
+        Returns:
+        ParagraphStore: 段落表
+        """
+        texts = {}
+        languages = {}
+        columns = ([], [], [], [], [])
+        for article_id, text, language in cls._documents(frames):
+            texts[article_id] = text
+            languages[article_id] = language
+            starts, ends = split_offsets(text)
+            columns[0].extend([article_id] * len(starts))
+            columns[1].extend(range(len(starts)))
+            columns[2].extend(starts)
+            columns[3].extend(ends)
+            columns[4].extend([LANGUAGE_IDS[language]] * len(starts))
+        return cls(
+            texts, languages,
+            np.array(columns[0], dtype=np.int64),
+            np.array(columns[1], dtype=np.int32),
+            np.array(columns[2], dtype=np.int32),
+            np.array(columns[3], dtype=np.int32),
+            np.array(columns[4], dtype=np.uint8)
+        )
+
+    @classmethod
+    def load_or_build(cls, frames, use_cache=True):
+        """
+        段落表をキャッシュから読み込む（なければ作成して保存する）
+
+        キャッシュのキーは全記事の記事IDと本文のハッシュ値から計算するため、
+        記事データが変わると作り直される。
+
+        Parameters:
+        frames (list): (記事のデータフレーム, 言語) のリスト
+        use_cache (bool): キャッシュを使うかどうか
+
+        Returns:
+        ParagraphStore: 段落表
+        """
+        documents = list(cls._documents(frames))
+        texts = {article_id: text for article_id, text, _ in documents}
+        languages = {article_id: language for article_id, _, language in documents}
+        key = content_hash('\n'.join(
+            f"{article_id}\t{language}\t{content_hash(text)}" for article_id, text, language in documents
+        ))
+        path = cache_path('paragraphs', f"v{PARAGRAPH_STORE_VERSION}", f"{key}.npz")
+
+        if use_cache and os.path.exists(path):
+            with np.load(path) as data:
+                return cls(
+                    texts, languages,
+                    data['doc_id'], data['paragraph_idx'], data['starts'], data['ends'], data['language_ids']
+                )
+
+        store = cls.build(frames)
+        if use_cache:
+            # 書きかけのファイルを読まないよう、一時ファイル経由で保存
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                np.savez(
+                    f,
+                    doc_id=store.doc_id, paragraph_idx=store.paragraph_idx,
+                    starts=store.starts, ends=store.ends, language_ids=store.language_ids
+                )
+            os.replace(tmp_path, path)
+        return store
+
+    def __len__(self):
+        return len(self.doc_id)
+
+    def __contains__(self, article_id):
+        return int(article_id) in self._rows
+
+    def language(self, article_id):
+        """
+        記事の言語を返す
+
+        Parameters:
+        article_id (int): 記事ID
+
+        Returns:
+        str: 'ja' または 'en'（記事がない場合はNone）
+        """
+        return self.languages.get(int(article_id))
+
+    def paragraphs(self, article_id):
+        """
+        記事の段落のリストを返す
+
+        Parameters:
+        article_id (int): 記事ID
+
+        Returns:
+        list: 段落のテキストのリスト（記事がない場合は空のリスト）
+        """
+        article_id = int(article_id)
+        if article_id not in self._rows:
+            return []
+        first, last = self._rows[article_id]
+        text = self.texts[article_id]
+        return [text[s:e] for s, e in zip(self.starts[first:last].tolist(), self.ends[first:last].tolist())]
+
+    def iter_paragraphs(self, language=None):
+        """
+        段落を記事・段落の順に列挙する
+
+        Parameters:
+        language (str): 指定した場合はその言語の記事の段落だけを返す
+
+        Returns:
+        generator: (記事ID, 段落番号, 段落のテキスト) のジェネレーター
+        """
+        rows = np.arange(len(self.doc_id))
+        if language is not None:
+            rows = rows[self.language_ids == LANGUAGE_IDS[language]]
+        for row in rows.tolist():
+            article_id = int(self.doc_id[row])
+            text = self.texts[article_id]
+            yield article_id, int(self.paragraph_idx[row]), text[self.starts[row]:self.ends[row]]
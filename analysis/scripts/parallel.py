@@ -0,0 +1,242 @@
+import os
+import sys
+import time
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+# forkで起動したワーカーが参照するタスク（関数と入力）。親プロセスで登録してから起動する
+_tasks = {}
+_task_ids = itertools.count()
+# これより入力が少なければプロセスを使わずに実行する（起動の時間の方が長くなるため）
+MIN_PARALLEL_ITEMS = 32
+# ワーカー数を指定しなかったときのワーカープロセス数の環境変数（pipeline.py がステージごとに設定する）
+WORKERS_ENV = "ANALYSIS_WORKERS"
+
+
+def default_workers():
+    """
+    ワーカー数を指定しなかったときのワーカープロセス数
+
+    環境変数 ANALYSIS_WORKERS があればその値、なければCPUのコア数を返す。
+
+    Returns:
+    int: ワーカープロセス数
+    """
+    value = os.environ.get(WORKERS_ENV)
+    if value:
+        return max(1, int(value))
+    return os.cpu_count() or 1
+
+
+def mp_context():
+    """
+    プロセスプールの起動方法を返す
+
+    分析スクリプトは __main__ ガードを持たないため、使える環境ではforkで起動する
+    （spawnだと子プロセスでスクリプト全体が再実行されてしまう）。
+
+    Returns:
+    multiprocessing.context.BaseContext: 起動方法のコンテキスト
+    """
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    return multiprocessing.get_context()
+
+
+def chunk_ranges(num_items, workers, chunksize=None):
+    """
+    入力を連続した範囲（チャンク）に分ける
+
+    Parameters:
+    num_items (int): 入力の数
+    workers (int): ワーカー数
+    chunksize (int): チャンクの大きさ（省略時はワーカーあたり約4チャンク）
+
+    Returns:
+    list: (開始, 終了) のリスト
+    """
+    chunksize = chunksize or max(1, -(-num_items // (workers * 4)))
+    return [(start, min(start + chunksize, num_items)) for start in range(0, num_items, chunksize)]
+
+
+def _run_task_chunk(task_id, start, stop):
+    # fork したワーカーは親プロセスで登録したタスクをそのまま参照する（入力を送らない）
+    function, items = _tasks[task_id]
+    return [function(item) for item in items[start:stop]]
+
+
+def _run_chunk(function, items):
+    return [function(item) for item in items]
+
+
+class WorkerPool:
+    """
+    初期化済みのワーカープロセスを使い回すプール
+
+    initializer はワーカーごとに1回だけ呼ばれるため、MeCab の Tagger や TextBlob のモデルなど
+    重い資源をワーカーのグローバル変数に用意しておける。map に渡す関数と入力は
+    pickle 可能である必要がある（1回だけの処理には parallel_map を使う）。
+
+    使用例:
+    with WorkerPool(workers=8, initializer=_init_worker, initargs=(tagger_args,)) as pool:
+        results = pool.map(analyze, texts)
+    """
+
+    def __init__(self, workers=None, initializer=None, initargs=(), chunksize=None):
+        """
+        Parameters:
+        workers (int): ワーカープロセス数
+        initializer (callable): ワーカーの起動時に呼ぶ関数
+        initargs (tuple): initializer の引数
+        chunksize (int): 1回にワーカーへ送る入力の数（省略時は入力数から決める）
+        """
+        self.workers = workers or default_workers()
+        self.initializer = initializer
+        self.initargs = initargs
+        self.chunksize = chunksize
+        self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=mp_context(),
+                initializer=self.initializer,
+                initargs=self.initargs
+            )
+        return self._executor
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def map(self, function, items, chunksize=None):
+        """
+        入力ごとに関数を並列に実行する
+
+        Parameters:
+        function (callable): 入力1件 -> 結果
+        items (list): 入力のリスト
+        chunksize (int): 1回にワーカーへ送る入力の数
+
+        Returns:
+        list: 結果のリスト（入力と同じ順序）
+        """
+        items = list(items)
+        executor = self._get_executor()
+        futures = [
+            executor.submit(_run_chunk, function, items[start:stop])
+            for start, stop in chunk_ranges(len(items), self.workers, chunksize or self.chunksize)
+        ]
+        results = []
+        for future in futures:
+            results.extend(future.result())
+        return results
+
+
+def parallel_map(function, items, workers=None, chunksize=None, initializer=None, initargs=(),
+                 min_items=MIN_PARALLEL_ITEMS):
+    """
+    入力ごとに関数をプロセスプールで実行し、入力と同じ順序で結果を返す
+
+    入力はチャンク単位でワーカーに割り当てる。forkが使える環境では、関数と入力を
+    子プロセスにコピーせずに共有する（スクリプト内で定義した関数やデコレーターで
+    包んだ関数もそのまま使える。その他の環境ではどちらもpickle可能である必要がある）。
+
+    Parameters:
+    function (callable): 入力1件 -> 結果
+    items (iterable): 入力
+    workers (int): ワーカープロセス数（1ならプロセスを使わずに実行。省略時は default_workers()）
+    chunksize (int): 1回にワーカーへ送る入力の数（省略時はワーカーあたり約4チャンク）
+    initializer (callable): ワーカーの起動時に1回だけ呼ぶ関数（MeCab の Tagger の作成など）
+    initargs (tuple): initializer の引数
+    min_items (int): これより入力が少なければプロセスを使わない
+
+    Returns:
+    list: 結果のリスト
+    """
+    items = list(items)
+    workers = min(workers or default_workers(), max(len(items), 1))
+    if workers == 1 or len(items) < min_items:
+        if initializer is not None:
+            initializer(*initargs)
+        return [function(item) for item in items]
+
+    context = mp_context()
+    if context.get_start_method() != 'fork':
+        with WorkerPool(workers, initializer, initargs, chunksize) as pool:
+            return pool.map(function, items)
+
+    task_id = next(_task_ids)
+    _tasks[task_id] = (function, items)
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                 initializer=initializer, initargs=initargs) as executor:
+            futures = [
+                executor.submit(_run_task_chunk, task_id, start, stop)
+                for start, stop in chunk_ranges(len(items), workers, chunksize)
+            ]
+            results = []
+            for future in futures:
+                results.extend(future.result())
+    finally:
+        del _tasks[task_id]
+    return results
+
+
+def benchmark(function, items, worker_counts=(1, 2, 4, 8, 16, 32), chunksize=None, initializer=None, initargs=()):
+    """
+    ワーカー数ごとのスループット（件/秒）を計測する（プロセスの起動時間を含む）
+
+    Parameters:
+    function (callable): 入力1件 -> 結果
+    items (list): 入力のリスト
+    worker_counts (tuple): 計測するワーカー数
+    chunksize (int): 1回にワーカーへ送る入力の数
+    initializer (callable): ワーカーの起動時に呼ぶ関数
+    initargs (tuple): initializer の引数
+
+    Returns:
+    list: ワーカー数、処理時間、スループットの辞書のリスト
+    """
+    rows = []
+    for workers in worker_counts:
+        start = time.perf_counter()
+        parallel_map(function, items, workers=workers, chunksize=chunksize,
+                     initializer=initializer, initargs=initargs, min_items=0)
+        elapsed = time.perf_counter() - start
+        rows.append({'workers': workers, 'seconds': elapsed, 'items_per_sec': len(items) / elapsed})
+        print(f"ワーカー数 {workers:>2}: {elapsed:.2f}秒, {len(items) / elapsed:.1f} 件/秒")
+    return rows
+
+
+if __name__ == "__main__":
+    # 使い方: python parallel.py [CSVファイル] [文書数]
+    # 英語記事の構造と読みやすさの分析（記事ごとの関数）で、ワーカー数ごとのスループットを計測する
+    import pandas as pd
+    from corpus import latest_data_file
+    from readability import analyze_readability
+    from structure_scanner import scan_structure
+
+    file_path = sys.argv[1] if len(sys.argv) > 1 else latest_data_file('en')
+    num_docs = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+
+    contents = [c for c in pd.read_csv(file_path)['content'] if isinstance(c, str) and c != '']
+    # 計測用に記事を繰り返して文書数を揃える
+    texts = [contents[i % len(contents)] for i in range(num_docs)]
+
+    def analyze_article(text):
+        return scan_structure(text, language='en'), analyze_readability(text)
+
+    max_workers = os.cpu_count() or 1
+    worker_counts = [w for w in (1, 2, 4, 8, 16, 32) if w <= max_workers]
+    print(f"{len(texts)}文書の記事ごとの分析のスループット（CPU {max_workers}コア）:")
+    benchmark(analyze_article, texts, worker_counts)
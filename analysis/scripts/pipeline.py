@@ -0,0 +1,439 @@
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from corpus import cache_path, latest_data_file
+from parallel import WORKERS_ENV
+
+# 成果物のパスの基準（analysis/）
+ANALYSIS_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+SCRIPTS_DIR = os.path.join(ANALYSIS_DIR, "scripts")
+# 前回実行したときの入力のハッシュ値と、ファイルのハッシュ値の記録
+STATE_FILE = cache_path("pipeline", "state.json")
+# ステージごとの実行ログ（analysis/cache/pipeline/logs/<ステージ>.log）
+LOG_DIR = os.path.join(os.path.dirname(STATE_FILE), "logs")
+# ファイルを読み込む単位
+HASH_BLOCK_SIZE = 1 << 20
+
+
+class Stage:
+    """
+    パイプラインの1つのステージ（スクリプト1本または関数1つ）
+
+    成果物は 'data:jp'、'data:en'、'data:all'（取得日時が最新のデータファイル）か、
+    analysis/ からの相対パス（ファイルまたはフォルダ）で指定する。
+    あるステージの入力が別のステージの出力に含まれていれば、そのステージの後に実行する。
+    refresh=True のステージ（データの取得など、入力がないもの）は、出力がない場合か
+    更新を指定した場合（--refresh）にだけ実行する。
+    """
+
+    def __init__(self, name, script=None, inputs=(), outputs=(), args=(), cwd=SCRIPTS_DIR, function=None,
+                 refresh=False):
+        """
+        Parameters:
+        name (str): ステージ名
+        script (str): 実行するスクリプト（cwd からの相対パス）
+        inputs (iterable): 入力の成果物
+        outputs (iterable): 出力の成果物
+        args (iterable): スクリプトの引数
+        cwd (str): スクリプトを実行するフォルダ
+        function (callable): スクリプトの代わりに実行する関数（入力と出力のパスのリストを受け取る）
+        refresh (bool): 更新を指定したときだけ実行するステージかどうか
+        """
+        self.name = name
+        self.script = script
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.args = list(args)
+        self.cwd = cwd
+        self.function = function
+        self.refresh = refresh
+
+    def __repr__(self):
+        return f"Stage({self.name!r})"
+
+
+def resolve_artifact(artifact):
+    """
+    成果物のパスを返す
+
+    Parameters:
+    artifact (str): 成果物（'data:<種類>' または analysis/ からの相対パス）
+
+    Returns:
+    str: 絶対パス（存在しない場合はNone）
+    """
+    if artifact.startswith('data:'):
+        try:
+            return latest_data_file(artifact[len('data:'):])
+        except FileNotFoundError:
+            return None
+    path = os.path.join(ANALYSIS_DIR, artifact)
+    return path if os.path.exists(path) else None
+
+
+def dashboard_export(input_paths, output_paths):
+    """
+    グラフの画像をダッシュボード（dashboard/public/charts/）に集め、一覧（charts.json）を書き出す
+
+    Parameters:
+    input_paths (list): グラフの画像のパス
+    output_paths (list): 出力のパス（最初の要素がダッシュボードのフォルダ）
+    """
+    directory = output_paths[0]
+    tmp_directory = f"{directory}.{os.getpid()}.tmp"
+    os.makedirs(tmp_directory, exist_ok=True)
+    manifest = []
+    for path in input_paths:
+        if path is None:
+            continue
+        shutil.copy2(path, os.path.join(tmp_directory, os.path.basename(path)))
+        manifest.append({'file': os.path.basename(path), 'source': os.path.relpath(path, ANALYSIS_DIR)})
+    with open(os.path.join(tmp_directory, 'charts.json'), 'w', encoding='utf-8') as f:
+        json.dump({'created_at': time.time(), 'charts': manifest}, f, ensure_ascii=False, indent=2)
+    if os.path.isdir(directory):
+        shutil.rmtree(directory)
+    os.replace(tmp_directory, directory)
+
+
+def _charts(script_dir, *names):
+    return [f"{script_dir}/{name}" for name in names]
+
+
+# 分析パイプラインのステージ
+# （言語の判定などのクリーニングは、データを読み込む各スクリプトの中で行っている）
+STAGES = [
+    Stage('scrape', 'data/improved_scraper.py', outputs=['data:en', 'data:jp', 'data:all'], cwd=ANALYSIS_DIR,
+          refresh=True),
+    Stage('tokenize', 'jp_tokenizer_pool.py', args=['--warm'], inputs=['data:jp'], outputs=['cache/jp_tokens']),
+    Stage('features_jp', 'jp_data_analysis.py',
+          inputs=['data:jp', 'data:en', 'cache/jp_tokens'],
+          outputs=['cache/features/sentiment', 'cache/features/structure', 'cache/features/readability']
+          + _charts('scripts', 'jp_content_structure.png', 'jp_sentiment_solution_analysis.png')),
+    Stage('features_en_sentiment', 'text sentiment analysis.py', inputs=['data:en'],
+          outputs=_charts('scripts', 'sentiment_solution_analysis.png')),
+    Stage('features_en_structure', 'content structure and readability analysis.py', inputs=['data:en'],
+          outputs=_charts('scripts', 'content_structure.png', 'readability_structure_relationship.png')),
+    Stage('topics', 'topic_analysis.py', inputs=['data:all'],
+          outputs=_charts('scripts', 'en_topics_analysis.png', 'ja_topics_analysis.png')),
+    Stage('topics_en_text', 'remote-work-text-analysis.pyyY', inputs=['data:en'],
+          outputs=_charts('scripts', 'remote_work_wordcloud.png', 'topic_distribution.png')),
+    Stage('topics_job_search', 'remote job search success.py',
+          inputs=['data:jp', 'data:en', 'cache/features/sentiment', 'cache/features/structure'],
+          outputs=_charts('scripts', 'industry_remote_scores.png', 'remote_career_ranking.png', 'remote_work_skills.png',
+                          'skill_network.png', 'topic_importance.png', 'topic_wordclouds.png')),
+    Stage('clusters', 'productivity analysis.py',
+          inputs=['data:jp', 'data:en', 'cache/features/sentiment', 'cache/features/structure',
+                  'cache/features/readability'],
+          outputs=['cache/clusters/productivity_articles']
+          + _charts('scripts', 'cluster_analysis.png', 'productivity_factors.png')),
+    Stage('charts_overview', 'remote-work-analysis.py', inputs=['data:all'],
+          outputs=_charts('scripts', 'content_length_distribution.png', 'language_distribution_hatched.png',
+                          'title_top_words_hatched.png')),
+    Stage('charts_language', 'language_comparison.py', inputs=['data:all'],
+          outputs=_charts('scripts', 'language_wordcount_comparison.png', 'language_keyword_comparison.png')),
+    Stage('charts_categories', 'remote-work-optimization-insights.pyy', inputs=['data:all'],
+          outputs=_charts('scripts', 'category_mentions.png', 'language_category_trends.png')),
+    Stage('charts_en', 'en_data_analysis.py', inputs=['data:en'],
+          outputs=_charts('scripts', 'en_content_length_distribution.png', 'en_word_count_distribution.png',
+                          'en_title_top_words.png')),
+    Stage('charts_jp', 'japanese-text-analysis.py', inputs=['data:jp'],
+          outputs=_charts('data', 'jp_article_categories.png'), cwd=os.path.join(ANALYSIS_DIR, "data")),
+    Stage('charts_wordcloud', 'wordcloud_fix.py', inputs=['data:jp', 'data:en'],
+          outputs=_charts('scripts', 'topic_wordclouds_fixed.png')),
+]
+# ダッシュボード（React アプリの public/ フォルダ）に全ステージのグラフを集める
+STAGES.append(Stage(
+    'dashboard', inputs=[a for stage in STAGES for a in stage.outputs if a.endswith('.png')],
+    outputs=['../dashboard/public/charts'], function=dashboard_export
+))
+
+
+class Pipeline:
+    """
+    ステージの入力と出力から依存関係を求め、独立したステージを並列に実行するランナー
+
+    入力の内容（ファイルのハッシュ値）とスクリプトが前回の実行から変わっておらず、
+    出力がすべてあるステージは実行しない。全体の実行時間は依存関係の最長経路の時間になる。
+    """
+
+    def __init__(self, stages=STAGES, state_file=STATE_FILE, workers=None):
+        """
+        Parameters:
+        stages (list): ステージのリスト
+        state_file (str): 前回の実行の記録
+        workers (int): 同時に実行するステージ数
+        """
+        self.stages = {stage.name: stage for stage in stages}
+        self.state_file = state_file
+        self.workers = workers or os.cpu_count() or 1
+        # 各ステージもプロセスプールを使うため、CPUのコア数を同時に実行するステージで分け合う
+        self.stage_analysis_workers = max(1, (os.cpu_count() or 1) // self.workers)
+        self.producers = {}
+        for stage in stages:
+            for artifact in stage.outputs:
+                if artifact in self.producers:
+                    raise ValueError(f"成果物 {artifact} を出力するステージが複数あります: "
+                                     f"{self.producers[artifact]}, {stage.name}")
+                self.producers[artifact] = stage.name
+        self.dependencies = {
+            stage.name: sorted({self.producers[a] for a in stage.inputs if a in self.producers} - {stage.name})
+            for stage in stages
+        }
+        self.order = self._topological_order()
+        self.state = self._load_state()
+
+    def _topological_order(self):
+        order = []
+        visiting = set()
+        done = set()
+
+        def visit(name, path):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"ステージの依存関係が循環しています: {' -> '.join(path + [name])}")
+            visiting.add(name)
+            for dependency in self.dependencies[name]:
+                visit(dependency, path + [name])
+            visiting.discard(name)
+            done.add(name)
+            order.append(name)
+
+        for name in self.stages:
+            visit(name, [])
+        return order
+
+    def _load_state(self):
+        if os.path.exists(self.state_file):
+            with open(self.state_file, encoding='utf-8') as f:
+                return json.load(f)
+        return {'stages': {}, 'files': {}}
+
+    def _save_state(self):
+        tmp_path = f"{self.state_file}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.state_file)
+
+    def upstream(self, targets):
+        """
+        指定したステージと、その上流のステージ名を実行順に返す
+
+        Parameters:
+        targets (list): ステージ名
+
+        Returns:
+        list: ステージ名のリスト
+        """
+        needed = set()
+        stack = list(targets)
+        while stack:
+            name = stack.pop()
+            if name not in self.stages:
+                raise KeyError(f"ステージがありません: {name}")
+            if name not in needed:
+                needed.add(name)
+                stack.extend(self.dependencies[name])
+        return [name for name in self.order if name in needed]
+
+    def file_hash(self, path):
+        """
+        ファイルの内容のハッシュ値（サイズと更新時刻が前回と同じなら記録した値を使う）
+
+        Parameters:
+        path (str): ファイルのパス
+
+        Returns:
+        str: SHA-1の16進ダイジェスト
+        """
+        stat = os.stat(path)
+        signature = [stat.st_size, stat.st_mtime_ns]
+        saved = self.state['files'].get(path)
+        if saved is not None and saved[:2] == signature:
+            return saved[2]
+        digest = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+                digest.update(block)
+        self.state['files'][path] = signature + [digest.hexdigest()]
+        return digest.hexdigest()
+
+    def artifact_hash(self, artifact):
+        """
+        成果物の内容のハッシュ値（フォルダは中のファイルの相対パスと内容から計算する）
+
+        Parameters:
+        artifact (str): 成果物
+
+        Returns:
+        str: ハッシュ値（存在しない場合はNone）
+        """
+        path = resolve_artifact(artifact)
+        if path is None:
+            return None
+        if os.path.isfile(path):
+            return f"{os.path.basename(path)}:{self.file_hash(path)}"
+        digest = hashlib.sha1()
+        for root, directories, files in os.walk(path):
+            directories.sort()
+            for name in sorted(files):
+                if name.endswith('.tmp'):
+                    continue
+                file_path = os.path.join(root, name)
+                digest.update(os.path.relpath(file_path, path).encode('utf-8'))
+                digest.update(self.file_hash(file_path).encode('ascii'))
+        return digest.hexdigest()
+
+    def stage_key(self, stage):
+        """
+        ステージのスクリプト・引数・入力の内容から、実行が必要かを判定するキーを計算する
+
+        Parameters:
+        stage (Stage): ステージ
+
+        Returns:
+        str: キー
+        """
+        digest = hashlib.sha1()
+        if stage.script is not None:
+            digest.update(self.file_hash(os.path.join(stage.cwd, stage.script)).encode('ascii'))
+        digest.update(json.dumps(stage.args).encode('utf-8'))
+        for artifact in stage.inputs:
+            digest.update(f"{artifact}={self.artifact_hash(artifact)}\n".encode('utf-8'))
+        return digest.hexdigest()
+
+    def is_fresh(self, stage, refresh=False):
+        """
+        入力とスクリプトが前回の実行から変わっておらず、出力がすべてあるかどうか
+
+        Parameters:
+        stage (Stage): ステージ
+        refresh (bool): 更新を指定したかどうか（refresh=True のステージは実行が必要になる）
+
+        Returns:
+        bool: 実行しなくてよいかどうか
+        """
+        if any(resolve_artifact(artifact) is None for artifact in stage.outputs):
+            return False
+        if stage.refresh:
+            # 入力がないため、前回の実行からの変化では判定できない
+            return not refresh
+        return self.state['stages'].get(stage.name) == self.stage_key(stage)
+
+    def _run_stage(self, stage):
+        # ステージを1つ実行し、(成功したか, 秒数) を返す
+        start = time.perf_counter()
+        if stage.function is not None:
+            stage.function([resolve_artifact(a) for a in stage.inputs],
+                           [os.path.join(ANALYSIS_DIR, a) for a in stage.outputs])
+            return True, time.perf_counter() - start
+        os.makedirs(LOG_DIR, exist_ok=True)
+        env = dict(os.environ)
+        env.setdefault(WORKERS_ENV, str(self.stage_analysis_workers))
+        with open(os.path.join(LOG_DIR, f"{stage.name}.log"), 'w', encoding='utf-8') as log:
+            completed = subprocess.run(
+                [sys.executable, stage.script] + stage.args,
+                cwd=stage.cwd, stdout=log, stderr=subprocess.STDOUT, env=env
+            )
+        return completed.returncode == 0, time.perf_counter() - start
+
+    def run(self, targets=None, force=False, dry_run=False, refresh=False):
+        """
+        ステージを依存関係の順に実行する（依存関係のないステージは並列に実行する）
+
+        Parameters:
+        targets (list): 実行するステージ名（上流のステージも含める。省略時はすべて）
+        force (bool): 入力が変わっていなくても実行するかどうか（refresh=True のステージには影響しない）
+        dry_run (bool): 実行せずに、実行するかどうかだけを表示するかどうか
+        refresh (bool): データの取得など refresh=True のステージも実行するかどうか
+
+        Returns:
+        dict: ステージ名 -> 'ran'、'skipped'、'failed'、'blocked'（上流が失敗）
+        """
+        names = self.upstream(targets) if targets else list(self.order)
+        status = {}
+        if dry_run:
+            for name in names:
+                stage = self.stages[name]
+                fresh = (not force or stage.refresh) \
+                    and all(status[d] == 'skipped' for d in self.dependencies[name] if d in status) \
+                    and self.is_fresh(stage, refresh)
+                status[name] = 'skipped' if fresh else 'ran'
+                print(f"{name:<24} {'スキップ（入力に変更なし）' if fresh else '実行'}")
+            return status
+
+        remaining = list(names)
+        running = {}
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while remaining or running:
+                # 上流がすべて終わったステージを開始する
+                for name in list(remaining):
+                    dependencies = [d for d in self.dependencies[name] if d in names]
+                    if any(status.get(d) in ('failed', 'blocked') for d in dependencies):
+                        status[name] = 'blocked'
+                        remaining.remove(name)
+                        print(f"[{name}] 上流のステージが失敗したため実行しません")
+                    elif all(d in status for d in dependencies):
+                        remaining.remove(name)
+                        stage = self.stages[name]
+                        if (not force or stage.refresh) and self.is_fresh(stage, refresh):
+                            status[name] = 'skipped'
+                            print(f"[{name}] スキップ（入力に変更なし）")
+                        else:
+                            print(f"[{name}] 開始")
+                            running[executor.submit(self._run_stage, stage)] = name
+                if not running:
+                    continue
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    try:
+                        ok, seconds = future.result()
+                    except Exception as e:
+                        ok, seconds = False, 0.0
+                        print(f"[{name}] エラー: {e}")
+                    if ok:
+                        status[name] = 'ran'
+                        # 出力を作った後の入力の内容を記録する（次回、変わっていなければスキップ）
+                        self.state['stages'][name] = self.stage_key(self.stages[name])
+                        self._save_state()
+                        print(f"[{name}] 完了: {seconds:.1f}秒")
+                    else:
+                        status[name] = 'failed'
+                        self.state['stages'].pop(name, None)
+                        self._save_state()
+                        print(f"[{name}] 失敗: {seconds:.1f}秒（ログ: {os.path.join(LOG_DIR, name + '.log')}）")
+        self._save_state()
+        print(f"合計: {time.perf_counter() - start:.1f}秒")
+        return status
+
+
+if __name__ == "__main__":
+    # 使い方: python pipeline.py [ステージ名 ...] [--refresh] [--force] [--dry-run] [--workers N] [--list]
+    # 指定したステージ（省略時はすべて）と上流のステージを、入力が変わったものだけ実行する
+    # --refresh を指定するとデータを取得し直す（指定しなければ、データがない場合だけ取得する）
+    args = sys.argv[1:]
+    refresh = '--refresh' in args
+    force = '--force' in args
+    dry_run = '--dry-run' in args
+    workers = None
+    if '--workers' in args:
+        workers = int(args[args.index('--workers') + 1])
+        del args[args.index('--workers'):args.index('--workers') + 2]
+    targets = [a for a in args if not a.startswith('--')]
+
+    pipeline = Pipeline(workers=workers)
+    if '--list' in args:
+        for name in pipeline.order:
+            dependencies = ', '.join(pipeline.dependencies[name]) or '-'
+            print(f"{name:<24} 依存: {dependencies}")
+        sys.exit(0)
+    status = pipeline.run(targets or None, force=force, dry_run=dry_run, refresh=refresh)
+    sys.exit(1 if any(s in ('failed', 'blocked') for s in status.values()) else 0)
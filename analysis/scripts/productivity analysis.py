@@ -7,32 +7,49 @@ import re
 from collections import Counter
 from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
 from sklearn.decomposition import LatentDirichletAllocation
-from sklearn.cluster import KMeans
-from sklearn.preprocessing import StandardScaler
 from scipy.stats import pearsonr
 
+from corpus import doc_ids, latest_data_file
+from feature_store import FeatureStore
+from kwic import KWICIndex
+from paragraph_store import ParagraphStore
+from clustering import merge_article_features, assign_clusters, evaluate_k
+from parallel import parallel_map
+
 # フォント設定
 plt.rcParams['font.family'] = 'Hiragino Sans'
 
+# 記事ごとの抽出に使うワーカープロセス数（Noneなら環境変数 ANALYSIS_WORKERS または全コア、1ならプロセスを使わない）
+analysis_workers = None
+
 # データ読み込み
-data_folder = os.path.join("..", "data")
-jp_file_path = os.path.join(data_folder, "remote_work_data_jp_20250329_165210.csv")
-en_file_path = os.path.join(data_folder, "remote_work_data_en_20250329_165210.csv")
+jp_file_path = latest_data_file('jp')
+en_file_path = latest_data_file('en')
 
 df_jp = pd.read_csv(jp_file_path)
 df_en = pd.read_csv(en_file_path)
-
-# 感情分析データの読み込み
-jp_sentiment_df = pd.read_csv("jp_sentiment_analysis.csv")
-en_sentiment_df = pd.read_csv("en_sentiment_analysis.csv") if os.path.exists("en_sentiment_analysis.csv") else None
-
-# 構造分析データの読み込み
-jp_structure_df = pd.read_csv("jp_structure_analysis.csv")
-en_structure_df = pd.read_csv("en_structure_analysis.csv") if os.path.exists("en_structure_analysis.csv") else None
-
-# 読みやすさデータの読み込み
-jp_readability_df = pd.read_csv("jp_readability_analysis.csv")
-en_readability_df = pd.read_csv("en_readability_analysis.csv") if os.path.exists("en_readability_analysis.csv") else None
+df_jp['doc_id'] = doc_ids(df_jp)
+df_en['doc_id'] = doc_ids(df_en)
+
+# 段落表（段落の分割は1度だけ行い、キャッシュに保存する）
+paragraph_store = ParagraphStore.load_or_build([(df_jp, 'ja'), (df_en, 'en')])
+
+# 特徴量ストアから、使う列だけを読み込む（日本語・英語の記事をまとめて保存している）
+feature_store = FeatureStore()
+sentiment_features_df = feature_store.read(
+    'sentiment', ['title', 'polarity', 'subjectivity', 'solution_score', 'language']
+)
+structure_features_df = feature_store.read('structure', ['headings', 'paragraphs', 'lists', 'avg_paragraph_length'])
+readability_features_df = feature_store.read('readability', ['avg_sentence_length', 'character_per_sentence'])
+
+# 本文が変わった記事や特徴量のない記事を確認する（その記事は前回の特徴量のまま、または除外して分析する）
+stored_languages = set(sentiment_features_df['language'])
+for group in ('sentiment', 'structure', 'readability'):
+    for language, source_df in [('jp', df_jp), ('en', df_en)]:
+        if language in stored_languages:
+            stale_ids = feature_store.stale(group, source_df)
+            if len(stale_ids):
+                print(f"特徴量ストアの '{group}' が最新ではない記事（{language}）: {len(stale_ids)}件")
 
 # 分析1: リモートワークの生産性向上要因の抽出
 print("分析1: リモートワークの生産性向上要因の抽出")
@@ -49,39 +66,41 @@ productivity_keywords_en = [
     "focus", "success", "benefit", "improvement", "optimize", "time management"
 ]
 
+# 生産性向上に関する言及を含む段落を抽出する関数（記事ごとに複数プロセスで実行する）
+def jp_productivity_paragraphs(article_id):
+    paragraphs = []
+    for paragraph in paragraph_store.paragraphs(article_id):
+        if any(keyword in paragraph for keyword in productivity_keywords_jp):
+            # 追加の条件: ポジティブなコンテキストであること
+            if "向上" in paragraph or "効果" in paragraph or "改善" in paragraph or "成功" in paragraph:
+                paragraphs.append(paragraph)
+    return paragraphs
+
+def en_productivity_paragraphs(article_id):
+    paragraphs = []
+    for paragraph in paragraph_store.paragraphs(article_id):
+        paragraph_lower = paragraph.lower()
+        if any(keyword in paragraph_lower for keyword in productivity_keywords_en):
+            # 追加の条件: ポジティブなコンテキストであること
+            if "improve" in paragraph_lower or "benefit" in paragraph_lower or "success" in paragraph_lower:
+                paragraphs.append(paragraph)
+    return paragraphs
+
+def extract_productivity_mentions(df, extract_paragraphs, source):
+    articles = df[df['content'].apply(lambda c: isinstance(c, str) and c != '')]
+    # 結果は記事と同じ順に返るため、言及の並びは記事順のままになる
+    paragraph_lists = parallel_map(extract_paragraphs, articles['doc_id'].tolist(), workers=analysis_workers)
+    return [
+        {'doc_id': article_id, 'title': title, 'paragraph': paragraph, 'source': source}
+        for article_id, title, paragraphs in zip(articles['doc_id'], articles['title'], paragraph_lists)
+        for paragraph in paragraphs
+    ]
+
 # 日本語記事から生産性向上要因を抽出
-jp_productivity_mentions = []
-
-for i, row in df_jp.iterrows():
-    if isinstance(row['content'], str) and row['content'] != '':
-        # 生産性向上に関する言及を含む段落を抽出
-        paragraphs = re.split(r'\n\s*\n', row['content'])
-        for paragraph in paragraphs:
-            if any(keyword in paragraph for keyword in productivity_keywords_jp):
-                # 追加の条件: ポジティブなコンテキストであること
-                if "向上" in paragraph or "効果" in paragraph or "改善" in paragraph or "成功" in paragraph:
-                    jp_productivity_mentions.append({
-                        'title': row['title'],
-                        'paragraph': paragraph,
-                        'source': 'jp'
-                    })
+jp_productivity_mentions = extract_productivity_mentions(df_jp, jp_productivity_paragraphs, 'jp')
 
 # 英語記事から生産性向上要因を抽出
-en_productivity_mentions = []
-
-for i, row in df_en.iterrows():
-    if isinstance(row['content'], str) and row['content'] != '':
-        # 生産性向上に関する言及を含む段落を抽出
-        paragraphs = re.split(r'\n\s*\n', row['content'])
-        for paragraph in paragraphs:
-            if any(keyword in paragraph.lower() for keyword in productivity_keywords_en):
-                # 追加の条件: ポジティブなコンテキストであること
-                if "improve" in paragraph.lower() or "benefit" in paragraph.lower() or "success" in paragraph.lower():
-                    en_productivity_mentions.append({
-                        'title': row['title'],
-                        'paragraph': paragraph,
-                        'source': 'en'
-                    })
+en_productivity_mentions = extract_productivity_mentions(df_en, en_productivity_paragraphs, 'en')
 
 # すべての生産性向上言及を結合
 all_productivity_mentions = jp_productivity_mentions + en_productivity_mentions
@@ -98,21 +117,27 @@ productivity_factors = [
 ]
 
 # 生産性向上要因ごとの言及数をカウント
-factor_counts = {factor['category']: 0 for factor in productivity_factors}
-factor_contexts = {factor['category']: [] for factor in productivity_factors}
-
-for mention in all_productivity_mentions:
-    paragraph_lower = mention['paragraph'].lower()
-    for factor in productivity_factors:
-        if any(keyword.lower() in paragraph_lower for keyword in factor['keywords']):
-            factor_counts[factor['category']] += 1
-            # コンテキストの一部を保存（最初の100文字）
-            short_context = mention['paragraph'][:100] + "..." if len(mention['paragraph']) > 100 else mention['paragraph']
-            factor_contexts[factor['category']].append({
-                'title': mention['title'],
-                'context': short_context,
-                'source': mention['source']
-            })
+# 各段落は1回だけ小文字化し、要因のキーワードを含む段落をインデックスから取り出す
+factor_kwic = KWICIndex(
+    [mention['paragraph'] for mention in all_productivity_mentions],
+    categories={factor['category']: factor['keywords'] for factor in productivity_factors}
+)
+factor_counts = {}
+factor_contexts = {}
+
+for factor in productivity_factors:
+    mention_ids = factor_kwic.documents(factor['category']).tolist()
+    factor_counts[factor['category']] = len(mention_ids)
+    factor_contexts[factor['category']] = []
+    for mention_id in mention_ids:
+        mention = all_productivity_mentions[mention_id]
+        # コンテキストの一部を保存（最初の100文字）
+        short_context = mention['paragraph'][:100] + "..." if len(mention['paragraph']) > 100 else mention['paragraph']
+        factor_contexts[factor['category']].append({
+            'title': mention['title'],
+            'context': short_context,
+            'source': mention['source']
+        })
 
 # 生産性向上要因の可視化
 plt.figure(figsize=(12, 8))
@@ -150,26 +175,31 @@ print("\n\n分析2: リモートワーク記事の類型化（クラスター分
 print("="*80)
 
 # 日本語と英語の感情分析・構造データを結合
-jp_sentiment_df['language'] = 'jp'
-if en_sentiment_df is not None:
-    en_sentiment_df['language'] = 'en'
-    combined_df = pd.concat([jp_sentiment_df, en_sentiment_df], ignore_index=True)
-else:
-    combined_df = jp_sentiment_df.copy()
+combined_df = sentiment_features_df.copy()
 
 # クラスタリングのための特徴量を選択
+# 感情の特徴量に、記事IDで構造・読みやすさの数値を結合し、本文のLSA成分も加える
 features = ['polarity', 'subjectivity', 'solution_score']
-X = combined_df[features].values
-
-# 特徴量の標準化
-scaler = StandardScaler()
-X_scaled = scaler.fit_transform(X)
-
-# K-meansクラスタリング（クラスター数=4と仮定）
-kmeans = KMeans(n_clusters=4, random_state=42)
-clusters = kmeans.fit_predict(X_scaled)
+combined_df = merge_article_features(combined_df, [structure_features_df, readability_features_df])
+cluster_features = features + [
+    column for column in combined_df.select_dtypes(include='number').columns
+    if column not in features and column not in ('doc_id', 'cluster')
+]
+content_by_id = dict(zip(pd.concat([df_jp['doc_id'], df_en['doc_id']]), pd.concat([df_jp['content'], df_en['content']])))
+cluster_texts = [content_by_id.get(article_id, '') for article_id in combined_df['doc_id']]
+
+# MiniBatchKMeansクラスタリング（クラスター数=4と仮定）
+# 割り当ては記事IDごとに保存し、次回以降は新しい記事だけを割り当てる（既存の記事のクラスターは変わらない）
+clusters, article_clusterer = assign_clusters(
+    'productivity_articles', combined_df['doc_id'], combined_df[cluster_features], cluster_texts, n_clusters=4
+)
 combined_df['cluster'] = clusters
 
+# 参考: クラスター数ごとのシルエット係数（並列に計算、記事数が多い場合は標本で計算）
+k_scores = evaluate_k(article_clusterer.transform(combined_df[cluster_features], cluster_texts), range(2, 9))
+print("クラスター数ごとの評価:")
+print(k_scores)
+
 # クラスターの特徴を分析
 cluster_profiles = combined_df.groupby('cluster')[features].mean()
 print("クラスター分析結果:")
@@ -259,34 +289,23 @@ positive_insights = []
 # 解決志向型クラスター（クラスター1）の記事から洞察を抽出
 solution_focused_articles = combined_df[combined_df['cluster'] == 1]
 for _, row in solution_focused_articles.iterrows():
-    article_index = df_jp[df_jp['title'] == row['title']].index
-    if len(article_index) > 0:
-        content = df_jp.loc[article_index[0], 'content']
-        if isinstance(content, str):
-            # 生産性向上に関する言及を抽出
-            paragraphs = re.split(r'\n\s*\n', content)
-            for paragraph in paragraphs:
-                if any(keyword in paragraph for keyword in productivity_keywords_jp) and len(paragraph) > 100:
-                    positive_insights.append({
-                        'source': row['title'],
-                        'insight': paragraph[:300] + "..." if len(paragraph) > 300 else paragraph,
-                        'score': row['polarity'] + row['solution_score']  # ポジティブさとソリューション指向度の合計
-                    })
-    
-    # 英語記事も同様に処理
-    article_index = df_en[df_en['title'] == row['title']].index
-    if len(article_index) > 0:
-        content = df_en.loc[article_index[0], 'content']
-        if isinstance(content, str):
-            # 生産性向上に関する言及を抽出
-            paragraphs = re.split(r'\n\s*\n', content)
-            for paragraph in paragraphs:
-                if any(keyword in paragraph.lower() for keyword in productivity_keywords_en) and len(paragraph) > 100:
-                    positive_insights.append({
-                        'source': row['title'],
-                        'insight': paragraph[:300] + "..." if len(paragraph) > 300 else paragraph,
-                        'score': row['polarity'] + row['solution_score']
-                    })
+    # 記事IDで段落表から元の記事を引く（タイトルが重複していても正しい記事を参照する）
+    language = paragraph_store.language(row['doc_id'])
+    for paragraph in paragraph_store.paragraphs(row['doc_id']):
+        if len(paragraph) <= 100:
+            continue
+        # 生産性向上に関する言及を抽出
+        if language == 'ja':
+            is_productivity = any(keyword in paragraph for keyword in productivity_keywords_jp)
+        else:
+            is_productivity = any(keyword in paragraph.lower() for keyword in productivity_keywords_en)
+        if is_productivity:
+            positive_insights.append({
+                'doc_id': row['doc_id'],
+                'source': row['title'],
+                'insight': paragraph[:300] + "..." if len(paragraph) > 300 else paragraph,
+                'score': row['polarity'] + row['solution_score']  # ポジティブさとソリューション指向度の合計
+            })
 
 # スコアでソートして上位の洞察を表示
 positive_insights.sort(key=lambda x: x['score'], reverse=True)
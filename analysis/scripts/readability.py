@@ -0,0 +1,143 @@
+import re
+import sys
+import time
+from functools import lru_cache
+import numpy as np
+
+from sentence_segmenter import segment
+
+# 音節数キャッシュの上限（単語の出現頻度はZipf則に従うため、大半の単語はキャッシュに当たる）
+SYLLABLE_CACHE_SIZE = 2 ** 18
+
+VOWELS = "aeiouy"
+
+
+# 英単語の音節数を推定する関数（簡易版）
+# 同じ単語の計算結果はLRUキャッシュで再利用する
+@lru_cache(maxsize=SYLLABLE_CACHE_SIZE)
+def count_syllables(word):
+    word = word.lower()
+    if len(word) <= 3:
+        return 1
+
+    # 母音をカウント
+    count = 0
+    prev_is_vowel = False
+
+    for char in word:
+        is_vowel = char in VOWELS
+        if is_vowel and not prev_is_vowel:
+            count += 1
+        prev_is_vowel = is_vowel
+
+    # 特定のパターンで調整
+    if word.endswith('e'):
+        count -= 1
+    if word.endswith('le') and len(word) > 2 and word[-3] not in VOWELS:
+        count += 1
+    if count == 0:
+        count = 1
+
+    return count
+
+
+def _document_counts(text):
+    # 1文書分の文数・文ごとの単語数の合計・単語数・音節数を求める
+    # 文の分割は共通の文分割モジュールの結果（文書ごとにキャッシュ）を使う
+    starts, ends = segment(text, 'en')
+    sentence_word_total = sum(len(text[s:e].split()) for s, e in zip(starts.tolist(), ends.tolist()))
+    # 単語分割は1回だけ行い、単語数と音節数の両方に使う
+    words = text.split()
+    syllable_count = sum(map(count_syllables, words))
+    return len(starts), sentence_word_total, len(words), syllable_count
+
+
+def analyze_readability_batch(texts):
+    """
+    複数文書のFlesch Reading EaseとFlesch-Kincaid Gradeをまとめて計算する
+
+    文書ごとの集計値を配列にまとめ、式の計算はNumPyで一括して行う。
+    結果は analyze_readability を1文書ずつ実行した場合と一致する。
+
+    Parameters:
+    texts (list): 英語テキストのリスト
+
+    Returns:
+    list: 文書ごとの {'flesch_reading_ease', 'flesch_kincaid_grade', 'avg_sentence_length'}
+    """
+    counts = np.zeros((len(texts), 4), dtype=np.int64)
+    for i, text in enumerate(texts):
+        if isinstance(text, str) and text != '':
+            counts[i] = _document_counts(text)
+    sentence_count, sentence_word_total, word_count, syllable_count = counts.T
+
+    valid = (sentence_count > 0) & (word_count > 0)
+    safe_sentences = np.where(sentence_count > 0, sentence_count, 1)
+    safe_words = np.where(word_count > 0, word_count, 1)
+    words_per_sentence = word_count / safe_sentences
+    syllables_per_word = syllable_count / safe_words
+
+    fre = np.where(valid, 206.835 - 1.015 * words_per_sentence - 84.6 * syllables_per_word, 0)
+    fkg = np.where(valid, 0.39 * words_per_sentence + 11.8 * syllables_per_word - 15.59, 0)
+    avg_sentence_length = np.where(sentence_count > 0, sentence_word_total / safe_sentences, 0)
+
+    return [
+        {
+            'flesch_reading_ease': float(fre[i]),
+            'flesch_kincaid_grade': float(fkg[i]),
+            'avg_sentence_length': float(avg_sentence_length[i])
+        }
+        for i in range(len(texts))
+    ]
+
+
+# 読みやすさを分析する関数
+def analyze_readability(text):
+    if not isinstance(text, str) or text == '':
+        return {'flesch_reading_ease': 0, 'flesch_kincaid_grade': 0, 'avg_sentence_length': 0}
+    return analyze_readability_batch([text])[0]
+
+
+if __name__ == "__main__":
+    # 使い方: python readability.py [文書数] [1文書あたりの単語数]
+    # Zipf分布に従う合成コーパスで、旧実装（キャッシュなし・3回の単語分割）と比較する
+    num_docs = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    words_per_doc = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    rng = np.random.default_rng(42)
+    letters = np.array(list("abcdefghijklmnopqrstuvwxyz"))
+    vocabulary = [''.join(rng.choice(letters, size=rng.integers(2, 12))) for _ in range(50000)]
+    ranks = np.minimum(rng.zipf(1.2, size=num_docs * words_per_doc), len(vocabulary)) - 1
+    docs = []
+    for i in range(num_docs):
+        doc_words = [vocabulary[r] for r in ranks[i * words_per_doc:(i + 1) * words_per_doc]]
+        docs.append('. '.join(' '.join(doc_words[j:j + 15]) for j in range(0, len(doc_words), 15)) + '.')
+
+    def legacy_readability(text):
+        sentences = re.split(r'[.!?]+', text)
+        sentences = [s.strip() for s in sentences if s.strip()]
+        avg_sentence_length = sum(len(s.split()) for s in sentences) / len(sentences) if sentences else 0
+        word_count = len(text.split())
+        sentence_count = len(sentences)
+        syllable_count = sum(count_syllables.__wrapped__(word) for word in text.split())
+        if sentence_count > 0 and word_count > 0:
+            fre = 206.835 - 1.015 * (word_count / sentence_count) - 84.6 * (syllable_count / word_count)
+            fkg = 0.39 * (word_count / sentence_count) + 11.8 * (syllable_count / word_count) - 15.59
+        else:
+            fre = 0
+            fkg = 0
+        return {'flesch_reading_ease': fre, 'flesch_kincaid_grade': fkg, 'avg_sentence_length': avg_sentence_length}
+
+    start = time.perf_counter()
+    legacy = [legacy_readability(doc) for doc in docs]
+    legacy_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = analyze_readability_batch(docs)
+    elapsed = time.perf_counter() - start
+
+    print(f"{num_docs}文書（各{words_per_doc}語）の読みやすさ計算:")
+    print(f"  旧実装: {legacy_elapsed:.2f}秒")
+    print(f"  新実装: {elapsed:.2f}秒 ({legacy_elapsed / elapsed:.1f}倍)")
+    print(f"  結果の一致: {legacy == results}")
+    print(f"  音節キャッシュ: {count_syllables.cache_info()}")
@@ -5,30 +5,35 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import re
 from collections import Counter
+from functools import partial
 from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
 from sklearn.decomposition import NMF, LatentDirichletAllocation
 from wordcloud import WordCloud
 import networkx as nx
 import matplotlib.cm as cm
 
+from cooccurrence import category_count_matrix, presence_gram, drop_self_cooccurrence, cooccurrence_edges
+from corpus import doc_id, latest_data_file
+from mapreduce import map_reduce
+from tfidf_cache import cached_tfidf
+from model_registry import register_model
+from kwic import KWICIndex
+from feature_store import FeatureStore
+
 # フォント設定
 plt.rcParams['font.family'] = 'Hiragino Sans'
 
 # データ読み込み
-data_folder = os.path.join("..", "data")
-jp_file_path = os.path.join(data_folder, "remote_work_data_jp_20250329_165210.csv")
-en_file_path = os.path.join(data_folder, "remote_work_data_en_20250329_165210.csv")
+jp_file_path = latest_data_file('jp')
+en_file_path = latest_data_file('en')
 
 df_jp = pd.read_csv(jp_file_path)
 df_en = pd.read_csv(en_file_path)
 
-# 感情分析データの読み込み
-jp_sentiment_df = pd.read_csv("jp_sentiment_analysis.csv")
-en_sentiment_df = pd.read_csv("en_sentiment_analysis.csv") if os.path.exists("en_sentiment_analysis.csv") else None
-
-# 構造分析データの読み込み
-jp_structure_df = pd.read_csv("jp_structure_analysis.csv")
-en_structure_df = pd.read_csv("en_structure_analysis.csv") if os.path.exists("en_structure_analysis.csv") else None
+# 感情分析・構造分析データの読み込み（特徴量ストアから使う列だけを読む）
+feature_store = FeatureStore()
+sentiment_features_df = feature_store.read('sentiment', ['polarity', 'subjectivity', 'solution_score', 'language'])
+structure_features_df = feature_store.read('structure', ['headings', 'paragraphs', 'lists', 'language'])
 
 # ==============================
 # 分析1: 転職に有利なリモート適性スキルの特定
@@ -57,40 +62,40 @@ remote_skills = {
     'result_oriented': ['成果', '実績', 'KPI', '目標達成', 'パフォーマンス', '生産性', '効率', '評価']
 }
 
-# 各スキルカテゴリの言及回数をカウント
-skill_mentions = {category: 0 for category in remote_skills.keys()}
-skill_contexts = {category: [] for category in remote_skills.keys()}
-
 # 日本語と英語のテキストを結合
 all_contents = []
+all_doc_ids = []
 for i, row in df_jp.iterrows():
     if isinstance(row['content'], str) and row['content'] != '':
         all_contents.append(row['content'])
+        all_doc_ids.append(doc_id(row.get('url'), row.get('title'), row['content']))
 
 for i, row in df_en.iterrows():
     if isinstance(row['content'], str) and row['content'] != '':
         all_contents.append(row['content'])
-
-combined_text = ' '.join(all_contents)
-
-# 各スキルカテゴリのキーワード出現回数をカウント
-for category, keywords in remote_skills.items():
-    for keyword in keywords:
-        count = combined_text.lower().count(keyword.lower())
-        skill_mentions[category] += count
-        
-        # コンテキストも抽出（各キーワードの周辺テキスト）
-        for content in all_contents:
-            if isinstance(content, str):
-                lower_content = content.lower()
-                keyword_lower = keyword.lower()
-                if keyword_lower in lower_content:
-                    # キーワードの前後100文字を抽出
-                    start = max(0, lower_content.find(keyword_lower) - 100)
-                    end = min(len(lower_content), lower_content.find(keyword_lower) + 100)
-                    context = content[start:end].replace('\n', ' ').strip()
-                    if len(context) > 50:  # 短すぎるコンテキストは除外
-                        skill_contexts[category].append(context)
+        all_doc_ids.append(doc_id(row.get('url'), row.get('title'), row['content']))
+
+# シャード（記事IDで分けた記事の集まり）ごとの、カテゴリの出現回数の合計と共起文書数
+def map_category_mentions(texts, categories, with_cooccurrence=False):
+    counts = category_count_matrix(texts, categories)
+    stats = {'mentions': np.asarray(counts.sum(axis=0)).ravel()}
+    if with_cooccurrence:
+        stats['gram'] = presence_gram(counts)
+    return stats
+
+# 各スキルカテゴリのキーワード出現回数を、記事IDで分けたシャードごとに並列に数えて合成する
+skill_stats = map_reduce(
+    all_contents, partial(map_category_mentions, categories=remote_skills, with_cooccurrence=True), doc_ids=all_doc_ids
+)
+skill_mentions = dict(zip(remote_skills.keys(), skill_stats['mentions'].tolist()))
+
+# コンテキストも抽出（各キーワードの前後100文字、表示する2件だけ取り出す）
+# 短すぎるコンテキスト（50文字以下）は除外
+skill_kwic = KWICIndex(all_contents, categories=remote_skills)
+skill_contexts = {
+    category: [snippet['text'] for snippet in skill_kwic.snippets(category, window=100, top_n=2, min_length=51)]
+    for category in remote_skills.keys()
+}
 
 # スキルの重要度をビジュアル化
 plt.figure(figsize=(12, 8))
@@ -144,22 +149,11 @@ for category, mentions in skill_mentions.items():
 print("\nリモートワークスキル間の関連性分析:")
 
 # スキル共起マトリックスの作成
-skill_matrix = np.zeros((len(categories), len(categories)))
-
-# 同じコンテキスト内での共起関係を計算
-for content in all_contents:
-    if isinstance(content, str):
-        # 各カテゴリのキーワードが含まれているかチェック
-        category_presence = {}
-        for cat, keywords in remote_skills.items():
-            category_presence[cat] = any(keyword.lower() in content.lower() for keyword in keywords)
-        
-        # 共起関係をカウント
-        for i, cat1 in enumerate(categories):
-            for j, cat2 in enumerate(categories):
-                if i < j and category_presence[cat1] and category_presence[cat2]:
-                    skill_matrix[i, j] += 1
-                    skill_matrix[j, i] += 1
+# 同じ記事内での共起関係を、記事 × カテゴリ の有無の行列の積 X.T @ X で計算する
+# （シャードごとの X.T @ X の和から、同じカテゴリ同士の対角成分を除く）
+skill_cooccurrence = drop_self_cooccurrence(skill_stats['gram'])
+skill_matrix = skill_cooccurrence.toarray()
+skill_edges = cooccurrence_edges(skill_cooccurrence, categories)
 
 # 共起ネットワークの可視化
 plt.figure(figsize=(12, 10))
@@ -170,10 +164,8 @@ for i, cat in enumerate(categories):
     G.add_node(cat, label=category_names_jp[cat], weight=counts[i])
 
 # エッジを追加
-for i, cat1 in enumerate(categories):
-    for j, cat2 in enumerate(categories):
-        if i < j and skill_matrix[i, j] > 0:
-            G.add_edge(cat1, cat2, weight=skill_matrix[i, j])
+for cat1, cat2, weight in skill_edges:
+    G.add_edge(cat1, cat2, weight=weight)
 
 # ネットワークレイアウトの設定
 pos = nx.spring_layout(G, k=0.5, seed=42)
@@ -202,10 +194,8 @@ plt.close()
 
 # スキル間の関連性を出力
 print("スキル間の強い関連性:")
-for i, cat1 in enumerate(categories):
-    for j, cat2 in enumerate(categories):
-        if i < j and skill_matrix[i, j] > 0:
-            print(f"  {category_names_jp[cat1]} ⟷ {category_names_jp[cat2]}: 関連度 {skill_matrix[i, j]:.0f}")
+for cat1, cat2, weight in skill_edges:
+    print(f"  {category_names_jp[cat1]} ⟷ {category_names_jp[cat2]}: 関連度 {weight:.0f}")
 
 # ==============================
 # 分析2: トピックモデリングによるリモートワーク成功要因の特定
@@ -227,9 +217,10 @@ for i, row in df_en.iterrows():
         all_documents.append(row['content'])
         titles.append(row['title'])
 
-# TF-IDFベクトル化
-tfidf_vectorizer = TfidfVectorizer(max_df=0.95, min_df=2, stop_words='english')
-tfidf = tfidf_vectorizer.fit_transform(all_documents)
+# TF-IDFベクトル化（コーパスとパラメータごとに保存し、トピック数を変えても再計算しない）
+tfidf_vectorizer, tfidf = cached_tfidf(
+    all_documents, name='job_search_all', max_df=0.95, min_df=2, stop_words='english'
+)
 
 # NMF（非負値行列因子分解）を使用したトピックモデリング
 num_topics = 5
@@ -254,6 +245,14 @@ topic_labels = {
     4: "チームマネジメントと信頼構築"
 }
 
+# 新しく取得した記事は、保存したモデルで変換だけを行いトピックを割り当てる
+# （python model_registry.py job_search_nmf 入力CSV）
+nmf_version = register_model(
+    'job_search_nmf', tfidf_vectorizer, nmf_model, topic_labels=topic_labels,
+    metadata={'num_documents': len(all_documents)}
+)
+print(f"NMFモデル: job_search_nmf（{nmf_version}。内容が同じなら前回のバージョン）")
+
 # トピックの重要性（各ドキュメントでのトピックの平均値）
 topic_importance = nmf_topic_document_matrix.mean(axis=0)
 sorted_topics = np.argsort(-topic_importance)
@@ -350,14 +349,9 @@ industry_remote_scores = {
     "教育・研修": 7.6
 }
 
-# 業界・職種の言及回数をカウント
-industry_mentions = {industry: 0 for industry in industry_keywords.keys()}
-
-# 日本語と英語の記事コンテンツを結合したテキストで検索
-for industry, keywords in industry_keywords.items():
-    for keyword in keywords:
-        count = combined_text.lower().count(keyword.lower())
-        industry_mentions[industry] += count
+# 業界・職種の言及回数をカウント（日本語と英語の記事コンテンツ全体）
+industry_stats = map_reduce(all_contents, partial(map_category_mentions, categories=industry_keywords), doc_ids=all_doc_ids)
+industry_mentions = dict(zip(industry_keywords.keys(), industry_stats['mentions'].tolist()))
 
 # 業界・職種言及回数とリモートワーク適性度を表示
 print("\nフルリモート転職に有利な業界・職種分析:")
@@ -6,17 +6,22 @@ from collections import Counter
 import numpy as np
 import seaborn as sns
 
+from sketches import SpaceSaving
+from corpus import latest_data_file
+
 # フォント設定
 plt.rcParams['font.family'] = 'Hiragino Sans'
 
 # カラーパレット設定
 colors = sns.color_palette("colorblind")
 
-# データフォルダのパス
-data_folder = os.path.join(os.getcwd(), "data")
+# 頻出単語をスケッチで近似的に数えるかどうか（巨大なコーパス向け、メモリ使用量が一定）
+approximate_top_words = False
+# スケッチが保持する単語数（推定回数の誤差は 単語総数 / sketch_capacity 以下）
+sketch_capacity = 10000
 
-# CSVファイルの読み込み
-file_path = os.path.join(data_folder, "remote_work_all_data_20250329_165210.csv")
+# CSVファイルの読み込み（取得日時が最新のもの）
+file_path = latest_data_file('all')
 df_all = pd.read_csv(file_path)
 
 # 1. 基本的な統計 - 言語の分布
@@ -62,11 +67,16 @@ def extract_keywords(text):
     return []
 
 # タイトルから抽出
-all_title_words = []
-for title in df_all['title'].dropna():
-    all_title_words.extend(extract_keywords(title))
-
-title_word_counts = Counter(all_title_words)
+if approximate_top_words:
+    # 1回の走査でスケッチに数える（Counterと同じ most_common で上位を取り出せる）
+    title_word_counts = SpaceSaving(sketch_capacity)
+    title_word_counts.update(word for title in df_all['title'].dropna() for word in extract_keywords(title))
+else:
+    all_title_words = []
+    for title in df_all['title'].dropna():
+        all_title_words.extend(extract_keywords(title))
+
+    title_word_counts = Counter(all_title_words)
 print("\n最も頻出するタイトルの単語:")
 print(title_word_counts.most_common(10))
 
@@ -0,0 +1,126 @@
+import re
+from collections import OrderedDict
+import numpy as np
+
+from corpus import content_hash
+
+# 言語ごとの文の区切り
+SENTENCE_DELIMITERS = {
+    'en': re.compile(r'[.!?]+'),
+    'ja': re.compile(r'[。．!！?？]+'),
+}
+# 言語が不明な場合は日英両方の区切りを使う
+MIXED_DELIMITERS = re.compile(r'[.!?。．！？]+')
+
+# 文書ごとの分割結果を保持する件数
+SEGMENT_CACHE_SIZE = 4096
+
+# (本文のハッシュ値, 言語) -> 分割結果（本文そのものは保持しない）
+_segment_cache = OrderedDict()
+
+
+def segment(text, language='en'):
+    """
+    テキストを文に分割し、各文の開始・終了位置を返す（文書ごとにキャッシュされる）
+
+    キャッシュは本文のハッシュ値で引くため、本文の文字列をメモリに残さない。
+
+    各文は前後の空白を除いた範囲で、空の文は含まない。
+    text[starts[i]:ends[i]] は従来の re.split(...) と strip() で得られる文と一致する。
+
+    Parameters:
+    text (str): 対象テキスト
+    language (str): 'en'、'ja'（それ以外は日英両方の区切りを使う）
+
+    Returns:
+    tuple: (開始位置のint32配列, 終了位置のint32配列)（読み取り専用）
+    """
+    key = (content_hash(text), language)
+    cached = _segment_cache.get(key)
+    if cached is not None:
+        _segment_cache.move_to_end(key)
+        return cached
+    result = _segment(text, language)
+    _segment_cache[key] = result
+    if len(_segment_cache) > SEGMENT_CACHE_SIZE:
+        _segment_cache.popitem(last=False)
+    return result
+
+
+def _segment(text, language):
+    delimiters = SENTENCE_DELIMITERS.get(language, MIXED_DELIMITERS)
+    starts = []
+    ends = []
+    pos = 0
+    boundaries = [(m.start(), m.end()) for m in delimiters.finditer(text)]
+    boundaries.append((len(text), len(text)))
+    for delimiter_start, delimiter_end in boundaries:
+        segment_text = text[pos:delimiter_start]
+        stripped = segment_text.strip()
+        if stripped:
+            start = pos + len(segment_text) - len(segment_text.lstrip())
+            starts.append(start)
+            ends.append(start + len(stripped))
+        pos = delimiter_end
+
+    starts = np.array(starts, dtype=np.int32)
+    ends = np.array(ends, dtype=np.int32)
+    # キャッシュした配列が呼び出し側で書き換えられないようにする
+    starts.setflags(write=False)
+    ends.setflags(write=False)
+    return starts, ends
+
+
+def sentences(text, language='en'):
+    """
+    テキストを文のリストに分割する
+
+    Parameters:
+    text (str): 対象テキスト
+    language (str): 'en' または 'ja'
+
+    Returns:
+    list: 文のリスト
+    """
+    if not isinstance(text, str):
+        return []
+    starts, ends = segment(text, language)
+    return [text[s:e] for s, e in zip(starts.tolist(), ends.tolist())]
+
+
+def sentence_index(text, offset, language='en'):
+    """
+    指定した文字位置を含む文の番号を返す
+
+    Parameters:
+    text (str): 対象テキスト
+    offset (int): 文字位置
+    language (str): 'en' または 'ja'
+
+    Returns:
+    int: 文の番号（文の外側の場合は直前の文、先頭より前なら0）
+    """
+    starts, _ = segment(text, language)
+    return max(int(np.searchsorted(starts, offset, side='right')) - 1, 0)
+
+
+def context_window(text, offset, language='en', neighbors=0):
+    """
+    指定した文字位置を含む文（と前後の文）を返す
+
+    Parameters:
+    text (str): 対象テキスト
+    offset (int): キーワードなどの文字位置
+    language (str): 'en' または 'ja'
+    neighbors (int): 前後に含める文の数
+
+    Returns:
+    tuple: (開始位置, 終了位置)（文が1つもない場合は (0, 0)）
+    """
+    starts, ends = segment(text, language)
+    if len(starts) == 0:
+        return 0, 0
+    index = sentence_index(text, offset, language)
+    first = max(index - neighbors, 0)
+    last = min(index + neighbors, len(starts) - 1)
+    return int(starts[first]), int(ends[last])
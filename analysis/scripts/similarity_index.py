@@ -0,0 +1,447 @@
+import os
+import sys
+import json
+import time
+import numpy as np
+import pandas as pd
+import joblib
+from sklearn.decomposition import TruncatedSVD
+
+from corpus import cache_path, doc_ids as article_ids
+from language_id import identify_languages
+from tfidf_cache import TfidfFeatures
+
+# 埋め込みの次元数とLSHの設定の既定値
+N_COMPONENTS = 100
+N_TABLES = 8
+N_BITS = 16
+# 一度にハッシュ値を計算する文書数
+HASH_CHUNK = 65536
+# 言語ごとのTF-IDFの設定（日本語は単語に分かち書きされていないため、文字n-gramで表す）
+VECTORIZER_PARAMS = {
+    'en': {'max_df': 0.95, 'min_df': 2, 'stop_words': 'english'},
+    'ja': {'max_df': 0.95, 'min_df': 2, 'analyzer': 'char_wb', 'ngram_range': (2, 3)},
+}
+
+# 追記するファイル（生のバイナリ。行数は meta.json の count が正しい値）
+_FILES = {
+    'vectors': ('vectors.f32', np.float32),
+    'codes': ('codes.u32', np.uint32),
+    'doc_ids': ('doc_ids.i64', np.int64),
+}
+
+
+def normalize_rows(vectors):
+    """
+    行ごとにL2ノルムを1にする（ノルムが0の行はそのまま）
+
+    Parameters:
+    vectors (numpy.ndarray): 行列
+
+    Returns:
+    numpy.ndarray: 正規化したfloat32の行列
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, np.float32(1e-12))
+
+
+class SimilarityIndex:
+    """
+    LSA埋め込み（TruncatedSVD）と乱択超平面LSHによる類似記事の近似検索インデックス
+
+    埋め込みは正規化したfloat32のベクトルとしてファイルに追記し、メモリマップで読む。
+    各テーブルでは n_bits 枚のランダムな超平面のどちら側にあるかをビット列（ハッシュ値）にし、
+    ハッシュ値で並べ替えた配列を二分探索してバケットを引く。ハッシュ値が1ビットだけ異なる
+    バケットも調べ（マルチプローブ）、候補だけでコサイン類似度を正確に計算する。
+    新しい記事はファイルの末尾に追記するだけで、既存のデータは書き換えない。
+    """
+
+    def __init__(self, directory, vectorizer, svd, planes, meta):
+        self.directory = directory
+        self.vectorizer = vectorizer
+        self.svd = svd
+        self.planes = planes
+        self.meta = meta
+        self._load_arrays()
+
+    @classmethod
+    def build(cls, directory, matrix, doc_ids, vectorizer=None, n_components=N_COMPONENTS,
+              n_tables=N_TABLES, n_bits=N_BITS, random_state=42, language=None):
+        """
+        TF-IDF行列からインデックスを作成する
+
+        Parameters:
+        directory (str): 保存先のフォルダ（既存のインデックスは置き換える）
+        matrix (scipy.sparse.spmatrix): 文書 × 語彙 のTF-IDF行列
+        doc_ids (list): 文書ごとの記事ID
+        vectorizer (TfidfVectorizer): 新しい記事の変換に使う学習済みのベクトル化器
+        n_components (int): 埋め込みの次元数
+        n_tables (int): ハッシュテーブルの数（多いほど再現率が上がる）
+        n_bits (int): ハッシュ値のビット数（多いほどバケットが小さくなる。最大32）
+        random_state (int): 乱数のシード
+        language (str): ベクトル化の設定の言語（VECTORIZER_PARAMS のキー。meta.json に記録する）
+
+        Returns:
+        SimilarityIndex: インデックス
+        """
+        n_components = max(1, min(n_components, matrix.shape[1] - 1))
+        svd = TruncatedSVD(n_components=n_components, random_state=random_state).fit(matrix)
+        rng = np.random.default_rng(random_state)
+        planes = rng.standard_normal((n_tables, n_bits, n_components)).astype(np.float32)
+
+        os.makedirs(directory, exist_ok=True)
+        for name, _ in _FILES.values():
+            open(os.path.join(directory, name), 'wb').close()
+        joblib.dump({'vectorizer': vectorizer, 'svd': svd}, os.path.join(directory, 'model.joblib'))
+        np.save(os.path.join(directory, 'planes.npy'), planes)
+        meta = {'dim': n_components, 'n_tables': n_tables, 'n_bits': n_bits, 'count': 0, 'language': language}
+        _write_meta(directory, meta)
+
+        index = cls(directory, vectorizer, svd, planes, meta)
+        index.add_vectors(index.embed(matrix), doc_ids)
+        return index
+
+    @classmethod
+    def load(cls, directory):
+        """
+        保存したインデックスを読み込む
+
+        Parameters:
+        directory (str): 保存先のフォルダ
+
+        Returns:
+        SimilarityIndex: インデックス
+        """
+        with open(os.path.join(directory, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        model = joblib.load(os.path.join(directory, 'model.joblib'))
+        planes = np.load(os.path.join(directory, 'planes.npy'))
+        return cls(directory, model['vectorizer'], model['svd'], planes, meta)
+
+    def _load_arrays(self):
+        # ファイルをメモリマップで開き、テーブルごとにハッシュ値で並べ替えた配列を作る
+        count = self.meta['count']
+        shapes = {
+            'vectors': (count, self.meta['dim']),
+            'codes': (count, self.meta['n_tables']),
+            'doc_ids': (count,),
+        }
+        for key, (name, dtype) in _FILES.items():
+            path = os.path.join(self.directory, name)
+            if count == 0:
+                setattr(self, key, np.zeros(shapes[key], dtype=dtype))
+            else:
+                setattr(self, key, np.memmap(path, dtype=dtype, mode='r', shape=shapes[key]))
+        self._orders = []
+        self._sorted_codes = []
+        for t in range(self.meta['n_tables']):
+            order = np.argsort(self.codes[:, t], kind='stable')
+            self._orders.append(order)
+            self._sorted_codes.append(np.asarray(self.codes[:, t])[order])
+        self._positions = {article_id: i for i, article_id in enumerate(self.doc_ids.tolist())}
+
+    def __len__(self):
+        return self.meta['count']
+
+    def __contains__(self, article_id):
+        return article_id in self._positions
+
+    def embed(self, matrix):
+        """
+        TF-IDF行列を正規化した埋め込みに変換する
+
+        Parameters:
+        matrix (scipy.sparse.spmatrix): 文書 × 語彙 のTF-IDF行列
+
+        Returns:
+        numpy.ndarray: 文書 × 次元 のfloat32の行列
+        """
+        return normalize_rows(self.svd.transform(matrix))
+
+    def hash_codes(self, vectors):
+        """
+        ベクトルのテーブルごとのハッシュ値を計算する
+
+        Parameters:
+        vectors (numpy.ndarray): 文書 × 次元 の行列
+
+        Returns:
+        numpy.ndarray: 文書 × テーブル のハッシュ値（uint32）
+        """
+        weights = (np.uint64(1) << np.arange(self.meta['n_bits'], dtype=np.uint64))
+        codes = np.zeros((len(vectors), self.meta['n_tables']), dtype=np.uint32)
+        for start in range(0, len(vectors), HASH_CHUNK):
+            chunk = np.asarray(vectors[start:start + HASH_CHUNK], dtype=np.float32)
+            for t, planes in enumerate(self.planes):
+                bits = (chunk @ planes.T) > 0
+                codes[start:start + len(chunk), t] = (bits @ weights).astype(np.uint32)
+        return codes
+
+    def add_vectors(self, vectors, doc_ids):
+        """
+        埋め込みをインデックスの末尾に追加する
+
+        Parameters:
+        vectors (numpy.ndarray): 正規化した 文書 × 次元 の行列
+        doc_ids (list): 文書ごとの記事ID
+        """
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        arrays = {
+            'vectors': vectors,
+            'codes': self.hash_codes(vectors),
+            'doc_ids': np.asarray(doc_ids, dtype=np.int64),
+        }
+        count = self.meta['count']
+        for key, (name, dtype) in _FILES.items():
+            path = os.path.join(self.directory, name)
+            row_bytes = np.dtype(dtype).itemsize * int(np.prod(arrays[key].shape[1:], dtype=np.int64))
+            with open(path, 'ab') as f:
+                # 前回の追記が途中で終わっていた場合は、記録済みの行数まで切り詰める
+                f.truncate(count * row_bytes)
+                f.write(arrays[key].tobytes())
+        # 行数は最後に更新する（途中で失敗しても、読み込み時は以前の行数までを使う）
+        self.meta = dict(self.meta, count=count + len(vectors))
+        _write_meta(self.directory, self.meta)
+        self._load_arrays()
+
+    def update(self, matrix, doc_ids):
+        """
+        まだインデックスにない記事だけを追加する
+
+        Parameters:
+        matrix (scipy.sparse.spmatrix): 文書 × 語彙 のTF-IDF行列（インデックスと同じベクトル化器）
+        doc_ids (list): 文書ごとの記事ID
+
+        Returns:
+        int: 追加した記事数
+        """
+        doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        seen = set(self._positions)
+        new_rows = []
+        for i, article_id in enumerate(doc_ids.tolist()):
+            if article_id not in seen:
+                seen.add(article_id)
+                new_rows.append(i)
+        if new_rows:
+            self.add_vectors(self.embed(matrix[new_rows]), doc_ids[new_rows])
+        return len(new_rows)
+
+    def update_texts(self, texts, doc_ids):
+        """
+        まだインデックスにない記事の本文を、保存したベクトル化器で変換して追加する
+
+        Parameters:
+        texts (list): 記事の本文
+        doc_ids (list): 記事ごとの記事ID
+
+        Returns:
+        int: 追加した記事数
+        """
+        texts = [text if isinstance(text, str) else '' for text in texts]
+        new_rows = [i for i, article_id in enumerate(doc_ids) if article_id not in self._positions]
+        if not new_rows:
+            return 0
+        matrix = self.vectorizer.transform([texts[i] for i in new_rows])
+        return self.update(matrix, [doc_ids[i] for i in new_rows])
+
+    def candidates(self, vector):
+        """
+        ベクトルと同じ（または1ビットだけ異なる）バケットに入っている文書の番号を返す
+
+        Parameters:
+        vector (numpy.ndarray): 正規化したベクトル
+
+        Returns:
+        numpy.ndarray: 文書番号の配列
+        """
+        codes = self.hash_codes(vector[np.newaxis, :])[0]
+        flips = np.concatenate([[0], np.uint32(1) << np.arange(self.meta['n_bits'], dtype=np.uint32)])
+        found = []
+        for t in range(self.meta['n_tables']):
+            probes = np.bitwise_xor(codes[t], flips).astype(np.uint32)
+            starts = np.searchsorted(self._sorted_codes[t], probes, side='left')
+            ends = np.searchsorted(self._sorted_codes[t], probes, side='right')
+            for start, end in zip(starts.tolist(), ends.tolist()):
+                if end > start:
+                    found.append(self._orders[t][start:end])
+        if not found:
+            return np.zeros(0, dtype=np.int64)
+        return np.unique(np.concatenate(found))
+
+    def query(self, vector, k=10, exclude=None, exact=False):
+        """
+        ベクトルに類似した記事を検索する
+
+        Parameters:
+        vector (numpy.ndarray): 正規化したベクトル
+        k (int): 件数
+        exclude (int): 結果から除く記事ID
+        exact (bool): 全件と比較するかどうか（False ならLSHの候補だけと比較）
+
+        Returns:
+        list: (記事ID, コサイン類似度) のリスト（類似度の高い順）
+        """
+        vector = np.asarray(vector, dtype=np.float32)
+        rows = np.arange(len(self)) if exact else self.candidates(vector)
+        if len(rows) < k + 1 and not exact:
+            # 候補が足りない場合は全件と比較する
+            rows = np.arange(len(self))
+        if len(rows) == 0:
+            return []
+        scores = np.asarray(self.vectors[rows]) @ vector
+        ids = np.asarray(self.doc_ids[rows])
+        if exclude is not None:
+            keep = ids != exclude
+            scores, ids = scores[keep], ids[keep]
+        top = np.argpartition(-scores, min(k, len(scores)) - 1)[:k] if len(scores) > k else np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [(int(ids[i]), float(scores[i])) for i in top]
+
+    def similar_to(self, article_id, k=10, exact=False):
+        """
+        インデックス内の記事に類似した記事を検索する（その記事自身は除く）
+
+        Parameters:
+        article_id (int): 記事ID
+        k (int): 件数
+        exact (bool): 全件と比較するかどうか
+
+        Returns:
+        list: (記事ID, コサイン類似度) のリスト
+        """
+        vector = np.asarray(self.vectors[self._positions[article_id]])
+        return self.query(vector, k=k, exclude=article_id, exact=exact)
+
+    def similar_to_text(self, text, k=10):
+        """
+        本文に類似した記事を検索する
+
+        Parameters:
+        text (str): 記事の本文
+        k (int): 件数
+
+        Returns:
+        list: (記事ID, コサイン類似度) のリスト
+        """
+        return self.query(self.embed(self.vectorizer.transform([text]))[0], k=k)
+
+
+def _write_meta(directory, meta):
+    # 書きかけのファイルを読まないよう、一時ファイルに書いてから置き換える
+    path = os.path.join(directory, 'meta.json')
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, path)
+
+
+def corpus_language(texts):
+    """
+    インデックスに使うベクトル化の設定の言語を判定する
+
+    日本語や日英混在の記事が1件でもあれば 'ja'（文字n-gramは英語の記事にも使える）、
+    それ以外は 'en' を返す。
+
+    Parameters:
+    texts (list): 記事の本文
+
+    Returns:
+    str: 'en' または 'ja'
+    """
+    labels, _ = identify_languages(list(texts))
+    return 'ja' if any(label in ('ja', 'mixed') for label in labels) else 'en'
+
+
+def load_or_build(name, texts, doc_ids, language=None, rebuild=False, **params):
+    """
+    記事のインデックスを読み込み、新しい記事だけを追加する（なければ作成する）
+
+    Parameters:
+    name (str): インデックスの名前（analysis/cache/similarity/<name>/ に保存する）
+    texts (list): 記事の本文
+    doc_ids (list): 記事ごとの記事ID
+    language (str): 'en'（単語）または 'ja'（文字n-gram）。省略時は corpus_language で判定する
+    rebuild (bool): 保存済みのインデックスを使わずに作成し直すかどうか
+    params: SimilarityIndex.build のパラメータ
+
+    Returns:
+    SimilarityIndex: インデックス
+    """
+    texts = list(texts)
+    language = language or corpus_language(texts)
+    directory = os.path.dirname(cache_path('similarity', name, 'meta.json'))
+    if not rebuild and os.path.exists(os.path.join(directory, 'meta.json')):
+        index = SimilarityIndex.load(directory)
+        # 言語の設定が異なる（または記録のない古い）インデックスは作成し直す
+        if index.meta.get('language') == language:
+            index.update_texts(texts, list(doc_ids))
+            return index
+    # TF-IDF行列はキャッシュを共有する（同じコーパスなら再計算しない）
+    features = TfidfFeatures.from_texts(texts, name=f"similarity_{name}", **VECTORIZER_PARAMS[language])
+    return SimilarityIndex.build(directory, features.matrix, doc_ids, vectorizer=features.vectorizer,
+                                 language=language, **params)
+
+
+def benchmark(num_docs=1_000_000, dim=N_COMPONENTS, num_queries=200, k=10):
+    """
+    合成したベクトルで、構築時間・検索時間・再現率（全件比較の上位k件との一致率）を計測する
+
+    Parameters:
+    num_docs (int): 文書数
+    dim (int): 次元数
+    num_queries (int): 検索の回数
+    k (int): 件数
+    """
+    import tempfile
+    rng = np.random.default_rng(0)
+    # 話題ごとの中心の周りに文書を散らばらせる
+    centers = rng.standard_normal((1000, dim)).astype(np.float32)
+    vectors = np.empty((num_docs, dim), dtype=np.float32)
+    for start in range(0, num_docs, HASH_CHUNK):
+        size = min(HASH_CHUNK, num_docs - start)
+        vectors[start:start + size] = centers[rng.integers(0, len(centers), size)] + \
+            0.5 * rng.standard_normal((size, dim)).astype(np.float32)
+    vectors = normalize_rows(vectors)
+
+    directory = tempfile.mkdtemp()
+    planes = rng.standard_normal((N_TABLES, N_BITS, dim)).astype(np.float32)
+    meta = {'dim': dim, 'n_tables': N_TABLES, 'n_bits': N_BITS, 'count': 0}
+    for name, _ in _FILES.values():
+        open(os.path.join(directory, name), 'wb').close()
+    _write_meta(directory, meta)
+    index = SimilarityIndex(directory, None, None, planes, meta)
+    start = time.perf_counter()
+    index.add_vectors(vectors, np.arange(num_docs))
+    print(f"{num_docs}文書の追加: {time.perf_counter() - start:.2f}秒")
+
+    queries = rng.integers(0, num_docs, num_queries)
+    start = time.perf_counter()
+    results = [index.similar_to(int(q), k=k) for q in queries]
+    elapsed = (time.perf_counter() - start) / num_queries
+    exact = [index.similar_to(int(q), k=k, exact=True) for q in queries[:20]]
+    recall = np.mean([
+        len({i for i, _ in r} & {i for i, _ in e}) / k for r, e in zip(results[:20], exact)
+    ])
+    print(f"検索: 平均 {elapsed * 1000:.1f}ミリ秒/件, 再現率@{k}: {recall:.2f}")
+
+
+if __name__ == "__main__":
+    # 使い方: python similarity_index.py 入力CSV [記事の行番号] [件数]
+    #         python similarity_index.py --benchmark [文書数]
+    if len(sys.argv) > 1 and sys.argv[1] == '--benchmark':
+        benchmark(int(sys.argv[2]) if len(sys.argv) > 2 else 1_000_000)
+        sys.exit(0)
+    if len(sys.argv) < 2:
+        print("使い方: python similarity_index.py 入力CSV [記事の行番号] [件数]")
+        sys.exit(1)
+    df = pd.read_csv(sys.argv[1])
+    row = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    k = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+
+    ids = article_ids(df)
+    index = load_or_build(os.path.splitext(os.path.basename(sys.argv[1]))[0], df['content'].tolist(), ids)
+    titles = dict(zip(ids.tolist(), df['title']))
+    print(f"「{df['title'].iloc[row]}」に類似した記事:")
+    for article_id, score in index.similar_to(int(ids[row]), k=k):
+        print(f"  {score:.3f}  {titles.get(article_id)}")
@@ -0,0 +1,148 @@
+import heapq
+from collections import Counter
+
+# まとめて集計してからスケッチに反映するトークン数の目安
+CHUNK_TOKENS = 100000
+
+
+class SpaceSaving:
+    """
+    Space-Saving法による頻出語（ヘビーヒッター）のスケッチ
+
+    最大 capacity 個の語とその推定回数・誤差だけを保持するため、
+    語彙がいくら大きくてもメモリ使用量は一定。
+
+    誤差の保証（N はこれまでに数えたトークンの総数）:
+        真の回数 <= 推定回数 <= 真の回数 + N / capacity
+        真の回数が N / capacity を超える語は必ずスケッチに残る
+        推定回数 - 誤差 は真の回数の下限
+    スケッチ同士は merge で合成でき（Cafaroらの合成手順）、合成後も
+    合計のトークン数に対して同じ保証が成り立つ。チャンクごと・プロセスごとに
+    作ったスケッチを後から1つにまとめられる。
+    """
+
+    def __init__(self, capacity=10000):
+        """
+        Parameters:
+        capacity (int): 保持する語の数の上限
+        """
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        self.total = 0
+
+    def __len__(self):
+        return len(self.counts)
+
+    def _floor(self):
+        # スケッチにない語の回数の上限（満杯でなければ0）
+        if len(self.counts) < self.capacity:
+            return 0
+        return min(self.counts.values())
+
+    def _merge_counts(self, counts, errors, floor, total):
+        # 2つの要約を合成し、推定回数の大きい capacity 個だけを残す
+        own_floor = self._floor()
+        merged_counts = {}
+        merged_errors = {}
+        for item in self.counts.keys() | counts.keys():
+            count = self.counts.get(item)
+            error = self.errors.get(item)
+            if count is None:
+                count, error = own_floor, own_floor
+            other_count = counts.get(item)
+            other_error = errors.get(item, 0)
+            if other_count is None:
+                other_count, other_error = floor, floor
+            merged_counts[item] = count + other_count
+            merged_errors[item] = error + other_error
+
+        if len(merged_counts) > self.capacity:
+            kept = heapq.nlargest(self.capacity, merged_counts.items(), key=lambda entry: entry[1])
+            merged_counts = dict(kept)
+            merged_errors = {item: merged_errors[item] for item in merged_counts}
+        self.counts = merged_counts
+        self.errors = merged_errors
+        self.total += total
+
+    def update(self, items):
+        """
+        トークンを数える
+
+        チャンク内の回数を正確に数えてから、誤差0の要約としてスケッチに合成する。
+
+        Parameters:
+        items (iterable): トークン
+        """
+        chunk = Counter()
+        size = 0
+        for item in items:
+            chunk[item] += 1
+            size += 1
+            if size >= CHUNK_TOKENS:
+                self._merge_counts(chunk, {}, 0, size)
+                chunk = Counter()
+                size = 0
+        if size:
+            self._merge_counts(chunk, {}, 0, size)
+        return self
+
+    def merge(self, other):
+        """
+        別のスケッチを合成する
+
+        Parameters:
+        other (SpaceSaving): 合成するスケッチ
+
+        Returns:
+        SpaceSaving: 合成後のスケッチ（自分自身）
+        """
+        self._merge_counts(other.counts, other.errors, other._floor(), other.total)
+        return self
+
+    @property
+    def error_bound(self):
+        """推定回数の誤差の上限（N / capacity）"""
+        return self.total / self.capacity
+
+    def most_common(self, n=None):
+        """
+        推定回数の多い語を返す
+
+        Parameters:
+        n (int): 件数（省略時はすべて）
+
+        Returns:
+        list: (語, 推定回数) のリスト
+        """
+        ranked = sorted(self.counts.items(), key=lambda entry: entry[1], reverse=True)
+        return ranked[:n] if n is not None else ranked
+
+    def guaranteed(self, n=None):
+        """
+        推定回数の多い語と、真の回数の下限を返す
+
+        Parameters:
+        n (int): 件数（省略時はすべて）
+
+        Returns:
+        list: (語, 推定回数, 下限) のリスト
+        """
+        return [(item, count, count - self.errors[item]) for item, count in self.most_common(n)]
+
+
+def streaming_top_words(token_lists, n=30, capacity=10000):
+    """
+    文書ごとのトークン列を1回だけ走査して、頻出語の上位を推定する
+
+    Parameters:
+    token_lists (iterable): 文書ごとのトークンのリスト（ジェネレーターでもよい）
+    n (int): 件数
+    capacity (int): スケッチが保持する語の数
+
+    Returns:
+    list: (語, 推定回数) のリスト
+    """
+    sketch = SpaceSaving(capacity)
+    sketch.update(token for tokens in token_lists for token in tokens)
+    return sketch.most_common(n)
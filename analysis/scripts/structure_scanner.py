@@ -0,0 +1,118 @@
+import re
+
+# 見出し判定（英語）: 数字で始まる行
+EN_NUMBERED_HEADING = re.compile(r'\d+[\.\)]\s')
+# 見出し判定（日本語）: 数字で始まる行、【...】、■●◆で始まる行
+JP_HEADING = re.compile(r'[\d１２３４５６７８９０]+[\.．、]|【.+】$|[■●◆].')
+JP_HEADING_SUFFIXES = ('とは', 'について')
+
+# リスト項目（箇条書き）の記号（記号の後に空白が続く行）
+EN_LIST_ITEM = re.compile(r'\s*[\-\*\•](?=\s|$)')
+JP_LIST_ITEM = re.compile(r'\s*[・※◎○●■□▲△▼▽◆◇★☆→①-⑩]+(?=\s|$)')
+
+# 見出しとみなす行の最大文字数（日本語は英語より文字数少なめ）
+HEADING_MAX_LENGTH = {'en': 100, 'ja': 50}
+
+
+def _is_heading(line, language):
+    # line は前後の空白を除いた空でない行
+    if len(line) >= HEADING_MAX_LENGTH[language]:
+        return False
+    if language == 'en':
+        uppercase_ratio = sum(map(str.isupper, line)) / len(line)
+        return uppercase_ratio > 0.5 or EN_NUMBERED_HEADING.match(line) is not None
+    return line.endswith(JP_HEADING_SUFFIXES) or JP_HEADING.match(line) is not None
+
+
+def scan_structure(text, language='en'):
+    """
+    記事の構造（見出し数、段落数、リスト項目数、段落の平均長）を1回の走査で計算する
+
+    行単位で1度だけ走査し、見出し・段落（空行区切り）・リスト項目を同時に数える。
+    結果は従来の analyze_structure / analyze_jp_structure と一致する。
+
+    Parameters:
+    text (str): 記事の本文
+    language (str): 'en'（英語の判定規則）または 'ja'（日本語の判定規則）
+
+    Returns:
+    dict: {'headings', 'paragraphs', 'lists', 'avg_paragraph_length'}
+    """
+    if not isinstance(text, str) or text == '':
+        return {'headings': 0, 'paragraphs': 0, 'lists': 0, 'avg_paragraph_length': 0}
+
+    list_pattern = EN_LIST_ITEM if language == 'en' else JP_LIST_ITEM
+    lines = text.split('\n')
+    last_index = len(lines) - 1
+
+    headings = 0
+    list_items = 0
+    paragraphs = 0
+    paragraph_chars = 0
+
+    # 段落の途中かどうかと、現在の段落の文字数（末尾の空白は段落の終了時に除く）
+    in_paragraph = False
+    current_length = 0
+    previous_line = ''
+    # 直前のリスト項目が記号だけで終わっている場合、次の空でない行の行頭の空白まで
+    # 1つの項目として扱われる（従来の正規表現 ^\s*[記号]\s+ と同じ挙動）
+    swallow_indent = False
+
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+
+        if not stripped:
+            # 空行は段落の区切り
+            if in_paragraph:
+                paragraph_chars += current_length - (len(previous_line) - len(previous_line.rstrip()))
+                in_paragraph = False
+            continue
+
+        # 見出し
+        if _is_heading(stripped, language):
+            headings += 1
+
+        # 段落
+        if in_paragraph:
+            current_length += 1 + len(line)
+        else:
+            paragraphs += 1
+            in_paragraph = True
+            current_length = len(line.lstrip())
+        previous_line = line
+
+        # リスト項目
+        if swallow_indent and line[0].isspace():
+            swallow_indent = False
+            continue
+        swallow_indent = False
+        match = list_pattern.match(line)
+        if match and (match.end() < len(line) or i < last_index):
+            list_items += 1
+            swallow_indent = i < last_index and line[match.end():].strip() == ''
+
+    if in_paragraph:
+        paragraph_chars += current_length - (len(previous_line) - len(previous_line.rstrip()))
+
+    avg_paragraph_length = paragraph_chars / paragraphs if paragraphs > 0 else 0
+
+    return {
+        'headings': headings,
+        'paragraphs': paragraphs,
+        'lists': list_items,
+        'avg_paragraph_length': avg_paragraph_length
+    }
+
+
+def scan_structure_batch(texts, language='en'):
+    """
+    複数記事の構造をまとめて計算する
+
+    Parameters:
+    texts (list): 記事本文のリスト
+    language (str): 'en' または 'ja'
+
+    Returns:
+    list: 記事ごとの構造の辞書のリスト
+    """
+    return [scan_structure(text, language) for text in texts]
@@ -7,23 +7,43 @@ import numpy as np
 from collections import Counter
 from sklearn.feature_extraction.text import CountVectorizer
 from textblob import TextBlob
+from batch_sentiment import LexiconSentiment, textblob_sentiment, tokenize_en
+from analysis_cache import cached_analysis, CachedAnalyzer, report_hit_rates
+from corpus import latest_data_file
 
 # データ読み込み
-data_folder = os.path.join("..", "data")
-file_path = os.path.join(data_folder, "remote_work_data_en_20250329_165210.csv")
+file_path = latest_data_file('en')
 df_en = pd.read_csv(file_path)
 
 # フォント設定
 plt.rcParams['font.family'] = 'Hiragino Sans'
 
+# 辞書の平均による高速な近似を使う場合はTrue（否定語・強調語を考慮しないため、TextBlobと符号が逆になる記事もある）
+use_lexicon_sentiment = False
+
+# 記事ごとの分析に使うワーカープロセス数（Noneなら環境変数 ANALYSIS_WORKERS または全コア、1ならプロセスを使わない）
+analysis_workers = None
+
+# ワーカープロセスごとにTextBlobの感情辞書を読み込んでおく（最初の記事の分析で読み込まれるのを避ける）
+def init_worker_textblob():
+    TextBlob('warm up').sentiment
+
 # 感情分析関数
+# 記事ごとの分析結果は本文のハッシュ値とバージョンでキャッシュする（分析方法を変えたら version を上げる）
+@cached_analysis(version=1)
 def analyze_sentiment(text):
-    if not isinstance(text, str) or text == '':
-        return {'polarity': 0, 'subjectivity': 0}
-    blob = TextBlob(text)
-    return {'polarity': blob.sentiment.polarity, 'subjectivity': blob.sentiment.subjectivity}
+    return textblob_sentiment(text)
+
+# 辞書の平均による感情分析の近似（use_lexicon_sentiment = True のとき使う）
+def analyze_sentiment_lexicon(text):
+    return en_sentiment_engine.score(tokenize_en(text), mode='mean')
+
+# 複数記事の近似をまとめてベクトル計算する関数
+def analyze_sentiment_lexicon_batch(texts):
+    return en_sentiment_engine.score_many([tokenize_en(text) for text in texts], mode='mean')
 
 # ソリューション指向度を評価する関数
+@cached_analysis(version=1)
 def solution_orientation(text):
     if not isinstance(text, str) or text == '':
         return 0
@@ -53,19 +73,22 @@ def solution_orientation(text):
     solution_ratio = solution_count / (problem_count + solution_count)
     return (solution_ratio - 0.5) * 2  # -1〜1のスケールに変換
 
+en_contents = [c for c in df_en['content'] if isinstance(c, str) and c != '']
+
 # 記事ごとの感情分析とソリューション指向度の評価
-sentiments = []
-solution_scores = []
-titles = []
-
-for i, row in df_en.iterrows():
-    if isinstance(row['content'], str) and row['content'] != '':
-        sentiment = analyze_sentiment(row['content'])
-        solution_score = solution_orientation(row['content'])
-        
-        sentiments.append(sentiment)
-        solution_scores.append(solution_score)
-        titles.append(row['title'] if isinstance(row['title'], str) else '')
+# キャッシュにない記事だけを分析する（結果は en_contents と同じ順）
+if use_lexicon_sentiment:
+    # TextBlobの感情辞書を配列化したバッチ計算エンジン（近似を使うときだけ作る）
+    en_sentiment_engine = LexiconSentiment.from_textblob()
+    # 近似は、キャッシュにない記事をまとめてベクトル計算する
+    cached_lexicon_sentiment = CachedAnalyzer(analyze_sentiment_lexicon, version=1)
+    sentiments = cached_lexicon_sentiment.map(en_contents, batch_function=analyze_sentiment_lexicon_batch)
+else:
+    # TextBlobは記事ごとに複数プロセスで分析する
+    sentiments = analyze_sentiment.map(en_contents, workers=analysis_workers, initializer=init_worker_textblob)
+solution_scores = solution_orientation.map(en_contents, workers=analysis_workers)
+titles = [row['title'] if isinstance(row['title'], str) else ''
+          for _, row in df_en.iterrows() if isinstance(row['content'], str) and row['content'] != '']
 
 # 結果をデータフレームに
 analysis_df = pd.DataFrame({
@@ -106,4 +129,7 @@ plt.close()
 print("\n全体の統計:")
 print(f"平均感情極性: {analysis_df['polarity'].mean():.3f} (-1=ネガティブ, 1=ポジティブ)")
 print(f"平均主観性: {analysis_df['subjectivity'].mean():.3f} (0=客観的, 1=主観的)")
-print(f"平均ソリューション指向度: {analysis_df['solution_score'].mean():.3f} (-1=問題中心, 1=解決策中心)")
\ No newline at end of file
+print(f"平均ソリューション指向度: {analysis_df['solution_score'].mean():.3f} (-1=問題中心, 1=解決策中心)")
+
+# 分析キャッシュのヒット率
+report_hit_rates()
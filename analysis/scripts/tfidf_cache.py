@@ -0,0 +1,166 @@
+import os
+import json
+import shutil
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from corpus import content_hash, cache_path
+
+# 保存形式を変えた場合はバージョンを上げる（古いキャッシュは使われなくなる）
+TFIDF_CACHE_VERSION = 1
+
+
+def corpus_key(texts, params):
+    """
+    コーパスの内容とベクトル化のパラメータからキャッシュのキーを計算する
+
+    Parameters:
+    texts (list): 文書のテキスト
+    params (dict): TfidfVectorizer のパラメータ
+
+    Returns:
+    str: SHA-1の16進ダイジェスト
+    """
+    snapshot = content_hash('\n'.join(content_hash(text) for text in texts))
+    settings = json.dumps(params, sort_keys=True, ensure_ascii=False, default=repr)
+    return content_hash(f"{snapshot}\n{settings}")
+
+
+class TfidfFeatures:
+    """
+    学習済みの TfidfVectorizer（語彙とIDF）と、文書 × 語彙 のTF-IDF行列
+
+    保存したものを読み込めば、トピック数などモデル側の設定を変えても
+    コーパス全体のトークン化とベクトル化をやり直さずに済む。
+    """
+
+    def __init__(self, vectorizer, matrix):
+        """
+        Parameters:
+        vectorizer (TfidfVectorizer): 学習済みのベクトル化器
+        matrix (scipy.sparse.csr_matrix): 文書 × 語彙 のTF-IDF行列
+        """
+        self.vectorizer = vectorizer
+        self.matrix = matrix
+
+    @classmethod
+    def fit(cls, texts, **params):
+        """
+        TfidfVectorizer を学習してTF-IDF行列を作成する
+
+        Parameters:
+        texts (list): 文書のテキスト
+        params: TfidfVectorizer のパラメータ
+
+        Returns:
+        TfidfFeatures: ベクトル化の結果
+        """
+        vectorizer = TfidfVectorizer(**params)
+        matrix = vectorizer.fit_transform(texts)
+        return cls(vectorizer, matrix.tocsr())
+
+    @classmethod
+    def from_texts(cls, texts, name=None, use_cache=True, **params):
+        """
+        TF-IDF行列を作成する（保存済みならそれを読み込む）
+
+        nameを指定した場合は、コーパスの内容とパラメータのハッシュ値をキーとして
+        analysis/cache に保存し、次回以降はそれを読み込む。
+
+        Parameters:
+        texts (iterable): 文書のテキスト（文字列以外は空の文書として扱う）
+        name (str): ベクトル化の用途を表す名前（前処理を変えたら名前も変える）
+        use_cache (bool): キャッシュを使うかどうか
+        params: TfidfVectorizer のパラメータ
+
+        Returns:
+        TfidfFeatures: ベクトル化の結果
+        """
+        texts = [text if isinstance(text, str) else '' for text in texts]
+        if name is None or not use_cache:
+            return cls.fit(texts, **params)
+
+        key = corpus_key(texts, params)
+        directory = os.path.dirname(cache_path('tfidf', f"v{TFIDF_CACHE_VERSION}", name, key, 'matrix.npz'))
+        if os.path.exists(os.path.join(directory, 'params.json')):
+            return cls.load(directory)
+
+        features = cls.fit(texts, **params)
+        features.save(directory)
+        return features
+
+    @property
+    def feature_names(self):
+        """語彙（列の順）"""
+        return self.vectorizer.get_feature_names_out()
+
+    def save(self, directory):
+        """
+        フォルダに保存する（matrix.npz、idf.npy、vocabulary.json、params.json）
+
+        Parameters:
+        directory (str): 保存先のフォルダ
+        """
+        # 書きかけのファイルを読まないよう、一時フォルダに書いてから置き換える
+        tmp_directory = f"{directory}.{os.getpid()}.tmp"
+        os.makedirs(tmp_directory, exist_ok=True)
+        sparse.save_npz(os.path.join(tmp_directory, 'matrix.npz'), self.matrix)
+        np.save(os.path.join(tmp_directory, 'idf.npy'), self.vectorizer.idf_)
+        with open(os.path.join(tmp_directory, 'vocabulary.json'), 'w', encoding='utf-8') as f:
+            json.dump(self.feature_names.tolist(), f, ensure_ascii=False)
+        # パラメータは最後に書く（読み込み時はこのファイルの有無で保存済みか判断する）
+        with open(os.path.join(tmp_directory, 'params.json'), 'w', encoding='utf-8') as f:
+            json.dump(self.vectorizer.get_params(), f, ensure_ascii=False, default=repr)
+        if os.path.isdir(directory):
+            shutil.rmtree(directory, ignore_errors=True)
+        try:
+            os.replace(tmp_directory, directory)
+        except OSError:
+            # 別のプロセスが先に保存した場合はそちらを使う
+            shutil.rmtree(tmp_directory, ignore_errors=True)
+
+    @classmethod
+    def load(cls, directory):
+        """
+        保存したベクトル化の結果を読み込む
+
+        ベクトル化器は保存したパラメータ・語彙・IDFから復元するため、
+        新しい文書の transform にもそのまま使える。
+
+        Parameters:
+        directory (str): 保存先のフォルダ
+
+        Returns:
+        TfidfFeatures: ベクトル化の結果
+        """
+        with open(os.path.join(directory, 'params.json'), encoding='utf-8') as f:
+            params = json.load(f)
+        with open(os.path.join(directory, 'vocabulary.json'), encoding='utf-8') as f:
+            vocabulary = json.load(f)
+        # JSONで表せないパラメータ（dtype や関数など）は既定値のままにする
+        params = {key: value for key, value in params.items() if not (isinstance(value, str) and value.startswith('<'))}
+        if 'ngram_range' in params:
+            params['ngram_range'] = tuple(params['ngram_range'])
+        vectorizer = TfidfVectorizer(**params)
+        vectorizer.vocabulary_ = {token: i for i, token in enumerate(vocabulary)}
+        vectorizer.idf_ = np.load(os.path.join(directory, 'idf.npy'))
+        matrix = sparse.load_npz(os.path.join(directory, 'matrix.npz')).tocsr()
+        return cls(vectorizer, matrix)
+
+
+def cached_tfidf(texts, name=None, use_cache=True, **params):
+    """
+    TF-IDFベクトル化を行い、ベクトル化器と行列を返す（fit_transform の代わり）
+
+    Parameters:
+    texts (iterable): 文書のテキスト
+    name (str): ベクトル化の用途を表す名前（省略時はキャッシュしない）
+    use_cache (bool): キャッシュを使うかどうか
+    params: TfidfVectorizer のパラメータ
+
+    Returns:
+    tuple: (TfidfVectorizer, scipy.sparse.csr_matrix)
+    """
+    features = TfidfFeatures.from_texts(texts, name=name, use_cache=use_cache, **params)
+    return features.vectorizer, features.matrix
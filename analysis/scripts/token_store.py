@@ -0,0 +1,330 @@
+import os
+import json
+import shutil
+import numpy as np
+from scipy import sparse
+
+from corpus import content_hash, cache_path
+
+# 保存形式を変えた場合はバージョンを上げる（古いキャッシュは使われなくなる）
+TOKEN_STORE_VERSION = 1
+
+
+class Vocabulary:
+    """
+    トークン（文字列）と整数ID（int32）の対応表
+
+    IDは最初に出現した順に割り当てる。
+    """
+
+    def __init__(self, tokens=None):
+        self.tokens = []
+        self.ids = {}
+        for token in tokens or []:
+            self.add(token)
+
+    def __len__(self):
+        return len(self.tokens)
+
+    def __contains__(self, token):
+        return token in self.ids
+
+    def add(self, token):
+        """
+        トークンを登録してIDを返す（登録済みならそのIDを返す）
+
+        Parameters:
+        token (str): トークン
+
+        Returns:
+        int: トークンのID
+        """
+        token_id = self.ids.get(token)
+        if token_id is None:
+            token_id = len(self.tokens)
+            self.ids[token] = token_id
+            self.tokens.append(token)
+        return token_id
+
+    def encode(self, tokens):
+        """
+        トークン列をIDの配列に変換する（未登録のトークンは登録する）
+
+        Parameters:
+        tokens (list): トークンのリスト
+
+        Returns:
+        numpy.ndarray: IDの配列（int32）
+        """
+        add = self.add
+        return np.fromiter((add(token) for token in tokens), dtype=np.int32, count=len(tokens))
+
+    def mask(self, predicate):
+        """
+        条件を満たすトークンのIDをTrueにした配列を返す
+
+        Parameters:
+        predicate (callable): トークンを受け取り真偽値を返す関数
+
+        Returns:
+        numpy.ndarray: 語彙数の長さの真偽値配列
+        """
+        return np.fromiter((bool(predicate(token)) for token in self.tokens), dtype=bool, count=len(self.tokens))
+
+
+class TokenStore:
+    """
+    コーパス全体のトークン列を整数IDの1つの配列として保持するストア
+
+    全文書のトークンIDを連結したint32配列と、文書ごとの開始位置（int64、文書数+1）を持つ。
+    文書 i のトークンは ids[offsets[i]:offsets[i + 1]]。
+    ディスクに保存したストアはメモリマップで読み込むため、複数のスクリプトが
+    同じ配列を共有でき、頻度の集計もコピーせずに行える。
+    """
+
+    def __init__(self, vocabulary, ids, offsets):
+        """
+        Parameters:
+        vocabulary (Vocabulary): トークンとIDの対応表
+        ids (numpy.ndarray): 全文書のトークンID（int32）
+        offsets (numpy.ndarray): 文書ごとの開始位置（int64、文書数+1）
+        """
+        self.vocabulary = vocabulary
+        self.ids = ids
+        self.offsets = offsets
+
+    @classmethod
+    def build(cls, token_lists, vocabulary=None):
+        """
+        文書ごとのトークンのリストからストアを作成する
+
+        Parameters:
+        token_lists (iterable): 文書ごとのトークンのリスト
+        vocabulary (Vocabulary): 既存の対応表（省略時は新規に作成）
+
+        Returns:
+        TokenStore: トークンストア
+        """
+        vocabulary = vocabulary if vocabulary is not None else Vocabulary()
+        chunks = []
+        lengths = []
+        for tokens in token_lists:
+            chunks.append(vocabulary.encode(tokens))
+            lengths.append(len(tokens))
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        ids = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.int32)
+        return cls(vocabulary, ids.astype(np.int32, copy=False), offsets)
+
+    @classmethod
+    def from_texts(cls, texts, tokenizer, name=None, use_cache=True):
+        """
+        テキストをトークン化してストアを作成する（保存済みならそれを読み込む）
+
+        nameを指定した場合は、トークン化の名前と全文書の本文のハッシュ値をキーとして
+        analysis/cache に保存し、次回以降はメモリマップで読み込む。
+
+        Parameters:
+        texts (iterable): 文書のテキスト（文字列以外は空の文書として扱う）
+        tokenizer (callable): テキストをトークンのリストに変換する関数
+        name (str): トークン化の方法を表す名前（トークン化の仕様を変えたら名前も変える）
+        use_cache (bool): キャッシュを使うかどうか
+
+        Returns:
+        TokenStore: トークンストア
+        """
+        texts = [text if isinstance(text, str) else '' for text in texts]
+        if name is None or not use_cache:
+            return cls.build(tokenizer(text) for text in texts)
+
+        key = content_hash('\n'.join(content_hash(text) for text in texts))
+        directory = cache_path('token_store', f"v{TOKEN_STORE_VERSION}", name, key, 'ids.npy')
+        directory = os.path.dirname(directory)
+        if os.path.exists(os.path.join(directory, 'vocabulary.json')):
+            return cls.load(directory)
+
+        store = cls.build(tokenizer(text) for text in texts)
+        store.save(directory)
+        return cls.load(directory)
+
+    def save(self, directory):
+        """
+        ストアをフォルダに保存する（ids.npy、offsets.npy、vocabulary.json）
+
+        Parameters:
+        directory (str): 保存先のフォルダ
+        """
+        # 書きかけのファイルを読まないよう、一時フォルダに書いてから置き換える
+        tmp_directory = f"{directory}.{os.getpid()}.tmp"
+        os.makedirs(tmp_directory, exist_ok=True)
+        np.save(os.path.join(tmp_directory, 'ids.npy'), self.ids)
+        np.save(os.path.join(tmp_directory, 'offsets.npy'), self.offsets)
+        with open(os.path.join(tmp_directory, 'vocabulary.json'), 'w', encoding='utf-8') as f:
+            json.dump(self.vocabulary.tokens, f, ensure_ascii=False)
+        if os.path.isdir(directory):
+            shutil.rmtree(directory, ignore_errors=True)
+        try:
+            os.replace(tmp_directory, directory)
+        except OSError:
+            # 別のプロセスが先に保存した場合はそちらを使う
+            shutil.rmtree(tmp_directory, ignore_errors=True)
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        """
+        保存したストアを読み込む
+
+        Parameters:
+        directory (str): 保存先のフォルダ
+        mmap (bool): トークンIDの配列をメモリマップで読み込むかどうか
+
+        Returns:
+        TokenStore: トークンストア
+        """
+        mmap_mode = 'r' if mmap else None
+        ids = np.load(os.path.join(directory, 'ids.npy'), mmap_mode=mmap_mode)
+        offsets = np.load(os.path.join(directory, 'offsets.npy'))
+        with open(os.path.join(directory, 'vocabulary.json'), encoding='utf-8') as f:
+            vocabulary = Vocabulary(json.load(f))
+        return cls(vocabulary, ids, offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    @property
+    def num_tokens(self):
+        return int(self.offsets[-1])
+
+    def document(self, i):
+        """
+        文書のトークンIDを返す（コピーしない）
+
+        Parameters:
+        i (int): 文書番号
+
+        Returns:
+        numpy.ndarray: トークンIDの配列
+        """
+        return self.ids[self.offsets[i]:self.offsets[i + 1]]
+
+    def tokens(self, i):
+        """
+        文書のトークン列を返す
+
+        Parameters:
+        i (int): 文書番号
+
+        Returns:
+        list: トークンのリスト
+        """
+        vocabulary_tokens = self.vocabulary.tokens
+        return [vocabulary_tokens[t] for t in self.document(i).tolist()]
+
+    def _selected_ids(self, docs=None, keep=None):
+        # 指定した文書・トークンのIDを出現順に返す
+        if docs is None:
+            ids = self.ids
+        else:
+            ids = np.concatenate([self.document(i) for i in docs] + [np.zeros(0, dtype=np.int32)])
+        if keep is not None:
+            ids = ids[keep[ids]]
+        return ids
+
+    def counts(self, docs=None, keep=None):
+        """
+        トークンIDごとの出現回数を数える
+
+        Parameters:
+        docs (list): 対象の文書番号（省略時は全文書）
+        keep (numpy.ndarray): 数えるトークンIDをTrueにした真偽値配列（Vocabulary.mask）
+
+        Returns:
+        numpy.ndarray: 語彙数の長さの出現回数の配列
+        """
+        return np.bincount(self._selected_ids(docs, keep), minlength=len(self.vocabulary))
+
+    def most_common(self, n=None, docs=None, keep=None):
+        """
+        頻出トークンを返す（Counter(tokens).most_common(n) と同じ結果）
+
+        同じ回数のトークンは最初に出現した順に並べる。
+
+        Parameters:
+        n (int): 件数（省略時はすべて）
+        docs (list): 対象の文書番号（省略時は全文書）
+        keep (numpy.ndarray): 数えるトークンIDをTrueにした真偽値配列
+
+        Returns:
+        list: (トークン, 出現回数) のリスト
+        """
+        ids = self._selected_ids(docs, keep)
+        unique_ids, first_index, counts = np.unique(ids, return_index=True, return_counts=True)
+        order = np.lexsort((first_index, -counts))[:n]
+        vocabulary_tokens = self.vocabulary.tokens
+        return [(vocabulary_tokens[t], int(c)) for t, c in zip(unique_ids[order].tolist(), counts[order].tolist())]
+
+    def ngram_counts(self, n=2):
+        """
+        文書をまたがないn-gramの出現回数を数える
+
+        Parameters:
+        n (int): n-gramの長さ
+
+        Returns:
+        tuple: (n-gramのトークンIDの配列（n-gram数 × n）, 出現回数の配列)
+        """
+        num_positions = max(self.num_tokens - n + 1, 0)
+        if num_positions == 0:
+            return np.zeros((0, n), dtype=np.int32), np.zeros(0, dtype=np.int64)
+        lengths = np.diff(self.offsets)
+        doc_of_position = np.repeat(np.arange(len(lengths)), lengths)
+        # 開始位置と終了位置が同じ文書に含まれるn-gramだけを数える
+        valid = doc_of_position[:num_positions] == doc_of_position[n - 1:]
+        grams = np.stack([self.ids[k:k + num_positions] for k in range(n)], axis=1)[valid]
+        unique_grams, counts = np.unique(grams, axis=0, return_counts=True)
+        return unique_grams, counts
+
+    def most_common_ngrams(self, n=2, top=None):
+        """
+        頻出n-gramを返す
+
+        Parameters:
+        n (int): n-gramの長さ
+        top (int): 件数（省略時はすべて）
+
+        Returns:
+        list: (トークンのタプル, 出現回数) のリスト（回数の多い順）
+        """
+        grams, counts = self.ngram_counts(n)
+        order = np.argsort(-counts, kind='stable')[:top]
+        vocabulary_tokens = self.vocabulary.tokens
+        return [
+            (tuple(vocabulary_tokens[t] for t in gram), int(count))
+            for gram, count in zip(grams[order].tolist(), counts[order].tolist())
+        ]
+
+    def to_csr(self, keep=None):
+        """
+        文書 × 語彙 の出現回数の疎行列に変換する（CountVectorizer の出力に相当）
+
+        トークンIDの配列をそのまま列番号、文書の開始位置を行の開始位置として使う。
+
+        Parameters:
+        keep (numpy.ndarray): 数えるトークンIDをTrueにした真偽値配列
+
+        Returns:
+        scipy.sparse.csr_matrix: 文書 × 語彙 の出現回数
+        """
+        ids = self.ids
+        offsets = self.offsets
+        if keep is not None:
+            selected = keep[ids]
+            ids = ids[selected]
+            offsets = np.concatenate([[0], np.cumsum(selected)])[offsets]
+        # 同じ語の重複を合計する際に並べ替えるため、メモリマップの配列は複製する
+        matrix = sparse.csr_matrix(
+            (np.ones(len(ids), dtype=np.int64), np.array(ids), np.array(offsets)),
+            shape=(len(self), len(self.vocabulary))
+        )
+        matrix.sum_duplicates()
+        return matrix
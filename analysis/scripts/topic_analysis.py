@@ -8,19 +8,33 @@ from collections import Counter
 from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
 from sklearn.decomposition import LatentDirichletAllocation
 
+from language_id import label_languages
+from tfidf_cache import cached_tfidf
+from online_lda import load_or_create, checkpoint_path
+from corpus import latest_data_file
+
 # フォント設定
 plt.rcParams['font.family'] = 'Hiragino Sans'
 
 # カラーパレット設定
 colors = sns.color_palette("colorblind")
 
-# データフォルダのパス
-data_folder = os.path.join("..", "data")
-file_path = os.path.join(data_folder, "remote_work_all_data_20250329_165210.csv")
+# 英語のトピックモデルを、新しく追加された記事だけで更新するかどうか
+# （オンラインLDA。モデルは analysis/cache/online_lda に保存し、次回の実行で引き継ぐ）
+incremental_lda = False
+# 増分更新のあと、全記事で学習し直したモデルとのトピックのずれを表示するかどうか
+# （全記事でLDAを学習し直すため時間がかかる。確認したいときだけTrueにする）
+report_drift = False
+
+file_path = latest_data_file('all')
 
 # ファイルの読み込み
 df_all = pd.read_csv(file_path)
 
+# 言語の判定結果がない（先頭100文字だけで判定した）データは、本文全体から判定し直す
+if 'language_confidence' not in df_all.columns:
+    df_all = label_languages(df_all)
+
 # 言語ごとにデータを分離
 df_en = df_all[df_all['language'] == 'en']
 df_ja = df_all[df_all['language'] == 'ja']
@@ -55,16 +69,30 @@ print("英語コンテンツのトピックモデリング:")
 en_contents = df_en['content'].fillna('').apply(lambda x: preprocess_text(x, 'en'))
 
 # TF-IDFベクトル化 (改良版パラメータ)
-en_tfidf_vectorizer = TfidfVectorizer(max_features=100, min_df=1, max_df=0.9)
-en_tfidf_matrix = en_tfidf_vectorizer.fit_transform(en_contents)
+# 語彙・IDF・行列はコーパスとパラメータごとに保存し、トピック数を変えても再計算しない
+en_tfidf_vectorizer, en_tfidf_matrix = cached_tfidf(
+    en_contents.tolist(), name='topic_analysis_en', max_features=100, min_df=1, max_df=0.9
+)
 
 # 最適なトピック数を2に設定
 n_topics = 2
-en_lda = LatentDirichletAllocation(n_components=n_topics, random_state=42, max_iter=20)
-en_lda.fit(en_tfidf_matrix)
+if incremental_lda:
+    # 前回までのモデルを、まだ学習していない記事のミニバッチで更新する
+    # （バッチ学習と同じTF-IDFの語彙・特徴量を使い、語彙は最初に学習したときのものに固定する）
+    en_online_lda = load_or_create('topic_analysis_en', n_topics=n_topics, vectorizer=en_tfidf_vectorizer)
+    print(f"新しく学習した記事: {en_online_lda.partial_fit(en_contents)}件（累計 {en_online_lda.num_documents}件）")
+    en_online_lda.save(checkpoint_path('topic_analysis_en'))
+    if report_drift:
+        # 全記事で学習し直した場合とのトピックのずれ（ヘリンジャー距離）
+        print(en_online_lda.drift_report(en_contents)[['topic', 'reference_topic', 'hellinger']])
+    en_lda = en_online_lda.lda
+    en_feature_names = en_online_lda.feature_names
+else:
+    en_lda = LatentDirichletAllocation(n_components=n_topics, random_state=42, max_iter=20)
+    en_lda.fit(en_tfidf_matrix)
+    en_feature_names = en_tfidf_vectorizer.get_feature_names_out()
 
 # 各トピックの上位単語を表示
-en_feature_names = en_tfidf_vectorizer.get_feature_names_out()
 en_top_words_per_topic = []
 
 for topic_idx, topic in enumerate(en_lda.components_):
@@ -99,8 +127,9 @@ if len(df_ja) >= 5:  # 少なくとも5件あれば分析を実施
     ja_contents = df_ja['content'].fillna('').apply(lambda x: preprocess_text(x, 'ja'))
     
     # 日本語用のベクトル化 (パラメータ調整)
-    ja_tfidf_vectorizer = TfidfVectorizer(max_features=100, min_df=1)
-    ja_tfidf_matrix = ja_tfidf_vectorizer.fit_transform(ja_contents)
+    ja_tfidf_vectorizer, ja_tfidf_matrix = cached_tfidf(
+        ja_contents.tolist(), name='topic_analysis_ja', max_features=100, min_df=1
+    )
     
     # トピック数は1か2に (データ量による)
     ja_n_topics = min(2, len(df_ja) // 3)  # データ量に応じて調整
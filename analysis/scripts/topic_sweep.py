@@ -0,0 +1,208 @@
+import os
+import sys
+import time
+import itertools
+from functools import partial
+import numpy as np
+import pandas as pd
+import joblib
+from scipy import sparse
+from sklearn.decomposition import LatentDirichletAllocation, NMF
+
+from corpus import cache_path
+from mapreduce import map_reduce
+from tfidf_cache import cached_tfidf
+
+# 探索するトピック数とシードの既定値
+TOPIC_COUNTS = tuple(range(2, 11))
+SEEDS = (42,)
+METHODS = ('lda', 'nmf')
+# コヒーレンスの計算に使う各トピックの上位語の数
+COHERENCE_WORDS = 10
+
+
+class CoherenceCounts:
+    """
+    トピックコヒーレンス（UMass）の計算に使う、語の文書頻度と共起文書数
+
+    文書 × 語彙 の有無の行列と各語の文書頻度を一度だけ計算しておき、
+    トピックの上位語の組の共起文書数はその列だけの積で求める
+    （語彙 × 語彙 の共起行列全体は作らない）。
+    """
+
+    def __init__(self, matrix):
+        """
+        Parameters:
+        matrix (scipy.sparse.spmatrix): 文書 × 語彙 の行列（出現回数やTF-IDF）
+        """
+        self.presence = sparse.csc_matrix(matrix, dtype=bool).astype(np.int64)
+        self.doc_freq = np.asarray(self.presence.sum(axis=0)).ravel()
+
+    def co_document_counts(self, word_ids):
+        """
+        語の組ごとに、両方を含む文書数を数える
+
+        Parameters:
+        word_ids (list): 語のID
+
+        Returns:
+        numpy.ndarray: 語 × 語 の共起文書数
+        """
+        columns = self.presence[:, word_ids]
+        return (columns.T @ columns).toarray()
+
+    def umass(self, word_ids):
+        """
+        上位語のUMassコヒーレンスを計算する
+
+        上位の語 w_l と下位の語 w_m（l < m）の組について
+        log((D(w_m, w_l) + 1) / D(w_l)) を合計する（0に近いほど語がまとまっている）。
+
+        Parameters:
+        word_ids (list): 重みの大きい順に並べた上位語のID
+
+        Returns:
+        float: コヒーレンス
+        """
+        co_counts = self.co_document_counts(word_ids)
+        doc_freq = self.doc_freq[word_ids]
+        m, l = np.tril_indices(len(word_ids), k=-1)
+        return float(np.sum(np.log((co_counts[m, l] + 1) / np.maximum(doc_freq[l], 1))))
+
+
+def topic_coherence(components, counts, n_words=COHERENCE_WORDS):
+    """
+    全トピックのUMassコヒーレンスの平均を計算する
+
+    Parameters:
+    components (numpy.ndarray): トピック × 語彙 の重み
+    counts (CoherenceCounts): 文書頻度と共起文書数
+    n_words (int): 各トピックの上位語の数
+
+    Returns:
+    float: コヒーレンスの平均
+    """
+    return float(np.mean([counts.umass(topic.argsort()[:-n_words - 1:-1]) for topic in components]))
+
+
+def fit_topic_model(matrix, method, n_topics, seed):
+    """
+    トピックモデルを1つ学習する
+
+    Parameters:
+    matrix (scipy.sparse.spmatrix): 文書 × 語彙 の行列
+    method (str): 'lda' または 'nmf'
+    n_topics (int): トピック数
+    seed (int): 乱数のシード
+
+    Returns:
+    LatentDirichletAllocation or NMF: 学習済みのモデル
+    """
+    if method == 'lda':
+        model = LatentDirichletAllocation(n_components=n_topics, random_state=seed)
+    elif method == 'nmf':
+        model = NMF(n_components=n_topics, random_state=seed)
+    else:
+        raise ValueError(f"未対応の手法です: {method}")
+    return model.fit(matrix)
+
+
+def _fit_jobs(jobs, matrix, counts, n_words):
+    # ワーカーで (手法, トピック数, シード) ごとにモデルを学習し、評価指標を計算する
+    results = []
+    for method, n_topics, seed in jobs:
+        start = time.perf_counter()
+        model = fit_topic_model(matrix, method, n_topics, seed)
+        row = {
+            'method': method,
+            'n_topics': n_topics,
+            'seed': seed,
+            'coherence': topic_coherence(model.components_, counts, n_words),
+            'perplexity': model.perplexity(matrix) if method == 'lda' else np.nan,
+            'reconstruction_error': model.reconstruction_err_ if method == 'nmf' else np.nan,
+            'seconds': time.perf_counter() - start,
+        }
+        results.append((row, model))
+    return results
+
+
+def sweep(matrix, topic_counts=TOPIC_COUNTS, seeds=SEEDS, methods=METHODS, workers=None, n_words=COHERENCE_WORDS):
+    """
+    トピック数・シード・手法の組み合わせごとにモデルを並列に学習し、評価する
+
+    文書 × 語彙 の行列とコヒーレンス用の頻度は一度だけ計算し、全ワーカーで共有する。
+    結果はコヒーレンスの高い順に並べる（パープレキシティはLDA、再構成誤差はNMFのみ）。
+
+    Parameters:
+    matrix (scipy.sparse.spmatrix): 文書 × 語彙 の行列
+    topic_counts (iterable): トピック数
+    seeds (iterable): 乱数のシード
+    methods (iterable): 'lda'、'nmf'
+    workers (int): ワーカープロセス数
+    n_words (int): コヒーレンスに使う上位語の数
+
+    Returns:
+    tuple: (評価の表（pandas.DataFrame）, 表の行と同じ順のモデルのリスト)
+    """
+    jobs = list(itertools.product(methods, topic_counts, seeds))
+    counts = CoherenceCounts(matrix)
+    # 1シャードに1件ずつ割り当て、結果は jobs の順に連結される
+    results = map_reduce(
+        jobs, partial(_fit_jobs, matrix=matrix, counts=counts, n_words=n_words),
+        workers=workers, num_shards=len(jobs)
+    )
+    table = pd.DataFrame([row for row, _ in results])
+    models = [model for _, model in results]
+    if len(table):
+        order = table['coherence'].sort_values(ascending=False, kind='stable').index
+        table = table.loc[order].reset_index(drop=True)
+        models = [models[i] for i in order]
+        table.insert(0, 'rank', np.arange(1, len(table) + 1))
+    return table, models
+
+
+def save_best(table, models, feature_names, name):
+    """
+    評価の表と最も良いモデルを保存する（analysis/cache/topic_sweep/<name>/）
+
+    Parameters:
+    table (pandas.DataFrame): sweep の評価の表
+    models (list): sweep のモデルのリスト
+    feature_names (list): 語彙（モデルの列の順）
+    name (str): 探索の名前
+
+    Returns:
+    str: 保存したモデルのファイル
+    """
+    path = cache_path('topic_sweep', name, 'best_model.joblib')
+    table.to_csv(os.path.join(os.path.dirname(path), 'sweep.csv'), index=False, encoding='utf-8-sig')
+    best = {
+        'model': models[0],
+        'feature_names': list(feature_names),
+        'params': table.iloc[0].to_dict(),
+    }
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    joblib.dump(best, tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+
+if __name__ == "__main__":
+    # 使い方: python topic_sweep.py 入力CSV [最小トピック数] [最大トピック数] [シード数]
+    # 記事本文のTF-IDF行列（キャッシュを共有）で、LDAとNMFのトピック数を探索する
+    if len(sys.argv) < 2:
+        print("使い方: python topic_sweep.py 入力CSV [最小トピック数] [最大トピック数] [シード数]")
+        sys.exit(1)
+    input_path = sys.argv[1]
+    min_topics = int(sys.argv[2]) if len(sys.argv) > 2 else TOPIC_COUNTS[0]
+    max_topics = int(sys.argv[3]) if len(sys.argv) > 3 else TOPIC_COUNTS[-1]
+    num_seeds = int(sys.argv[4]) if len(sys.argv) > 4 else len(SEEDS)
+
+    contents = [c for c in pd.read_csv(input_path)['content'] if isinstance(c, str) and c != '']
+    vectorizer, tfidf = cached_tfidf(contents, name='topic_sweep', max_df=0.95, min_df=2, stop_words='english')
+    print(f"{len(contents)}文書, 語彙 {tfidf.shape[1]}語")
+
+    table, models = sweep(tfidf, topic_counts=range(min_topics, max_topics + 1), seeds=range(42, 42 + num_seeds))
+    print(table.to_string(index=False))
+    name = os.path.splitext(os.path.basename(input_path))[0]
+    print(f"最も良いモデル: {save_best(table, models, vectorizer.get_feature_names_out(), name)}")
@@ -4,6 +4,7 @@ import numpy as np
 import matplotlib.pyplot as plt
 from wordcloud import WordCloud
 import matplotlib.font_manager as fm
+from corpus import latest_data_file
 
 # フォント設定
 plt.rcParams['font.family'] = 'Hiragino Sans'
@@ -13,9 +14,8 @@ plt.rcParams['font.family'] = 'Hiragino Sans'
 font_path = '/System/Library/Fonts/ヒラギノ角ゴシック W4.ttc'  # または適切なパスに変更
 
 # データ読み込み
-data_folder = os.path.join("..", "data")
-jp_file_path = os.path.join(data_folder, "remote_work_data_jp_20250329_165210.csv")
-en_file_path = os.path.join(data_folder, "remote_work_data_en_20250329_165210.csv")
+jp_file_path = latest_data_file('jp')
+en_file_path = latest_data_file('en')
 
 df_jp = pd.read_csv(jp_file_path)
 df_en = pd.read_csv(en_file_path)
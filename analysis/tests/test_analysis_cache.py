@@ -0,0 +1,59 @@
+from analysis_cache import AnalysisCache, CachedAnalyzer
+
+TEXTS = ["remote work", "async meetings", "remote work", "", None]
+
+
+def _counting(calls):
+    def word_count(text):
+        calls.append(text)
+        return {'words': len(text.split()) if isinstance(text, str) else 0}
+    return word_count
+
+
+def test_results_are_reused(tmp_path):
+    cache = AnalysisCache(str(tmp_path / "cache.sqlite"))
+    calls = []
+    analyzer = CachedAnalyzer(_counting(calls), version=1, cache=cache)
+    first = analyzer.map(TEXTS)
+    assert first == [{'words': 2}, {'words': 2}, {'words': 2}, {'words': 0}, {'words': 0}]
+    # 同じ本文は1回だけ計算し、空・文字列以外の本文はキャッシュしない
+    assert calls == ["remote work", "async meetings", "", None]
+
+    calls.clear()
+    again = CachedAnalyzer(_counting(calls), version=1, cache=cache)
+    assert again.map(TEXTS) == first
+    assert again("async meetings") == {'words': 2}
+    assert calls == ["", None]
+    assert again.hits == 4 and again.misses == 0
+
+
+def test_version_bump_invalidates_old_results(tmp_path):
+    cache = AnalysisCache(str(tmp_path / "cache.sqlite"))
+    CachedAnalyzer(lambda text: 'old', name='analyzer', version=1, cache=cache).map(TEXTS[:2])
+
+    calls = []
+
+    def new_analyzer(text):
+        calls.append(text)
+        return 'new'
+
+    bumped = CachedAnalyzer(new_analyzer, name='analyzer', version=2, cache=cache)
+    assert bumped.map(TEXTS[:2]) == ['new', 'new']
+    assert calls == TEXTS[:2]
+    assert bumped.misses == 2 and bumped.hits == 0
+    # 古いバージョンの結果は、そのバージョンを指定した場合だけ使われる
+    assert CachedAnalyzer(new_analyzer, name='analyzer', version=1, cache=cache)("remote work") == 'old'
+
+
+def test_batch_function_gets_only_missing_texts(tmp_path):
+    cache = AnalysisCache(str(tmp_path / "cache.sqlite"))
+    batches = []
+
+    def batch(texts):
+        batches.append(list(texts))
+        return [len(text) for text in texts]
+
+    analyzer = CachedAnalyzer(len, name='length', version=1, cache=cache)
+    assert analyzer.map(["ab", "abc"], batch_function=batch) == [2, 3]
+    assert analyzer.map(["abc", "abcd", "ab"], batch_function=batch) == [3, 4, 2]
+    assert batches == [["ab", "abc"], ["abcd"]]
@@ -0,0 +1,80 @@
+import pytest
+
+from batch_sentiment import LexiconSentiment, textblob_sentiment, tokenize_en
+
+# jp_data_analysis.py の感情極性辞書の一部
+JP_SENTIMENT_DICT = {
+    "良い": 1, "便利": 1, "快適": 1, "効率": 1, "向上": 1, "自由": 1, "集中": 1,
+    "問題": -1, "課題": -1, "不安": -1, "孤独": -1, "ストレス": -1, "負担": -1,
+}
+
+# 形態素解析で名詞・動詞・形容詞・副詞を取り出した後の単語列
+JP_DOCS = [
+    ["リモートワーク", "便利", "通勤", "ない", "快適"],
+    ["孤独", "不安", "ストレス", "問題", "良い"],
+    ["会議", "資料", "共有"],
+    [],
+    ["集中", "集中", "集中"],
+    ["効率", "向上", "課題", "在宅", "勤務", "自由", "時間"],
+]
+
+SENTENCES = [
+    "I am not happy with remote work, it is very bad.",
+    "Remote work is a great way to improve focus and productivity.",
+    "The meeting was not very useful.",
+]
+
+
+def analyze_jp_sentiment_words(words):
+    # 変更前の analyze_jp_sentiment の感情スコア計算（形態素解析の後の部分）
+    sentiment_score = 0
+    sentiment_words = 0
+    for word in words:
+        if word in JP_SENTIMENT_DICT:
+            sentiment_score += JP_SENTIMENT_DICT[word]
+            sentiment_words += 1
+    polarity = sentiment_score / max(sentiment_words, 1)
+    subjectivity = min(1.0, sentiment_words / max(len(words), 1))
+    return {'polarity': polarity, 'subjectivity': subjectivity}
+
+
+@pytest.mark.parametrize("words", JP_DOCS)
+def test_score_matches_analyze_jp_sentiment(words):
+    engine = LexiconSentiment(JP_SENTIMENT_DICT)
+    assert engine.score(words) == pytest.approx(analyze_jp_sentiment_words(words))
+
+
+def test_score_batch_matches_analyze_jp_sentiment():
+    polarity, subjectivity = LexiconSentiment(JP_SENTIMENT_DICT).score_batch(JP_DOCS)
+    expected = [analyze_jp_sentiment_words(words) for words in JP_DOCS]
+    assert polarity.tolist() == pytest.approx([e['polarity'] for e in expected])
+    assert subjectivity.tolist() == pytest.approx([e['subjectivity'] for e in expected])
+
+
+def test_score_empty_and_no_hit_documents():
+    engine = LexiconSentiment(JP_SENTIMENT_DICT)
+    assert engine.score([]) == {'polarity': 0.0, 'subjectivity': 0.0}
+    assert engine.score(["会議", "資料"]) == {'polarity': 0.0, 'subjectivity': 0.0}
+    # 全文書が空でも文書数分の結果を返す
+    polarity, subjectivity = engine.score_batch([[], []])
+    assert polarity.tolist() == [0.0, 0.0]
+    assert subjectivity.tolist() == [0.0, 0.0]
+
+
+def test_textblob_sentiment_handles_negation():
+    # 辞書の平均（近似）では否定語を考慮しないため、符号が逆になる
+    text = SENTENCES[0]
+    assert textblob_sentiment(text)['polarity'] < 0
+    assert LexiconSentiment.from_textblob().score(tokenize_en(text), mode='mean')['polarity'] > 0
+
+
+def test_textblob_sentiment_empty_text():
+    assert textblob_sentiment('') == {'polarity': 0, 'subjectivity': 0}
+    assert textblob_sentiment(None) == {'polarity': 0, 'subjectivity': 0}
+
+
+def test_score_many_matches_analyze_jp_sentiment():
+    results = LexiconSentiment(JP_SENTIMENT_DICT).score_many(JP_DOCS)
+    assert len(results) == len(JP_DOCS)
+    for words, result in zip(JP_DOCS, results):
+        assert result == pytest.approx(analyze_jp_sentiment_words(words))
@@ -0,0 +1,60 @@
+import re
+from collections import Counter
+
+import pytest
+
+import char_stats
+from char_stats import SCRIPTS, CharHistogram, count_characters, script_counts
+
+TEXTS = [
+    "リモートワークの生産性について。在宅勤務 remote work 2025年",
+    None,
+    "",
+    "テレワーク、ワーケーション、会議😀😀",
+    "ｶﾀｶﾅ ｶﾞｲﾄﾞ　全角スペース",
+]
+
+
+def legacy_count_characters(texts, n=30):
+    # 変更前の count_characters（japanese-text-analysis.py）
+    chars = []
+    for text in texts:
+        if isinstance(text, str):
+            chars.extend(list(re.sub(r'[\s0-9a-zA-Z]', '', text)))
+    return Counter(chars).most_common(n)
+
+
+def legacy_script_counts(text):
+    # 文字ごとに範囲を判定して数える
+    counts = dict.fromkeys(SCRIPTS, 0)
+    for char in text:
+        for script, (start, end) in char_stats.SCRIPT_RANGES.items():
+            if start <= ord(char) <= end:
+                counts[script] += 1
+                break
+        else:
+            counts['other'] += 1
+    return [counts[script] for script in SCRIPTS]
+
+
+@pytest.mark.parametrize("n", [5, 30, None])
+def test_count_characters_matches_counter(n):
+    assert count_characters(TEXTS, n=n) == legacy_count_characters(TEXTS, n=n)
+
+
+def test_histogram_across_chunks_matches_counter(monkeypatch):
+    # テキストを複数のチャンクに分けて変換しても、出現順と回数は変わらない
+    monkeypatch.setattr(char_stats, 'CHUNK_CHARS', 10)
+    histogram = CharHistogram().add(TEXTS)
+    chars = [c for text in TEXTS if isinstance(text, str) for c in text]
+    assert histogram.most_common() == Counter(chars).most_common()
+    assert histogram.num_chars == len(chars)
+
+
+def test_script_counts():
+    counts = script_counts(TEXTS)
+    assert counts.shape == (len(TEXTS), len(SCRIPTS))
+    for row, text in zip(counts.tolist(), TEXTS):
+        assert row == legacy_script_counts(text if isinstance(text, str) else '')
+    totals = CharHistogram().add(TEXTS).script_totals()
+    assert [totals[script] for script in SCRIPTS] == counts.sum(axis=0).tolist()
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+import clustering
+from clustering import assign_clusters, load_assignments
+
+
+def _cache_path(tmp_path):
+    def cache_path(*parts):
+        path = tmp_path.joinpath(*parts)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return str(path)
+    return cache_path
+
+
+def _features(n, seed):
+    rng = np.random.default_rng(seed)
+    # 3つの離れた群の特徴量
+    centers = np.array([[0.0, 0.0], [10.0, 0.0], [0.0, 10.0]])
+    points = centers[np.arange(n) % 3] + rng.normal(scale=0.5, size=(n, 2))
+    return pd.DataFrame(points, columns=['word_count', 'sentiment'])
+
+
+def test_existing_labels_stay_stable(tmp_path, monkeypatch):
+    monkeypatch.setattr(clustering, 'cache_path', _cache_path(tmp_path))
+    doc_ids = np.arange(30)
+    first, _ = assign_clusters('test', doc_ids, _features(30, 0), n_clusters=3)
+    assert set(first.tolist()) == {0, 1, 2}
+
+    # 既存の記事の特徴量や並び順が変わっても、既存の記事のクラスター番号は変わらない
+    new_ids = np.arange(30, 40)
+    all_ids = np.concatenate([new_ids, doc_ids[::-1]])
+    features = pd.concat([_features(10, 1), _features(30, 2)], ignore_index=True)
+    labels, _ = assign_clusters('test', all_ids, features, n_clusters=3)
+    assert labels[10:].tolist() == first[::-1].tolist()
+    assert set(labels[:10].tolist()) <= {0, 1, 2}
+
+    saved = load_assignments('test')
+    assert sorted(saved.index.tolist()) == list(range(40))
+    assert saved.loc[all_ids].tolist() == labels.tolist()
+
+
+def test_new_articles_join_the_matching_cluster(tmp_path, monkeypatch):
+    monkeypatch.setattr(clustering, 'cache_path', _cache_path(tmp_path))
+    first, _ = assign_clusters('test', np.arange(30), _features(30, 0), n_clusters=3)
+    # 新しい記事は同じ群の既存の記事と同じクラスターになる
+    labels, _ = assign_clusters('test', np.arange(30, 36), _features(6, 3), n_clusters=3)
+    assert labels.tolist() == first[:6].tolist()
+
+
+def test_refit_when_settings_change(tmp_path, monkeypatch):
+    monkeypatch.setattr(clustering, 'cache_path', _cache_path(tmp_path))
+    assign_clusters('test', np.arange(30), _features(30, 0), n_clusters=3)
+    # クラスター数が変わった場合は全記事で学習し直す
+    labels, clusterer = assign_clusters('test', np.arange(30), _features(30, 0), n_clusters=2)
+    assert clusterer.n_clusters == 2
+    assert set(labels.tolist()) == {0, 1}
+    assert load_assignments('test').max() == 1
@@ -0,0 +1,159 @@
+import random
+import re
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from cooccurrence import (category_cooccurrence, category_count_matrix, cooccurrence_edges, find_cooccurring_terms,
+                          presence_gram)
+
+
+def legacy_find_cooccurring_terms(texts, target_terms, window=10):
+    # 変更前の find_cooccurring_terms（japanese-text-analysis.py）
+    cooccurrences = {}
+    for term in target_terms:
+        cooccurrences[term] = Counter()
+    for text in texts:
+        if not isinstance(text, str):
+            continue
+        for term in target_terms:
+            positions = [m.start() for m in re.finditer(term, text)]
+            for pos in positions:
+                start = max(0, pos - window)
+                end = min(len(text), pos + len(term) + window)
+                context = text[start:end]
+                for other_term in target_terms:
+                    if other_term != term and other_term in context:
+                        cooccurrences[term][other_term] += 1
+    return cooccurrences
+
+
+def assert_same_counters(result, expected):
+    assert list(result) == list(expected)
+    for term in expected:
+        # 件数だけでなく、追加順（most_commonの同点順）も一致する
+        assert list(result[term].items()) == list(expected[term].items())
+        assert result[term].most_common() == expected[term].most_common()
+
+
+TEXTS = [
+    "リモートワークとテレワークと在宅勤務の違いについて",
+    "在宅勤務でも生産性は上がる。コミュニケーションが課題だが、テレワークの生産性は高い。",
+    None,
+    "リモートワーク" * 3,
+    "",
+    "生産性の話。" + "あ" * 30 + "テレワーク",
+]
+
+
+def test_matches_legacy_on_core_terms():
+    terms = ['リモートワーク', 'テレワーク', '在宅勤務', 'コミュニケーション', '生産性']
+    assert_same_counters(find_cooccurring_terms(TEXTS, terms), legacy_find_cooccurring_terms(TEXTS, terms))
+
+
+def test_matches_legacy_with_prefix_terms():
+    # 'リモート' は 'リモートワーク' の接頭辞（同じ位置から両方が出現する）
+    terms = ['リモートワーク', 'リモート', 'ワーク', 'テレワーク']
+    texts = ["リモートワークとテレワーク", "リモート会議とワークショップ", "テレワーク、リモート"]
+    assert_same_counters(find_cooccurring_terms(texts, terms), legacy_find_cooccurring_terms(texts, terms))
+
+
+def test_matches_legacy_with_overlapping_terms():
+    # 'ああ' は 'あああ' の中で重なって出現するが、re.finditer は重ならない出現だけを返す
+    terms = ['ああ', 'あい', 'いあ']
+    texts = ["あああいあああ", "ああいああい", "いあいあいあ"]
+    assert_same_counters(find_cooccurring_terms(texts, terms, window=2),
+                         legacy_find_cooccurring_terms(texts, terms, window=2))
+
+
+def test_most_common_tie_order_follows_first_cooccurrence():
+    # 'C' と 'B' は同じ回数だが、先に共起した 'C' が先に並ぶ
+    terms = ['A', 'B', 'C']
+    texts = ["A C ........... A B"]
+    result = find_cooccurring_terms(texts, terms, window=3)
+    expected = legacy_find_cooccurring_terms(texts, terms, window=3)
+    assert result['A'].most_common() == expected['A'].most_common() == [('C', 1), ('B', 1)]
+
+
+@pytest.mark.parametrize("window", [0, 1, 3, 10])
+def test_matches_legacy_randomized(window):
+    terms = ['ab', 'b', 'aba', 'ca', 'bb']
+    rng = random.Random(window)
+    texts = [''.join(rng.choice('abc ') for _ in range(rng.randint(0, 40))) for _ in range(200)]
+    assert_same_counters(find_cooccurring_terms(texts, terms, window=window),
+                         legacy_find_cooccurring_terms(texts, terms, window=window))
+
+
+# remote job search success.py のスキルカテゴリ（一部）
+SKILLS = {
+    'communication': ['communication', 'Slack', 'zoom'],
+    'self_management': ['time management', 'focus', 'discipline'],
+    'technical': ['python', 'cloud', 'Zoom'],
+    'empty': ['blockchain'],
+}
+
+SKILL_TEXTS = [
+    "Good communication on Slack and Zoom matters. Focus!",
+    "Python and cloud skills. python again, and ZOOM calls.",
+    None,
+    "Time management and discipline help you focus.",
+    "Nothing relevant here.",
+    "communication, python, time management",
+]
+
+
+def legacy_skill_counts(texts, skills):
+    # 変更前の skill_mentions / skill_matrix の計算
+    all_contents = [text for text in texts if isinstance(text, str)]
+    combined_text = ' '.join(all_contents)
+    mentions = {category: 0 for category in skills}
+    for category, keywords in skills.items():
+        for keyword in keywords:
+            mentions[category] += combined_text.lower().count(keyword.lower())
+
+    categories = list(skills.keys())
+    skill_matrix = np.zeros((len(categories), len(categories)))
+    for content in all_contents:
+        category_presence = {}
+        for cat, keywords in skills.items():
+            category_presence[cat] = any(keyword.lower() in content.lower() for keyword in keywords)
+        for i, cat1 in enumerate(categories):
+            for j, cat2 in enumerate(categories):
+                if i < j and category_presence[cat1] and category_presence[cat2]:
+                    skill_matrix[i, j] += 1
+                    skill_matrix[j, i] += 1
+    return mentions, skill_matrix
+
+
+def test_category_counts_match_legacy():
+    doc_category = category_count_matrix(SKILL_TEXTS, SKILLS)
+    mentions, skill_matrix = legacy_skill_counts(SKILL_TEXTS, SKILLS)
+    assert doc_category.shape == (len(SKILL_TEXTS), len(SKILLS))
+    assert dict(zip(SKILLS, np.asarray(doc_category.sum(axis=0)).ravel().tolist())) == mentions
+    assert np.array_equal(category_cooccurrence(doc_category).toarray(), skill_matrix)
+
+
+def test_cooccurrence_edges():
+    labels = list(SKILLS)
+    matrix = category_cooccurrence(category_count_matrix(SKILL_TEXTS, SKILLS))
+    edges = cooccurrence_edges(matrix, labels)
+    # 上三角の0でない要素を行・列の順に、(ノード1, ノード2, 重み) で返す
+    assert edges == [
+        ('communication', 'self_management', 2),
+        ('communication', 'technical', 3),
+        ('self_management', 'technical', 2),
+    ]
+    assert all(len(edge) == 3 and isinstance(edge[2], int) for edge in edges)
+    assert cooccurrence_edges(category_cooccurrence(category_count_matrix([], SKILLS)), labels) == []
+
+
+def test_presence_gram_sums_over_shards():
+    doc_category = category_count_matrix(SKILL_TEXTS, SKILLS)
+    gram = presence_gram(doc_category).toarray()
+    # 対角成分は各カテゴリが現れる文書数
+    assert np.diag(gram).tolist() == (doc_category.toarray() > 0).sum(axis=0).tolist()
+    # 文書の集まりごとに求めた結果の和は、全文書で求めた結果と一致する
+    shards = [SKILL_TEXTS[:2], SKILL_TEXTS[2:5], SKILL_TEXTS[5:]]
+    total = sum(presence_gram(category_count_matrix(shard, SKILLS)).toarray() for shard in shards)
+    assert np.array_equal(total, gram)
@@ -0,0 +1,33 @@
+import pandas as pd
+
+from feature_store import FeatureStore
+
+
+def _features(doc_ids, value):
+    return pd.DataFrame({'doc_id': doc_ids, 'polarity': [value] * len(doc_ids)})
+
+
+def test_read_returns_last_written_version_per_article(tmp_path):
+    store = FeatureStore(root=str(tmp_path))
+    store.upsert('sentiment', _features([1], 0.1), 'v1', texts=['a'])
+    store.upsert('sentiment', _features([1], 0.2), 'v2', texts=['a'])
+    # 別の記事を古いバージョンで書き込んでも、記事1は v2 のまま
+    store.upsert('sentiment', _features([3], 0.3), 'v1', texts=['c'])
+
+    latest = store.read('sentiment', ['polarity', 'feature_version']).set_index('doc_id')
+    assert latest.loc[1, 'feature_version'] == 'v2'
+    assert latest.loc[1, 'polarity'] == 0.2
+    assert latest.loc[3, 'feature_version'] == 'v1'
+    assert len(store.read('sentiment', ['polarity'], version='v1')) == 2
+
+
+def test_rewriting_a_version_makes_it_latest(tmp_path):
+    store = FeatureStore(root=str(tmp_path))
+    store.upsert('sentiment', _features([1], 0.1), 'v1', texts=['a'])
+    store.upsert('sentiment', _features([1], 0.2), 'v2', texts=['a'])
+    store.upsert('sentiment', _features([1], 0.5), 'v1', texts=['a'])
+
+    latest = store.read('sentiment', ['polarity', 'feature_version'])
+    assert latest['feature_version'].tolist() == ['v1']
+    assert latest['polarity'].tolist() == [0.5]
+    assert 'write_seq' not in store.columns('sentiment')
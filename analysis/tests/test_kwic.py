@@ -0,0 +1,73 @@
+from kwic import KWICIndex
+
+TEXTS = [
+    "Remote work needs good communication. Slack helps communication a lot.",
+    None,
+    "Our team uses Slack every day.",
+    "Communication is key.",
+    "Remote work needs good communication. Slack helps communication a lot.",
+]
+CATEGORIES = {'communication': ['communication', 'slack']}
+
+
+def test_snippets_follow_keyword_then_document_order():
+    index = KWICIndex(TEXTS, categories=CATEGORIES)
+    snippets = index.snippets('communication', window=10)
+    assert [(s['keyword'], s['doc']) for s in snippets] == [
+        ('communication', 0), ('communication', 3), ('communication', 4),
+        ('slack', 0), ('slack', 2), ('slack', 4),
+    ]
+    # 文書ごとに最初の出現だけを使い、位置は str.find と同じ
+    assert snippets[0]['offset'] == TEXTS[0].lower().find('communication')
+    assert snippets[0]['text'] == TEXTS[0][snippets[0]['start']:snippets[0]['end']].strip()
+
+
+def test_paging_splits_the_full_list():
+    index = KWICIndex(TEXTS, categories=CATEGORIES)
+    all_snippets = index.snippets('communication', window=10)
+    pages = [index.snippets('communication', window=10, top_n=4, page=page) for page in range(3)]
+    assert pages[0] == all_snippets[:4]
+    assert pages[1] == all_snippets[4:]
+    assert pages[2] == []
+
+
+def test_paging_stops_once_the_page_is_filled():
+    index = KWICIndex(TEXTS, categories=CATEGORIES)
+    cut = []
+    original = index._iter_snippets
+
+    def counting_iter(*args):
+        for snippet in original(*args):
+            cut.append(snippet)
+            yield snippet
+
+    index._iter_snippets = counting_iter
+    assert len(index.snippets('communication', window=10, top_n=2)) == 2
+    assert len(cut) == 2
+
+
+def test_dedup_drops_identical_snippets():
+    index = KWICIndex(TEXTS, categories=CATEGORIES)
+    snippets = index.snippets('communication', window=10, dedup=True)
+    # 文書4の 'communication' は文書0と同じ文面なので除かれる
+    # 文書0の 'slack' は同じ文書の 'communication' の範囲と重なるので除かれ、文書4の 'slack' が残る
+    assert [(s['keyword'], s['doc']) for s in snippets] == [
+        ('communication', 0), ('communication', 3), ('slack', 2), ('slack', 4),
+    ]
+
+
+def test_dedup_drops_overlapping_snippets_in_a_document():
+    index = KWICIndex(TEXTS[:1], categories=CATEGORIES)
+    without_dedup = index.snippets('communication', window=40, first_only=False)
+    assert len(without_dedup) == 3
+    snippets = index.snippets('communication', window=40, first_only=False, dedup=True)
+    # 最初のスニペットと範囲が重なる残りの出現は除かれる
+    assert snippets == without_dedup[:1]
+
+
+def test_min_length_and_documents():
+    index = KWICIndex(TEXTS, categories=CATEGORIES, keywords=['team'])
+    assert index.documents('communication').tolist() == [0, 2, 3, 4]
+    assert index.documents('team').tolist() == [2]
+    assert index.documents('missing').tolist() == []
+    assert all(len(s['text']) >= 30 for s in index.snippets('communication', window=20, min_length=30))
@@ -0,0 +1,52 @@
+import pandas as pd
+import pytest
+
+from language_id import CONFIDENT_LETTERS, identify_language, identify_languages, label_languages, letter_counts
+
+EN = "Remote work lets teams focus on deep work without long commutes every day."
+JA = "リモートワークの導入により、多くの企業で働き方が大きく変わりました。在宅勤務の課題も見えてきました。"
+# 英語の記事の中に日本語の引用がある（日本語の割合は閾値の間）
+MIXED = "Many companies in Japan call it テレワーク or 在宅勤務, and the term リモートワーク is also common."
+# かなを含まない漢字（中国語）は日本語の文字として数えないため、英語と判定される
+ZH = "远程办公已经成为许多公司的常态，员工可以在家中完成大部分工作任务。" + " Remote work is now common everywhere."
+
+
+def test_letter_counts():
+    counts = letter_counts(["abcあア漢 123!", None])
+    assert counts.tolist() == [[5, 3, 2, 1], [0, 0, 0, 0]]
+
+
+@pytest.mark.parametrize("text, expected", [
+    (EN, 'en'),
+    (JA, 'ja'),
+    (MIXED, 'mixed'),
+    (ZH, 'en'),
+    ("OK 123", 'unknown'),
+    ("", 'unknown'),
+    (None, 'unknown'),
+])
+def test_identify_language(text, expected):
+    label, confidence = identify_language(text)
+    assert label == expected
+    assert 0.0 <= confidence <= 1.0
+    if expected == 'unknown':
+        assert confidence == 0.0
+
+
+def test_confidence_grows_with_length():
+    _, short = identify_language(EN)
+    _, long = identify_language(EN * 5)
+    assert short < long == pytest.approx(1.0)
+    assert len([c for c in EN * 5 if c.isalpha()]) >= CONFIDENT_LETTERS
+
+
+def test_batch_matches_single_and_labels_dataframe():
+    texts = [EN, JA, MIXED, None]
+    labels, confidence = identify_languages(texts)
+    assert labels == [identify_language(text)[0] for text in texts]
+    assert confidence.tolist() == pytest.approx([identify_language(text)[1] for text in texts])
+
+    df = pd.DataFrame({'content': texts, 'language': ['ja', 'ja', 'ja', 'ja']})
+    labelled = label_languages(df)
+    assert labelled['language'].tolist() == labels
+    assert df['language'].tolist() == ['ja', 'ja', 'ja', 'ja']
@@ -0,0 +1,19 @@
+from collections import Counter
+
+from mapreduce import map_reduce
+
+
+def count_words(texts):
+    return Counter(word for text in texts for word in text.split()), len(texts)
+
+
+def test_map_reduce_matches_serial():
+    texts = [f"remote work {i % 3}" for i in range(100)]
+    assert map_reduce(texts, count_words, workers=2) == count_words(texts)
+
+
+def test_map_reduce_empty_input_returns_empty_partial():
+    # 呼び出し側がそのまま添字参照・アンパックできるよう、件数0の集計を返す
+    counts, num_texts = map_reduce([], count_words, workers=2)
+    assert counts == Counter()
+    assert num_texts == 0
@@ -0,0 +1,38 @@
+import numpy as np
+from sklearn.decomposition import NMF
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+import model_registry
+from model_registry import list_versions, load_model, register_model
+
+TEXTS = ["remote work tools", "slack zoom meeting", "remote team meeting", "focus time at home"]
+
+
+def _fit(texts):
+    vectorizer = TfidfVectorizer()
+    model = NMF(n_components=2, random_state=0, init='nndsvda', max_iter=1000).fit(vectorizer.fit_transform(texts))
+    return vectorizer, model
+
+
+def test_register_reuses_unchanged_model(tmp_path, monkeypatch):
+    monkeypatch.setattr(model_registry, 'REGISTRY_DIR', str(tmp_path))
+    first = register_model('nmf', *_fit(TEXTS))
+    # 同じデータで学習し直しても、内容が同じなら新しいバージョンを作らない
+    assert register_model('nmf', *_fit(TEXTS)) == first
+    assert list_versions('nmf') == [first]
+
+    second = register_model('nmf', *_fit(TEXTS + ["async communication"]))
+    assert second != first
+    assert list_versions('nmf') == [first, second]
+    assert load_model('nmf').metadata['version'] == second
+
+
+def test_register_prunes_old_versions(tmp_path, monkeypatch):
+    monkeypatch.setattr(model_registry, 'REGISTRY_DIR', str(tmp_path))
+    vectorizer, model = _fit(TEXTS)
+    versions = []
+    for i in range(4):
+        model.components_ = model.components_ + 1.0
+        versions.append(register_model('nmf', vectorizer, model, keep=2))
+    assert list_versions('nmf') == versions[-2:]
+    assert np.allclose(load_model('nmf').model.components_, model.components_)
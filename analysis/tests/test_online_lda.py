@@ -0,0 +1,44 @@
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+import online_lda
+from online_lda import OnlineTopicModel, load_or_create
+
+TEXTS = [
+    "remote work tools slack zoom", "remote team meeting schedule", "focus time at home office",
+    "async communication across time zones", "home office desk and chair", "zoom meeting fatigue",
+]
+
+
+def _vectorizer(texts):
+    return TfidfVectorizer(max_features=5, min_df=1, max_df=0.9).fit(texts)
+
+
+def test_fixed_vocabulary_uses_batch_vectorizer_features():
+    vectorizer = _vectorizer(TEXTS)
+    model = OnlineTopicModel(n_topics=2, vectorizer=vectorizer)
+    model.partial_fit(TEXTS)
+    # 語彙数の上限などはバッチ学習のベクトル化器と同じ
+    assert list(model.feature_names) == list(vectorizer.get_feature_names_out())
+    assert model.components_.shape == (2, 5)
+    assert np.allclose(model.vectorize(TEXTS).toarray(), vectorizer.transform(TEXTS).toarray())
+
+    # 新しい語を含む記事を追加しても語彙は増えない
+    assert model.partial_fit(["brand new vocabulary words here"]) == 1
+    assert model.components_.shape == (2, 5)
+
+
+def test_load_or_create_keeps_vocabulary_for_same_settings(tmp_path, monkeypatch):
+    monkeypatch.setattr(online_lda, 'checkpoint_path', lambda name: str(tmp_path / f"{name}.joblib"))
+    model = load_or_create('en', n_topics=2, vectorizer=_vectorizer(TEXTS))
+    model.partial_fit(TEXTS)
+    model.save(online_lda.checkpoint_path('en'))
+
+    # コーパスが変わっても、設定が同じなら保存した語彙のモデルを引き継ぐ
+    reloaded = load_or_create('en', n_topics=2, vectorizer=_vectorizer(TEXTS[:3]))
+    assert reloaded.num_documents == len(TEXTS)
+    assert list(reloaded.feature_names) == list(model.feature_names)
+
+    # 設定が異なれば新しく作成する
+    other = TfidfVectorizer(max_features=3).fit(TEXTS)
+    assert load_or_create('en', n_topics=2, vectorizer=other).num_documents == 0
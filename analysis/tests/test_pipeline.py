@@ -0,0 +1,28 @@
+import os
+
+from pipeline import Pipeline, Stage
+
+
+def test_stage_scripts_exist(tmp_path):
+    pipeline = Pipeline(state_file=str(tmp_path / "state.json"))
+    for stage in pipeline.stages.values():
+        if stage.script is not None:
+            assert os.path.exists(os.path.join(stage.cwd, stage.script)), stage.name
+
+
+def test_refresh_stage_runs_only_when_requested(tmp_path):
+    # 出力がある refresh=True のステージは、更新を指定したときだけ実行する
+    stage = Stage('scrape', outputs=['scripts/pipeline.py'], function=lambda inputs, outputs: None, refresh=True)
+    pipeline = Pipeline(stages=[stage], state_file=str(tmp_path / "state.json"))
+    assert pipeline.is_fresh(stage)
+    assert not pipeline.is_fresh(stage, refresh=True)
+    assert pipeline.run(dry_run=True, force=True) == {'scrape': 'skipped'}
+    assert pipeline.run(dry_run=True, refresh=True) == {'scrape': 'ran'}
+
+    missing = Stage('scrape', outputs=['no_such_output'], function=lambda inputs, outputs: None, refresh=True)
+    assert not Pipeline(stages=[missing], state_file=str(tmp_path / "state.json")).is_fresh(missing)
+
+
+def test_stage_workers_share_cpus(tmp_path):
+    pipeline = Pipeline(state_file=str(tmp_path / "state.json"), workers=2)
+    assert pipeline.stage_analysis_workers == max(1, (os.cpu_count() or 1) // 2)
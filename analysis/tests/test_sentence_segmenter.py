@@ -0,0 +1,24 @@
+import re
+from collections import OrderedDict
+
+import sentence_segmenter
+from sentence_segmenter import segment, sentences
+
+
+def test_sentences_match_regex_split():
+    text = "Remote work is great!  Is it?  Yes.   "
+    expected = [s.strip() for s in re.split(r'[.!?]+', text) if s.strip()]
+    assert sentences(text, 'en') == expected
+    assert sentences("在宅勤務は便利です。課題もあります！", 'ja') == ["在宅勤務は便利です", "課題もあります"]
+
+
+def test_segment_cache_does_not_keep_texts(monkeypatch):
+    monkeypatch.setattr(sentence_segmenter, 'SEGMENT_CACHE_SIZE', 2)
+    monkeypatch.setattr(sentence_segmenter, '_segment_cache', OrderedDict())
+    texts = [f"Article {i}. Second sentence." for i in range(5)]
+    for text in texts:
+        starts, ends = segment(text)
+        assert segment(text)[0] is starts
+    cache = sentence_segmenter._segment_cache
+    assert len(cache) == 2
+    assert all(not isinstance(key[0], str) or key[0] not in texts for key in cache)
@@ -0,0 +1,35 @@
+import similarity_index
+import tfidf_cache
+from similarity_index import corpus_language, load_or_build
+
+JA_TEXTS = [
+    "リモートワークでは業務効率の向上が課題です。",
+    "リモートワークの業務効率を向上させるツールを紹介します。",
+    "在宅勤務で家族と過ごす時間が増えました。",
+    "在宅勤務により家族との時間が増えたという声があります。",
+    "オンライン会議の疲れを減らす方法。",
+    "オンライン会議で疲れないための工夫。",
+]
+
+
+def _cache_path(tmp_path):
+    def cache_path(*parts):
+        path = tmp_path.joinpath(*parts)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return str(path)
+    return cache_path
+
+
+def test_corpus_language():
+    assert corpus_language(["Remote work improves focus for many teams."]) == 'en'
+    assert corpus_language(JA_TEXTS + ["Remote work improves focus for many teams."]) == 'ja'
+
+
+def test_japanese_articles_use_character_ngrams(tmp_path, monkeypatch):
+    monkeypatch.setattr(similarity_index, 'cache_path', _cache_path(tmp_path))
+    monkeypatch.setattr(tfidf_cache, 'cache_path', _cache_path(tmp_path))
+    index = load_or_build('ja', JA_TEXTS, list(range(len(JA_TEXTS))), n_components=4)
+    assert index.meta['language'] == 'ja'
+    # 文全体が1語になると共通の語がなくなるため、内容の近い記事が最も類似しているかで確かめる
+    for article_id, pair in [(0, 1), (2, 3), (4, 5)]:
+        assert index.similar_to(article_id, k=1, exact=True)[0][0] == pair
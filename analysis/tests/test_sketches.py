@@ -0,0 +1,55 @@
+import random
+from collections import Counter
+
+import pytest
+
+import sketches
+from sketches import SpaceSaving, streaming_top_words
+
+
+def _zipf_tokens(seed, size, vocabulary=500):
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(vocabulary)]
+    return rng.choices([f"w{i}" for i in range(vocabulary)], weights=weights, k=size)
+
+
+def assert_bounds(sketch, true_counts):
+    # 真の回数 <= 推定回数 <= 真の回数 + N / capacity、推定回数 - 誤差 <= 真の回数
+    assert sketch.total == sum(true_counts.values())
+    assert len(sketch) <= sketch.capacity
+    for item, count, lower in sketch.guaranteed():
+        assert lower <= true_counts[item] <= count <= true_counts[item] + sketch.error_bound
+    # N / capacity を超える語は必ず残る
+    for item, count in true_counts.items():
+        if count > sketch.error_bound:
+            assert item in sketch.counts
+
+
+def test_exact_when_capacity_covers_vocabulary():
+    tokens = _zipf_tokens(0, 2000, vocabulary=50)
+    sketch = SpaceSaving(capacity=100).update(tokens)
+    assert dict(sketch.most_common()) == Counter(tokens)
+    assert all(lower == count for _, count, lower in sketch.guaranteed())
+
+
+def test_update_bounds_across_chunks(monkeypatch):
+    monkeypatch.setattr(sketches, 'CHUNK_TOKENS', 300)
+    tokens = _zipf_tokens(1, 5000)
+    assert_bounds(SpaceSaving(capacity=40).update(tokens), Counter(tokens))
+
+
+@pytest.mark.parametrize("capacity", [10, 40])
+def test_merge_keeps_bounds(capacity):
+    shards = [_zipf_tokens(seed, 3000) for seed in range(4)]
+    merged = SpaceSaving(capacity)
+    for shard in shards:
+        merged.merge(SpaceSaving(capacity).update(shard))
+    true_counts = Counter(token for shard in shards for token in shard)
+    assert_bounds(merged, true_counts)
+    # 最頻出の語は合成後も上位に残る
+    assert merged.most_common(1)[0][0] == true_counts.most_common(1)[0][0]
+
+
+def test_streaming_top_words():
+    docs = [["remote", "work"], ["remote", "team"], [], ["remote", "work", "zoom"]]
+    assert streaming_top_words(docs, n=2) == [("remote", 3), ("work", 2)]
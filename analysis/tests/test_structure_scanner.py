@@ -0,0 +1,102 @@
+import random
+import re
+
+import pytest
+
+from structure_scanner import scan_structure, scan_structure_batch
+
+
+def legacy_analyze_structure(text):
+    # 変更前の analyze_structure
+    if not isinstance(text, str) or text == '':
+        return {'headings': 0, 'paragraphs': 0, 'lists': 0, 'avg_paragraph_length': 0}
+    lines = text.split('\n')
+    headings = 0
+    for line in lines:
+        line = line.strip()
+        if len(line) > 0 and len(line) < 100:
+            uppercase_ratio = sum(1 for c in line if c.isupper()) / len(line)
+            if uppercase_ratio > 0.5 or re.match(r'^\d+[\.\)]\s', line):
+                headings += 1
+    paragraphs = len([p for p in re.split(r'\n\s*\n', text) if p.strip()])
+    list_items = len(re.findall(r'^\s*[\-\*\•]\s+', text, re.MULTILINE))
+    if paragraphs > 0:
+        paragraph_texts = [p.strip() for p in re.split(r'\n\s*\n', text) if p.strip()]
+        avg_paragraph_length = sum(len(p) for p in paragraph_texts) / paragraphs
+    else:
+        avg_paragraph_length = 0
+    return {'headings': headings, 'paragraphs': paragraphs, 'lists': list_items,
+            'avg_paragraph_length': avg_paragraph_length}
+
+
+def legacy_analyze_jp_structure(text):
+    # 変更前の analyze_jp_structure
+    if not isinstance(text, str) or text == '':
+        return {'headings': 0, 'paragraphs': 0, 'lists': 0, 'avg_paragraph_length': 0}
+    lines = text.split('\n')
+    headings = 0
+    for line in lines:
+        line = line.strip()
+        if len(line) > 0 and len(line) < 50:
+            if (line.endswith('とは') or line.endswith('について') or
+                    re.match(r'^[\d１２３４５６７８９０]+[\.．、]', line) or
+                    re.match(r'^【.+】$', line) or re.match(r'^■.+', line) or
+                    re.match(r'^●.+', line) or re.match(r'^◆.+', line)):
+                headings += 1
+    paragraphs = len([p for p in re.split(r'\n\s*\n', text) if p.strip()])
+    list_items = len(re.findall(r'^\s*[・※◎○●■□▲△▼▽◆◇★☆→①-⑩]+\s+', text, re.MULTILINE))
+    if paragraphs > 0:
+        paragraph_texts = [p.strip() for p in re.split(r'\n\s*\n', text) if p.strip()]
+        avg_paragraph_length = sum(len(p) for p in paragraph_texts) / paragraphs
+    else:
+        avg_paragraph_length = 0
+    return {'headings': headings, 'paragraphs': paragraphs, 'lists': list_items,
+            'avg_paragraph_length': avg_paragraph_length}
+
+
+EN_TEXTS = [
+    "REMOTE WORK\n\nMany teams now work from home.\n- focus\n- flexibility\n\n1. Hiring\nText here.",
+    "Intro line\r\n\r\nSecond paragraph\r\n* item\r\n",
+    "Line one\x0b\n\x0b\nLine two\n-\n  indented after bare bullet\n\n",
+    "　\n　Full-width indented paragraph　\n\n　\n2) Numbered\n• bullet",
+    "-",
+    "-\n",
+    "\n\n\n",
+    "A\n \nB\n\t\nC",
+]
+
+JP_TEXTS = [
+    "リモートワークとは\n\n在宅勤務のメリットについて\n・通勤がない\n・集中できる\n\n【まとめ】\n本文です。",
+    "１．はじめに\r\n本文\r\n\r\n■ 課題\r\n※ 注意\r\n",
+    "【見出し】の後に文章\n●ポイント\n◆\n  次の行\n\n",
+    "　テレワークについて　\n　\n①　手順\n→ 次へ\n\x0b\n終わり",
+    "・",
+    "とは",
+    "在宅勤務とは何か、そして多くの企業がこの働き方を導入した理由と、これからの課題について",
+]
+
+
+@pytest.mark.parametrize("text", EN_TEXTS + ['', None])
+def test_scan_structure_matches_analyze_structure(text):
+    assert scan_structure(text, 'en') == pytest.approx(legacy_analyze_structure(text))
+
+
+@pytest.mark.parametrize("text", JP_TEXTS + ['', None])
+def test_scan_structure_matches_analyze_jp_structure(text):
+    assert scan_structure(text, 'ja') == pytest.approx(legacy_analyze_jp_structure(text))
+
+
+def test_scan_structure_randomized():
+    # 改行・空白・見出しや箇条書きの記号を組み合わせた入力で比較する
+    pieces = ['\n', '\n\n', ' ', '\t', '\r', '\x0b', '　', '- ', '-', '* ', '• ', '・', '※ ', '①',
+              '1. ', '２、', '【見出し】', '■', 'とは', 'について', 'REMOTE', 'work', 'テレワーク', 'A']
+    rng = random.Random(0)
+    for _ in range(2000):
+        text = ''.join(rng.choice(pieces) for _ in range(rng.randint(1, 12)))
+        assert scan_structure(text, 'en') == pytest.approx(legacy_analyze_structure(text)), repr(text)
+        assert scan_structure(text, 'ja') == pytest.approx(legacy_analyze_jp_structure(text)), repr(text)
+
+
+def test_scan_structure_batch():
+    texts = EN_TEXTS[:3] + [None]
+    assert scan_structure_batch(texts, 'en') == [scan_structure(text, 'en') for text in texts]
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+import tfidf_cache
+from tfidf_cache import TfidfFeatures, cached_tfidf
+
+TEXTS = [
+    "Remote work improves focus for many teams.",
+    "Async communication helps remote teams across time zones.",
+    None,
+    "Video meetings can be tiring; remote teams need breaks.",
+    "Remote onboarding is hard without good documentation.",
+]
+NEW_TEXTS = ["Remote teams and async documentation.", "Nothing in the vocabulary xyz.", ""]
+
+
+def _cache_path(tmp_path):
+    def cache_path(*parts):
+        path = tmp_path.joinpath(*parts)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return str(path)
+    return cache_path
+
+
+@pytest.mark.parametrize("params", [
+    {'max_features': 20, 'stop_words': 'english', 'ngram_range': (1, 2)},
+    {'analyzer': 'char_wb', 'ngram_range': (2, 3), 'min_df': 1},
+])
+def test_save_and_load_give_the_same_transform(tmp_path, params):
+    features = TfidfFeatures.from_texts(TEXTS, **params)
+    features.save(str(tmp_path / "features"))
+    loaded = TfidfFeatures.load(str(tmp_path / "features"))
+
+    assert loaded.feature_names.tolist() == features.feature_names.tolist()
+    assert np.allclose(loaded.matrix.toarray(), features.matrix.toarray())
+    assert np.allclose(loaded.vectorizer.transform(NEW_TEXTS).toarray(),
+                       features.vectorizer.transform(NEW_TEXTS).toarray())
+    assert loaded.vectorizer.get_params() == features.vectorizer.get_params()
+
+
+def test_from_texts_reuses_the_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(tfidf_cache, 'cache_path', _cache_path(tmp_path))
+    vectorizer, matrix = cached_tfidf(TEXTS, name='test', max_features=10)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("キャッシュがあれば学習し直さない")
+
+    monkeypatch.setattr(TfidfFeatures, 'fit', fail)
+    cached_vectorizer, cached_matrix = cached_tfidf(TEXTS, name='test', max_features=10)
+    assert np.allclose(cached_matrix.toarray(), matrix.toarray())
+    assert np.allclose(cached_vectorizer.transform(NEW_TEXTS).toarray(), vectorizer.transform(NEW_TEXTS).toarray())
+    # パラメータやコーパスが変われば別のキャッシュになる
+    with pytest.raises(AssertionError):
+        cached_tfidf(TEXTS, name='test', max_features=5)
+    with pytest.raises(AssertionError):
+        cached_tfidf(TEXTS[:-1], name='test', max_features=10)
@@ -0,0 +1,54 @@
+import random
+from collections import Counter
+
+import numpy as np
+
+from token_store import TokenStore
+
+DOCS = [
+    ["zoom", "slack", "remote", "slack"],
+    ["remote", "zoom", "meeting"],
+    [],
+    ["meeting", "focus", "zoom", "focus"],
+]
+
+
+def test_most_common_tie_order_matches_counter():
+    store = TokenStore.build(DOCS)
+    tokens = [t for doc in DOCS for t in doc]
+    assert store.most_common() == Counter(tokens).most_common()
+    assert store.most_common(2) == Counter(tokens).most_common(2)
+
+
+def test_most_common_tie_order_follows_selected_documents():
+    # 語彙のIDの順（zoom, slack, remote, meeting, focus）ではなく、対象文書内で最初に出現した順に並ぶ
+    store = TokenStore.build(DOCS)
+    docs = [3, 1]
+    tokens = [t for i in docs for t in DOCS[i]]
+    assert store.most_common(docs=docs) == Counter(tokens).most_common()
+    assert [t for t, _ in store.most_common(docs=docs)] == ["meeting", "focus", "zoom", "remote"]
+
+
+def test_most_common_with_mask_matches_counter():
+    rng = random.Random(0)
+    words = [f"w{i}" for i in range(30)]
+    docs = [[rng.choice(words) for _ in range(rng.randint(0, 20))] for _ in range(50)]
+    store = TokenStore.build(docs)
+    keep = store.vocabulary.mask(lambda token: token.endswith(('1', '3', '5')))
+    tokens = [t for doc in docs for t in doc if t.endswith(('1', '3', '5'))]
+    assert store.most_common(keep=keep) == Counter(tokens).most_common()
+
+
+def test_save_and_load_round_trip(tmp_path):
+    store = TokenStore.build(DOCS)
+    store.save(str(tmp_path / "store"))
+    loaded = TokenStore.load(str(tmp_path / "store"))
+    assert isinstance(loaded.ids, np.memmap)
+    assert [loaded.tokens(i) for i in range(len(loaded))] == DOCS
+    assert loaded.most_common() == store.most_common()
+    assert (loaded.to_csr() != store.to_csr()).nnz == 0
+
+
+def test_ngrams_do_not_cross_documents():
+    store = TokenStore.build([["a", "b"], ["c", "d"]])
+    assert store.most_common_ngrams(2) == [(("a", "b"), 1), (("c", "d"), 1)]